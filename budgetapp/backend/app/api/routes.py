@@ -3,30 +3,64 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Body, File, HTTPException, Query, Response, UploadFile
 from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, StringConstraints, ValidationError
+from starlette.concurrency import iterate_in_threadpool
 
 from ..core.config import AppConfig
-from ..core.interfaces import IBudgetService, IReceiptService
+from ..core.interfaces import (
+    IBudgetService,
+    ICategoryRuleService,
+    IJobService,
+    IReceiptService,
+    IVendorService,
+)
+from ..services.jobs import ArchiveTooLargeError
+from ..services.uploads import UploadTooLargeError, UploadWriter
 
 
 class BudgetUpsertRequest(BaseModel):
-    category: str
+    category: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
     monthly_limit: float = 0
     spent: float = 0
     prior_balance: float = 0
 
 
+class ReceiptCategoryRequest(BaseModel):
+    category: str | None = None
+
+
+class CategoryRuleRequest(BaseModel):
+    keyword: str
+    category: str
+    priority: int = 0
+
+
+class VendorAliasRequest(BaseModel):
+    alias: str
+    canonical: str
+    category: str | None = None
+
+
 def build_router(
     config: AppConfig,
     receipt_service: IReceiptService,
     budget_service: IBudgetService,
+    job_service: IJobService,
+    vendor_service: IVendorService,
+    rule_service: ICategoryRuleService,
 ) -> APIRouter:
     # Build a router with injected services.
     router = APIRouter()
+    uploads = UploadWriter(config.receipts_dir, config.max_upload_bytes, config.upload_chunk_bytes)
+
+    def check_upload_size(file: UploadFile) -> None:
+        # Reject early when the multipart parser already knows the size.
+        if file.size is not None and file.size > config.max_upload_bytes:
+            raise HTTPException(status_code=413, detail=str(UploadTooLargeError(config.max_upload_bytes)))
 
     @router.get("/", response_class=HTMLResponse)
     def root() -> FileResponse:
@@ -39,39 +73,186 @@ def build_router(
     def health_check() -> dict[str, str]:
         return {"status": "ok"}
 
-    @router.post("/receipts")
+    @router.post("/receipts", status_code=202)
     async def create_receipt(file: UploadFile = File(...)) -> dict[str, Any]:
-        # Validate image content type before processing.
+        # Validate image content type, then hand OCR off to a background job.
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Upload an image file")
 
-        contents = await file.read()
-        return receipt_service.create_receipt(contents)
+        check_upload_size(file)
+        try:
+            return await job_service.submit_upload(file)
+        except UploadTooLargeError as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    @router.post("/receipts/batch", status_code=202)
+    async def create_receipts_batch(files: list[UploadFile] = File(...)) -> list[dict[str, Any]]:
+        # Several images and/or ZIP archives; one job (or rejection) per image.
+        uploads = [(file.filename or "upload", file.content_type or "", file.file) for file in files]
+        try:
+            return await job_service.submit_batch(uploads)
+        except ArchiveTooLargeError as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    @router.post("/jobs/retry")
+    def retry_jobs() -> dict[str, int]:
+        # Re-queue jobs parked as needs_retry after OCR timeouts.
+        return {"requeued": job_service.retry_jobs()}
+
+    @router.get("/jobs/{job_id}")
+    def get_job(job_id: str) -> dict[str, Any]:
+        job = job_service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
 
     @router.get("/receipts")
-    def list_receipts() -> list[dict[str, Any]]:
-        return receipt_service.list_receipts()
+    def list_receipts(
+        response: Response,
+        limit: int = Query(50, ge=1, le=500),
+        after_id: int | None = None,
+        vendor: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        min_total: float | None = None,
+        max_total: float | None = None,
+    ) -> list[dict[str, Any]]:
+        receipts = receipt_service.list_receipts(
+            limit=limit,
+            after_id=after_id,
+            vendor=vendor,
+            date_from=date_from,
+            date_to=date_to,
+            min_total=min_total,
+            max_total=max_total,
+        )
+        # A full page may have more rows behind it; expose the keyset cursor.
+        if len(receipts) == limit:
+            response.headers["X-Next-After-Id"] = str(receipts[-1]["id"])
+        return receipts
+
+    @router.get("/receipts/search")
+    def search_receipts(
+        response: Response,
+        q: str = Query(..., min_length=1),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+    ) -> list[dict[str, Any]]:
+        results = receipt_service.search_receipts(q, limit=limit, offset=offset)
+        if len(results) == limit:
+            response.headers["X-Next-Offset"] = str(offset + limit)
+        return results
+
+    @router.get("/items/spend")
+    def item_spend(
+        item: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        group_by: str = Query("month", pattern="^(month|item)$"),
+        limit: int = Query(100, ge=1, le=1000),
+    ) -> dict[str, Any]:
+        # `item` matches normalized item names by prefix: "coffee" covers
+        # "COFFEE BEANS 12OZ".
+        return receipt_service.item_spend(item, date_from, date_to, group_by, limit)
 
     @router.get("/receipts/{receipt_id}")
-    def get_receipt(receipt_id: int) -> dict[str, Any]:
-        receipt = receipt_service.get_receipt(receipt_id)
+    def get_receipt(receipt_id: int, fields: str | None = None) -> dict[str, Any]:
+        # `fields` is a comma-separated projection, e.g. `fields=vendor,ocr_text`.
+        projection = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        try:
+            receipt = receipt_service.get_receipt(receipt_id, projection)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
         if not receipt:
             raise HTTPException(status_code=404, detail="Receipt not found")
         return receipt
 
+    @router.put("/receipts/{receipt_id}/category")
+    def update_receipt_category(receipt_id: int, payload: ReceiptCategoryRequest) -> dict[str, Any]:
+        category = (payload.category or "").strip() or None
+        if not receipt_service.update_receipt_category(receipt_id, category):
+            raise HTTPException(status_code=404, detail="Receipt not found")
+        return {"id": receipt_id, "category": category}
+
     @router.get("/export")
     def export_csv() -> StreamingResponse:
-        # Stream CSV export directly from service.
-        output = receipt_service.export_csv()
+        # Stream CSV chunks from the service; each chunk is pulled off the loop.
+        chunks = iterate_in_threadpool(receipt_service.export_csv())
         return StreamingResponse(
-            output,
+            chunks,
             media_type="text/csv",
             headers={"Content-Disposition": "attachment; filename=receipts.csv"},
         )
 
+    @router.get("/ocr-cache")
+    def ocr_cache_stats() -> dict[str, Any]:
+        return receipt_service.ocr_cache_stats()
+
+    @router.get("/vendors/aliases")
+    def list_vendor_aliases() -> list[dict[str, Any]]:
+        return vendor_service.list_aliases()
+
+    @router.post("/vendors/aliases")
+    def add_vendor_alias(payload: VendorAliasRequest) -> dict[str, Any]:
+        canonical = payload.canonical.strip()
+        if not canonical:
+            raise HTTPException(status_code=400, detail="Canonical vendor must not be blank")
+        category = (payload.category or "").strip() or None
+        try:
+            return vendor_service.add_alias(payload.alias.strip(), canonical, category)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    @router.get("/vendors/lookup")
+    def lookup_vendor(name: str = Query(..., min_length=1)) -> dict[str, Any]:
+        return vendor_service.lookup(name)
+
+    @router.post("/vendors/renormalize")
+    def renormalize_vendors() -> dict[str, int]:
+        # Rename stored receipts after aliases were added.
+        return vendor_service.renormalize()
+
+    def rule_fields(payload: CategoryRuleRequest) -> tuple[str, str, int]:
+        category = payload.category.strip()
+        if not category:
+            raise HTTPException(status_code=400, detail="Category must not be blank")
+        return payload.keyword, category, payload.priority
+
+    @router.get("/rules")
+    def list_rules() -> list[dict[str, Any]]:
+        return rule_service.list_rules()
+
+    @router.post("/rules")
+    def add_rule(payload: CategoryRuleRequest) -> dict[str, Any]:
+        try:
+            return rule_service.add_rule(*rule_fields(payload))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    @router.post("/rules/recategorize")
+    def recategorize_receipts(overwrite: bool = False) -> dict[str, int]:
+        # Uncategorized receipts only, unless `overwrite=true`.
+        return rule_service.recategorize(overwrite)
+
+    @router.put("/rules/{rule_id}")
+    def update_rule(rule_id: int, payload: CategoryRuleRequest) -> dict[str, Any]:
+        try:
+            rule = rule_service.update_rule(rule_id, *rule_fields(payload))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if not rule:
+            raise HTTPException(status_code=404, detail="Rule not found")
+        return rule
+
+    @router.delete("/rules/{rule_id}")
+    def delete_rule(rule_id: int) -> dict[str, Any]:
+        if not rule_service.delete_rule(rule_id):
+            raise HTTPException(status_code=404, detail="Rule not found")
+        return {"id": rule_id, "deleted": True}
+
     @router.get("/budgets")
-    def list_budgets() -> list[dict[str, Any]]:
-        return budget_service.list_budgets()
+    def list_budgets(month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$")) -> list[dict[str, Any]]:
+        return budget_service.list_budgets(month)
 
     @router.post("/budgets")
     def upsert_budget(payload: BudgetUpsertRequest) -> dict[str, Any]:
@@ -82,6 +263,35 @@ def build_router(
             payload.prior_balance,
         )
 
+    @router.post("/budgets/bulk")
+    def bulk_upsert_budgets(
+        payload: list[BudgetUpsertRequest | dict[str, Any]] = Body(..., max_length=config.max_bulk_budget_rows),
+    ) -> dict[str, Any]:
+        # Bad rows are reported by index, not fatal: objects that are not a
+        # valid budget arrive as plain dicts and are validated again here
+        # only to collect their errors.
+        rows: list[tuple[str, float, float, float]] = []
+        errors: list[dict[str, Any]] = []
+        for index, item in enumerate(payload):
+            if isinstance(item, dict):
+                try:
+                    item = BudgetUpsertRequest.model_validate(item)
+                except ValidationError as exc:
+                    errors.append(
+                        {
+                            "index": index,
+                            "errors": [
+                                {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                                for error in exc.errors()
+                            ],
+                        }
+                    )
+                    continue
+            rows.append((item.category, item.monthly_limit, item.spent, item.prior_balance))
+
+        imported = budget_service.bulk_upsert_budgets(rows)
+        return {"imported": imported, "errors": errors}
+
     @router.post("/budgets/upload")
     async def upload_budgets(file: UploadFile = File(...)) -> dict[str, Any]:
         if not file.filename:
@@ -91,9 +301,13 @@ def build_router(
         if suffix not in {".csv", ".xlsx", ".xls"}:
             raise HTTPException(status_code=400, detail="Upload a CSV or Excel file")
 
-        contents = await file.read()
+        check_upload_size(file)
+        try:
+            contents = await uploads.read_async(file)
+        except UploadTooLargeError as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
         try:
-            return budget_service.import_budgets(file.filename, contents)
+            return await budget_service.import_budgets_async(file.filename, contents)
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -14,6 +14,63 @@ class AppConfig:
     receipts_dir: Path
     db_path: Path
     static_dir: Path
+    # SQLite connection tuning applied to every pooled connection.
+    db_journal_mode: str = "WAL"
+    db_synchronous: str = "NORMAL"
+    db_cache_size_kib: int = 16384
+    db_mmap_size: int = 64 * 1024 * 1024
+    db_busy_timeout_ms: int = 5000
+    # Async routes await repository calls on a dedicated DB thread when set;
+    # otherwise they fall back to the default thread pool.
+    db_async_executor: bool = True
+    # Optional group commit: receipt inserts arriving within the window (or up
+    # to the batch size) share one transaction.
+    receipt_write_batching: bool = False
+    receipt_write_window_ms: float = 5.0
+    receipt_write_batch_size: int = 64
+    # Worker threads that OCR, parse and store uploaded receipts.
+    receipt_job_workers: int = 2
+    # OCR worker processes; 0 runs Tesseract inline in the calling thread.
+    ocr_workers: int = 0
+    # Limit on one pool task. None derives it from the per-call timeout:
+    # one call per OCR pass (two when tiered) plus the margin for decoding
+    # and preprocessing. An explicit value below that is rejected at startup.
+    ocr_task_timeout_s: float | None = None
+    ocr_task_margin_s: float = 30.0
+    # Per Tesseract call; the subprocess is killed when it runs over.
+    ocr_call_timeout_s: float = 60.0
+    # Consecutive OCR timeouts that open the circuit breaker, and how long
+    # it stays open before a trial call is let through.
+    ocr_breaker_failures: int = 5
+    ocr_breaker_reset_s: float = 60.0
+    # Timed-out jobs are parked as needs_retry until this many attempts.
+    ocr_max_attempts: int = 3
+    # Downscale/clean photos before OCR; dpi is relative to receipt width.
+    ocr_preprocess: bool = True
+    ocr_target_dpi: int = 300
+    ocr_adaptive_threshold: bool = True
+    ocr_crop_borders: bool = True
+    # "tiered" reads a low-resolution pass first and only re-runs OCR at full
+    # resolution when vendor/date/total confidence is below the threshold.
+    ocr_mode: str = "tiered"
+    ocr_fast_dpi: int = 150
+    ocr_min_confidence: float = 70.0
+    # Uploads stream to disk in chunks; larger bodies are rejected with 413.
+    max_upload_bytes: int = 25 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+    # ZIP archives in one batch upload may hold at most this many files and
+    # bytes once uncompressed; larger batches are rejected with 413.
+    max_archive_entries: int = 500
+    max_archive_bytes: int = 512 * 1024 * 1024
+    # Rows accepted by one POST /budgets/bulk request.
+    max_bulk_budget_rows: int = 1000
+    # Persistent OCR results keyed by upload hash; least recently used
+    # entries are evicted past either limit. 0 entries disables the cache.
+    ocr_cache_max_entries: int = 10000
+    ocr_cache_max_bytes: int = 64 * 1024 * 1024
+    # OCR vendor spellings at least this similar (bigram Dice) to a known
+    # alias are stored under its canonical name.
+    vendor_match_threshold: float = 0.7
 
     @classmethod
     def from_environment(cls) -> "AppConfig":
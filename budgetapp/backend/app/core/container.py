@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from functools import cached_property
+from dataclasses import replace
+from functools import cached_property, partial
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,12 +12,32 @@ from fastapi.staticfiles import StaticFiles
 
 from .config import AppConfig
 from .database import Database
+from .executor import DatabaseExecutor
 from ..api.routes import build_router
+from ..repositories.async_repositories import AsyncBudgetRepository, AsyncJobRepository
 from ..repositories.budgets import BudgetRepository
+from ..repositories.group_commit import GroupCommitReceiptRepository
+from ..repositories.jobs import JobRepository
+from ..repositories.ocr_cache import OcrCacheRepository
 from ..repositories.receipts import ReceiptRepository
+from ..repositories.rules import CategoryRuleRepository
+from ..repositories.vendors import VendorAliasRepository
 from ..services.budgets import BudgetService
-from ..services.ocr import OcrService, ReceiptParser
+from ..services.jobs import ReceiptJobService
+from ..services.ocr import (
+    CircuitBreaker,
+    CircuitBreakingOcrService,
+    ImagePreprocessor,
+    OcrService,
+    ProcessPoolOcrService,
+    OcrCallable,
+    ReceiptParser,
+    TieredOcr,
+    tesseract_image_to_string,
+)
 from ..services.receipts import ReceiptService
+from ..services.rules import CategoryRuleService
+from ..services.vendors import VendorService
 
 
 class Container:
@@ -30,10 +51,16 @@ class Container:
 
     @cached_property
     def db(self) -> Database:
-        return Database(self.config.db_path)
+        return Database.from_config(self.config)
 
     @cached_property
     def receipt_repository(self) -> ReceiptRepository:
+        if self.config.receipt_write_batching:
+            return GroupCommitReceiptRepository(
+                self.db,
+                batch_window_ms=self.config.receipt_write_window_ms,
+                max_batch_size=self.config.receipt_write_batch_size,
+            )
         return ReceiptRepository(self.db)
 
     @cached_property
@@ -41,13 +68,100 @@ class Container:
         return BudgetRepository(self.db)
 
     @cached_property
-    def ocr_service(self) -> OcrService:
-        return OcrService()
+    def db_executor(self) -> DatabaseExecutor | None:
+        return DatabaseExecutor() if self.config.db_async_executor else None
+
+    @cached_property
+    def async_budget_repository(self) -> AsyncBudgetRepository:
+        return AsyncBudgetRepository(self.budget_repository, self.db_executor)
+
+    @cached_property
+    def ocr_preprocessor(self) -> ImagePreprocessor | None:
+        if not self.config.ocr_preprocess:
+            return None
+        return ImagePreprocessor(
+            target_dpi=self.config.ocr_target_dpi,
+            adaptive_threshold=self.config.ocr_adaptive_threshold,
+            crop_borders=self.config.ocr_crop_borders,
+        )
+
+    @cached_property
+    def ocr_callable(self) -> OcrCallable:
+        if self.config.ocr_mode == "tiered":
+            return TieredOcr(
+                fast_preprocessor=replace(
+                    self.ocr_preprocessor or ImagePreprocessor(),
+                    target_dpi=self.config.ocr_fast_dpi,
+                ),
+                full_preprocessor=self.ocr_preprocessor,
+                min_confidence=self.config.ocr_min_confidence,
+                timeout_s=self.config.ocr_call_timeout_s,
+            )
+        return partial(
+            tesseract_image_to_string,
+            preprocessor=self.ocr_preprocessor,
+            timeout_s=self.config.ocr_call_timeout_s,
+        )
+
+    @cached_property
+    def ocr_task_timeout_s(self) -> float | None:
+        # A running pool task cannot be cancelled, so a limit shorter than
+        # its Tesseract calls would report a timeout while the worker stays busy.
+        configured = self.config.ocr_task_timeout_s
+        call_timeout = self.config.ocr_call_timeout_s
+        if not call_timeout:
+            return configured
+        passes = 2 if self.config.ocr_mode == "tiered" else 1
+        needed = call_timeout * passes + self.config.ocr_task_margin_s
+        if configured is None:
+            return needed
+        if configured < needed:
+            raise ValueError(
+                f"ocr_task_timeout_s ({configured}s) must cover {passes} OCR pass(es) of "
+                f"ocr_call_timeout_s plus ocr_task_margin_s ({needed}s)"
+            )
+        return configured
+
+    @cached_property
+    def ocr_engine(self) -> OcrService | ProcessPoolOcrService:
+        if self.config.ocr_workers > 0:
+            return ProcessPoolOcrService(
+                workers=self.config.ocr_workers,
+                task_timeout_s=self.ocr_task_timeout_s,
+                ocr_callable=self.ocr_callable,
+            )
+        return OcrService(self.ocr_callable)
+
+    @cached_property
+    def ocr_service(self) -> CircuitBreakingOcrService:
+        breaker = CircuitBreaker(
+            failure_threshold=self.config.ocr_breaker_failures,
+            reset_timeout_s=self.config.ocr_breaker_reset_s,
+        )
+        return CircuitBreakingOcrService(self.ocr_engine, breaker)
+
+    @cached_property
+    def ocr_cache(self) -> OcrCacheRepository | None:
+        if self.config.ocr_cache_max_entries <= 0:
+            return None
+        return OcrCacheRepository(
+            self.db,
+            max_entries=self.config.ocr_cache_max_entries,
+            max_bytes=self.config.ocr_cache_max_bytes,
+        )
 
     @cached_property
     def receipt_parser(self) -> ReceiptParser:
         return ReceiptParser()
 
+    @cached_property
+    def vendor_service(self) -> VendorService:
+        return VendorService(VendorAliasRepository(self.db), self.config.vendor_match_threshold)
+
+    @cached_property
+    def category_rule_service(self) -> CategoryRuleService:
+        return CategoryRuleService(CategoryRuleRepository(self.db))
+
     @cached_property
     def receipt_service(self) -> ReceiptService:
         return ReceiptService(
@@ -55,11 +169,38 @@ class Container:
             config=self.config,
             ocr_service=self.ocr_service,
             parser=self.receipt_parser,
+            ocr_cache=self.ocr_cache,
+            vendors=self.vendor_service,
+            categorizer=self.category_rule_service,
+        )
+
+    @cached_property
+    def job_repository(self) -> JobRepository:
+        return JobRepository(self.db)
+
+    @cached_property
+    def async_job_repository(self) -> AsyncJobRepository:
+        return AsyncJobRepository(self.job_repository, self.db_executor)
+
+    @cached_property
+    def job_service(self) -> ReceiptJobService:
+        return ReceiptJobService(
+            repository=self.job_repository,
+            receipt_service=self.receipt_service,
+            # Enough job threads to keep every OCR process busy.
+            workers=max(self.config.receipt_job_workers, self.config.ocr_workers),
+            max_attempts=self.config.ocr_max_attempts,
+            max_archive_entries=self.config.max_archive_entries,
+            max_archive_bytes=self.config.max_archive_bytes,
+            async_repository=self.async_job_repository,
         )
 
     @cached_property
     def budget_service(self) -> BudgetService:
-        return BudgetService(repository=self.budget_repository)
+        return BudgetService(
+            repository=self.budget_repository,
+            async_repository=self.async_budget_repository,
+        )
 
     def create_app(self) -> FastAPI:
         # Build the FastAPI application and register middleware/routes.
@@ -68,7 +209,19 @@ class Container:
             # Ensure directories and schema are ready before requests.
             self.config.ensure_directories()
             self.db.init()
+            if isinstance(self.ocr_engine, ProcessPoolOcrService):
+                self.ocr_engine.warm_up()
+            self.job_service.resume_unfinished()
             yield
+            self.job_service.shutdown()
+            if isinstance(self.ocr_engine, ProcessPoolOcrService):
+                self.ocr_engine.shutdown()
+            if self.db_executor is not None:
+                self.db_executor.shutdown()
+            # Flush queued receipt inserts before the connections go away.
+            if isinstance(self.receipt_repository, GroupCommitReceiptRepository):
+                self.receipt_repository.close()
+            self.db.close()
 
         app = FastAPI(
             title="Receipt OCR Budget Reconciliation API",
@@ -84,7 +237,14 @@ class Container:
         )
 
         app.include_router(
-            build_router(self.config, self.receipt_service, self.budget_service)
+            build_router(
+                self.config,
+                self.receipt_service,
+                self.budget_service,
+                self.job_service,
+                self.vendor_service,
+                self.category_rule_service,
+            )
         )
         app.mount("/static", StaticFiles(directory=self.config.static_dir), name="static")
 
@@ -2,75 +2,125 @@
 
 from __future__ import annotations
 
-import re
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
 
+from .config import AppConfig
+from .migrations import migrate
+
+
+class _ThreadConnection:
+    # Held only by the thread-local, so it is collected when its thread exits.
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+def _release(connections: set[sqlite3.Connection], lock: threading.Lock, conn: sqlite3.Connection) -> None:
+    # Runs when a thread ends; close() may already have closed the connection.
+    with lock:
+        if conn not in connections:
+            return
+        connections.discard(conn)
+    conn.close()
+
 
 class Database:
-    """Lightweight DB helper for connecting and initializing schema."""
-    _IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
-    def __init__(self, db_path: Path) -> None:
+    """Lightweight DB helper for connecting and initializing schema.
+
+    Connections are pooled per thread: the first ``connect()`` on a thread
+    opens and tunes a connection, later calls on that thread reuse it. A
+    thread's connection is closed when the thread exits.
+    """
+    _JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+    _SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+    def __init__(
+        self,
+        db_path: Path,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        cache_size_kib: int = 16384,
+        mmap_size: int = 64 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+    ) -> None:
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in self._JOURNAL_MODES:
+            raise ValueError(f"Invalid journal mode: {journal_mode}")
+        if synchronous not in self._SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+
         self._db_path = db_path
+        self._journal_mode = journal_mode
+        self._synchronous = synchronous
+        self._cache_size_kib = int(cache_size_kib)
+        self._mmap_size = int(mmap_size)
+        self._busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        self._connections: set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "Database":
+        return cls(
+            config.db_path,
+            journal_mode=config.db_journal_mode,
+            synchronous=config.db_synchronous,
+            cache_size_kib=config.db_cache_size_kib,
+            mmap_size=config.db_mmap_size,
+            busy_timeout_ms=config.db_busy_timeout_ms,
+        )
 
     def connect(self) -> sqlite3.Connection:
+        # Reuse this thread's connection; `with conn:` still scopes transactions.
+        held = getattr(self._local, "held", None)
+        if held is None:
+            conn = self.open_connection()
+            held = _ThreadConnection(conn)
+            with self._lock:
+                self._connections.add(conn)
+            # Worker threads come and go (anyio recycles idle ones), so each
+            # connection is released with its thread rather than at close().
+            weakref.finalize(held, _release, self._connections, self._lock, conn)
+            self._local.held = held
+        return held.conn
+
+    def open_connection(self) -> sqlite3.Connection:
+        # Open a new, unpooled connection with the configured pragmas applied.
+        # The caller owns it and is responsible for closing it.
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=self._busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
         # Row factory allows dict-like access to columns.
-        conn = sqlite3.connect(self._db_path)
         conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA journal_mode={self._journal_mode}")
+        conn.execute(f"PRAGMA synchronous={self._synchronous}")
+        # Negative cache_size is interpreted by SQLite as KiB rather than pages.
+        conn.execute(f"PRAGMA cache_size=-{self._cache_size_kib}")
+        conn.execute(f"PRAGMA mmap_size={self._mmap_size}")
+        conn.execute(f"PRAGMA busy_timeout={self._busy_timeout_ms}")
         return conn
 
+    def close(self) -> None:
+        # Close every pooled connection; threads reconnect lazily afterwards.
+        # The old thread-local is dropped outside the lock: dropping it runs
+        # this thread's finalizer, which takes the lock itself.
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+            stale, self._local = self._local, threading.local()
+        del stale
+        for conn in connections:
+            # Let SQLite refresh planner statistics for the new indexes.
+            conn.execute("PRAGMA optimize")
+            conn.close()
+
     def init(self) -> None:
-        # Create tables if they do not already exist.
-        with self.connect() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS receipts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT,
-                    vendor TEXT,
-                    total REAL,
-                    image_path TEXT,
-                    ocr_text TEXT,
-                    created_at TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS budgets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    category TEXT UNIQUE,
-                    monthly_limit REAL DEFAULT 0,
-                    spent REAL DEFAULT 0,
-                    prior_balance REAL DEFAULT 0
-                );
-                """
-            )
-            self._ensure_column(conn, "budgets", "prior_balance", "REAL", "0")
-
-    def _ensure_column(
-        self,
-        conn: sqlite3.Connection,
-        table: str,
-        column: str,
-        column_type: str,
-        default_value: str,
-    ) -> None:
-        self._assert_identifier(table, "table")
-        self._assert_identifier(column, "column")
-        columns = {
-            row["name"]
-            for row in conn.execute(f"PRAGMA table_info({self._quote_identifier(table)})").fetchall()
-        }
-        if column not in columns:
-            conn.execute(
-                "ALTER TABLE "
-                + self._quote_identifier(table)
-                + " ADD COLUMN "
-                + self._quote_identifier(column)
-                + f" {column_type} DEFAULT {default_value}"
-            )
-
-    def _assert_identifier(self, value: str, label: str) -> None:
-        if not self._IDENTIFIER_RE.match(value):
-            raise ValueError(f"Invalid {label} identifier: {value}")
-
-    def _quote_identifier(self, value: str) -> str:
-        return f'"{value}"'
+        # Bring the schema up to date; a current database costs one pragma read.
+        migrate(self.connect())
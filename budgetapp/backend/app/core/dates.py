@@ -0,0 +1,37 @@
+"""Normalization helpers for the date formats receipts are parsed with."""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+
+
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})")
+_US_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{2,4})$")
+
+
+def iso_date(value: str | None) -> str | None:
+    # Accept YYYY-MM-DD and US-style M/D/YY(YY); anything else is unknown.
+    if not value:
+        return None
+    value = value.strip()
+    match = _ISO_DATE_RE.match(value)
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+    else:
+        match = _US_DATE_RE.match(value)
+        if not match:
+            return None
+        month, day, year = (int(part) for part in match.groups())
+        if year < 100:
+            year += 2000
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def month_key(receipt_date: str | None, created_at: str | None = None) -> str | None:
+    # Bucket a receipt by its own date, falling back to when it was recorded.
+    normalized = iso_date(receipt_date) or iso_date(created_at)
+    return normalized[:7] if normalized else None
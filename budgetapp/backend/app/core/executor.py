@@ -0,0 +1,29 @@
+"""Dedicated executor thread for blocking database work."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class DatabaseExecutor:
+    """Runs blocking repository calls off the event loop on one thread.
+
+    A single worker serializes SQLite writes (no busy-waiting between
+    writers) and reuses one pooled connection for every call.
+    """
+    def __init__(self, thread_name_prefix: str = "db") -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name_prefix)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        # Wait for queued work so no write is dropped on shutdown.
+        self._executor.shutdown(wait=True)
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from io import StringIO
 from pathlib import Path
-from typing import Any, Protocol
+from typing import Any, BinaryIO, Iterable, Iterator, Protocol, Sequence
+
+
+class IAsyncUpload(Protocol):
+    async def read(self, size: int = -1) -> bytes:
+        ...
 
 
 class IOcrService(Protocol):
@@ -14,6 +18,15 @@ class ReceiptParseResult(Protocol):
     date: str | None
     vendor: str
     total: float
+    # (name, amount, quantity) per line item.
+    items: Sequence[tuple[str, float, int]]
+
+
+class OcrFieldConfidence(Protocol):
+    tier: str
+    vendor: float
+    date: float
+    total: float
 
 
 class IReceiptParser(Protocol):
@@ -21,6 +34,32 @@ class IReceiptParser(Protocol):
         ...
 
 
+class IOcrCache(Protocol):
+    def get(self, content_hash: str) -> Any | None:
+        ...
+
+    def put(self, content_hash: str, ocr_text: str) -> None:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        ...
+
+
+class VendorMatchResult(Protocol):
+    canonical: str
+    category: str | None
+
+
+class IVendorNormalizer(Protocol):
+    def canonicalize(self, vendor: str) -> VendorMatchResult:
+        ...
+
+
+class ICategorizer(Protocol):
+    def categorize(self, vendor: str, text: str) -> str | None:
+        ...
+
+
 class IReceiptRepository(Protocol):
     def insert_receipt(
         self,
@@ -30,21 +69,62 @@ class IReceiptRepository(Protocol):
         image_path: str,
         ocr_text: str,
         created_at: str,
+        category: str | None = None,
+        ocr_confidence: OcrFieldConfidence | None = None,
+        items: Sequence[tuple[str, float, int]] = (),
     ) -> int:
         ...
 
-    def list_receipts(self) -> list[dict[str, Any]]:
+    def update_receipt_category(self, receipt_id: int, category: str | None) -> bool:
+        ...
+
+    def rebuild_spend_rollups(self) -> int:
+        ...
+
+    def find_receipt_id_by_image_path(self, image_path: str, created_after: str | None = None) -> int | None:
+        ...
+
+    def relocate_image_paths(self, moves: Iterable[tuple[str, str]]) -> int:
+        ...
+
+    def list_receipts(
+        self,
+        limit: int = 50,
+        after_id: int | None = None,
+        vendor: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        min_total: float | None = None,
+        max_total: float | None = None,
+    ) -> list[dict[str, Any]]:
+        ...
+
+    def get_receipt(
+        self,
+        receipt_id: int,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any] | None:
         ...
 
-    def get_receipt(self, receipt_id: int) -> dict[str, Any] | None:
+    def search_receipts(self, query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+        ...
+
+    def item_spend(
+        self,
+        item: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        group_by: str = "month",
+        limit: int = 100,
+    ) -> dict[str, Any]:
         ...
 
-    def export_rows(self) -> list[dict[str, Any]]:
+    def export_rows(self, batch_size: int = 1000) -> Iterator[dict[str, Any]]:
         ...
 
 
 class IBudgetRepository(Protocol):
-    def list_budgets(self) -> list[dict[str, Any]]:
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
         ...
 
     def upsert_budget(
@@ -56,23 +136,199 @@ class IBudgetRepository(Protocol):
     ) -> dict[str, Any]:
         ...
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        ...
+
+
+class IVendorAliasRepository(Protocol):
+    def list_aliases(self) -> Sequence[Any]:
+        ...
+
+    def upsert_alias(self, alias_key: str, alias: str, canonical: str, category: str | None = None) -> None:
+        ...
+
+    def list_vendor_names(self) -> list[str]:
+        ...
+
+    def rename_vendors(self, renames: Iterable[tuple[str, str, str | None]]) -> int:
+        ...
+
+
+class ICategoryRuleRepository(Protocol):
+    def list_rules(self) -> list[dict[str, Any]]:
+        ...
+
+    def insert_rule(self, keyword: str, category: str, priority: int = 0) -> dict[str, Any]:
+        ...
+
+    def update_rule(self, rule_id: int, keyword: str, category: str, priority: int = 0) -> dict[str, Any] | None:
+        ...
+
+    def delete_rule(self, rule_id: int) -> bool:
+        ...
+
+    def list_categorization_inputs(
+        self,
+        after_id: int = 0,
+        limit: int = 1000,
+        uncategorized_only: bool = True,
+    ) -> Sequence[Any]:
+        ...
+
+    def update_categories(self, updates: Iterable[tuple[int, str]]) -> int:
+        ...
+
+
+class IJobRepository(Protocol):
+    def create_job(self, job_id: str, image_path: str, created_at: str) -> None:
+        ...
+
+    def mark_queued(self, job_id: str) -> None:
+        ...
+
+    def mark_running(self, job_id: str) -> None:
+        ...
+
+    def mark_done(self, job_id: str, receipt_id: int) -> None:
+        ...
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        ...
+
+    def mark_needs_retry(self, job_id: str, error: str) -> None:
+        ...
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        ...
+
+    def list_unfinished_jobs(
+        self,
+        statuses: Sequence[str] = ("queued", "running", "needs_retry"),
+    ) -> list[dict[str, Any]]:
+        ...
+
+    def relocate_image_paths(self, moves: Iterable[tuple[str, str]]) -> int:
+        ...
+
+
+class IAsyncJobRepository(Protocol):
+    async def create_job(self, job_id: str, image_path: str, created_at: str) -> None:
+        ...
+
+
+class IAsyncBudgetRepository(Protocol):
+    async def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
+        ...
+
+    async def upsert_budget(
+        self,
+        category: str,
+        monthly_limit: float,
+        spent: float,
+        prior_balance: float = 0,
+    ) -> dict[str, Any]:
+        ...
+
+    async def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        ...
+
 
 class IReceiptService(Protocol):
     def create_receipt(self, contents: bytes) -> dict[str, Any]:
         ...
 
-    def list_receipts(self) -> list[dict[str, Any]]:
+    def list_receipts(
+        self,
+        limit: int = 50,
+        after_id: int | None = None,
+        vendor: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        min_total: float | None = None,
+        max_total: float | None = None,
+    ) -> list[dict[str, Any]]:
+        ...
+
+    def get_receipt(
+        self,
+        receipt_id: int,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any] | None:
+        ...
+
+    def search_receipts(self, query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+        ...
+
+    def update_receipt_category(self, receipt_id: int, category: str | None) -> bool:
+        ...
+
+    def item_spend(
+        self,
+        item: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        group_by: str = "month",
+        limit: int = 100,
+    ) -> dict[str, Any]:
+        ...
+
+    def export_csv(self) -> Iterable[str]:
+        ...
+
+    def ocr_cache_stats(self) -> dict[str, Any]:
+        ...
+
+
+class IJobService(Protocol):
+    async def submit_receipt(self, contents: bytes) -> dict[str, Any]:
+        ...
+
+    async def submit_upload(self, upload: IAsyncUpload) -> dict[str, Any]:
+        ...
+
+    async def submit_batch(self, uploads: Sequence[tuple[str, str, BinaryIO]]) -> list[dict[str, Any]]:
+        ...
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        ...
+
+    def retry_jobs(self) -> int:
+        ...
+
+
+class IVendorService(IVendorNormalizer, Protocol):
+    def lookup(self, vendor: str) -> dict[str, Any]:
+        ...
+
+    def list_aliases(self) -> list[dict[str, Any]]:
+        ...
+
+    def add_alias(self, alias: str, canonical: str, category: str | None = None) -> dict[str, Any]:
+        ...
+
+    def renormalize(self) -> dict[str, int]:
+        ...
+
+
+class ICategoryRuleService(ICategorizer, Protocol):
+    def list_rules(self) -> list[dict[str, Any]]:
+        ...
+
+    def add_rule(self, keyword: str, category: str, priority: int = 0) -> dict[str, Any]:
+        ...
+
+    def update_rule(self, rule_id: int, keyword: str, category: str, priority: int = 0) -> dict[str, Any] | None:
         ...
 
-    def get_receipt(self, receipt_id: int) -> dict[str, Any] | None:
+    def delete_rule(self, rule_id: int) -> bool:
         ...
 
-    def export_csv(self) -> StringIO:
+    def recategorize(self, overwrite: bool = False) -> dict[str, int]:
         ...
 
 
 class IBudgetService(Protocol):
-    def list_budgets(self) -> list[dict[str, Any]]:
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
         ...
 
     def upsert_budget(
@@ -84,5 +340,11 @@ class IBudgetService(Protocol):
     ) -> dict[str, Any]:
         ...
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        ...
+
     def import_budgets(self, filename: str, contents: bytes) -> dict[str, Any]:
         ...
+
+    async def import_budgets_async(self, filename: str, contents: bytes) -> dict[str, Any]:
+        ...
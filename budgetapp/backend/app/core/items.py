@@ -0,0 +1,21 @@
+"""Normalization helpers for parsed line item names."""
+
+from __future__ import annotations
+
+import re
+
+
+# Words with a digit are sizes, counts or codes ("12OZ", "2%", "1GAL").
+_ITEM_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_SIZE_WORD_RE = re.compile(r"\S*\d\S*")
+
+
+def item_key(name: str) -> str:
+    # "COFFEE BEANS 12OZ" and "Coffee Beans" both index as "coffee beans".
+    return " ".join(_ITEM_WORD_RE.findall(_SIZE_WORD_RE.sub(" ", name.lower())))
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    # Smallest string greater than every string starting with `prefix`, so
+    # `key >= prefix AND key < bound` is a prefix match an index can seek.
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
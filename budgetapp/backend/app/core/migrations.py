@@ -0,0 +1,449 @@
+"""Versioned schema migrations keyed on SQLite's ``PRAGMA user_version``."""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from .dates import iso_date, month_key
+
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One ordered schema step; runs once, inside its own transaction."""
+    version: int
+    description: str
+    statements: tuple[str, ...] = ()
+    apply: Callable[[sqlite3.Connection], None] | None = None
+
+
+def _add_column_if_missing(
+    conn: sqlite3.Connection,
+    table: str,
+    column: str,
+    column_type: str,
+    default_value: str,
+) -> None:
+    # Only used by steps that upgrade databases created before versioning.
+    for value, label in ((table, "table"), (column, "column")):
+        if not _IDENTIFIER_RE.match(value):
+            raise ValueError(f"Invalid {label} identifier: {value}")
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")').fetchall()}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {column_type} DEFAULT {default_value}')
+
+
+def _backfill_receipt_months(conn: sqlite3.Connection) -> None:
+    rows = conn.execute("SELECT id, date, created_at FROM receipts WHERE month IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE receipts SET month = ? WHERE id = ?",
+        [(month_key(row[1], row[2]), row[0]) for row in rows],
+    )
+
+
+def _index_receipt_iso_dates(conn: sqlite3.Connection) -> None:
+    # date keeps the text as parsed ("01/02/2024"); date_iso is the same day
+    # as YYYY-MM-DD, so range filters compare correctly.
+    _add_column_if_missing(conn, "receipts", "date_iso", "TEXT", "NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_receipts_date_iso ON receipts(date_iso, id)")
+    rows = conn.execute("SELECT id, date FROM receipts WHERE date IS NOT NULL AND date_iso IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE receipts SET date_iso = ? WHERE id = ?",
+        [(iso_date(row[1]), row[0]) for row in rows],
+    )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    # Steps 1-3 use IF NOT EXISTS because databases created before versioning
+    # start at user_version 0 but may already contain these objects.
+    Migration(
+        1,
+        "Create receipts and budgets tables",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS receipts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                vendor TEXT,
+                total REAL,
+                image_path TEXT,
+                ocr_text TEXT,
+                created_at TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS budgets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT UNIQUE,
+                monthly_limit REAL DEFAULT 0,
+                spent REAL DEFAULT 0,
+                prior_balance REAL DEFAULT 0
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "Add budgets.prior_balance to pre-versioned databases",
+        apply=lambda conn: _add_column_if_missing(conn, "budgets", "prior_balance", "REAL", "0"),
+    ),
+    Migration(
+        3,
+        "Index receipt list filters on a normalized ISO date",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS idx_receipts_vendor ON receipts(vendor COLLATE NOCASE, id)",
+            "CREATE INDEX IF NOT EXISTS idx_receipts_total ON receipts(total, id)",
+        ),
+        apply=_index_receipt_iso_dates,
+    ),
+    Migration(
+        4,
+        "Categorize receipts and maintain monthly spend rollups",
+        statements=(
+            "ALTER TABLE receipts ADD COLUMN category TEXT",
+            "ALTER TABLE receipts ADD COLUMN month TEXT",
+            """
+            CREATE TABLE spend_rollups (
+                category TEXT NOT NULL,
+                month TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                receipt_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (category, month)
+            ) WITHOUT ROWID
+            """,
+            # Triggers keep rollups in the same transaction as the receipt write.
+            """
+            CREATE TRIGGER receipts_rollup_insert AFTER INSERT ON receipts
+            WHEN NEW.category IS NOT NULL AND NEW.month IS NOT NULL
+            BEGIN
+                INSERT INTO spend_rollups (category, month, total, receipt_count)
+                VALUES (NEW.category, NEW.month, COALESCE(NEW.total, 0), 1)
+                ON CONFLICT(category, month) DO UPDATE SET
+                    total = total + excluded.total,
+                    receipt_count = receipt_count + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER receipts_rollup_delete AFTER DELETE ON receipts
+            WHEN OLD.category IS NOT NULL AND OLD.month IS NOT NULL
+            BEGIN
+                UPDATE spend_rollups
+                SET total = total - COALESCE(OLD.total, 0), receipt_count = receipt_count - 1
+                WHERE category = OLD.category AND month = OLD.month;
+            END
+            """,
+            """
+            CREATE TRIGGER receipts_rollup_update_old AFTER UPDATE OF category, month, total ON receipts
+            WHEN OLD.category IS NOT NULL AND OLD.month IS NOT NULL
+            BEGIN
+                UPDATE spend_rollups
+                SET total = total - COALESCE(OLD.total, 0), receipt_count = receipt_count - 1
+                WHERE category = OLD.category AND month = OLD.month;
+            END
+            """,
+            """
+            CREATE TRIGGER receipts_rollup_update_new AFTER UPDATE OF category, month, total ON receipts
+            WHEN NEW.category IS NOT NULL AND NEW.month IS NOT NULL
+            BEGIN
+                INSERT INTO spend_rollups (category, month, total, receipt_count)
+                VALUES (NEW.category, NEW.month, COALESCE(NEW.total, 0), 1)
+                ON CONFLICT(category, month) DO UPDATE SET
+                    total = total + excluded.total,
+                    receipt_count = receipt_count + 1;
+            END
+            """,
+        ),
+        apply=_backfill_receipt_months,
+    ),
+    Migration(
+        5,
+        "Full-text index over receipt OCR text",
+        statements=(
+            """
+            CREATE VIRTUAL TABLE receipts_fts USING fts5(
+                ocr_text,
+                content='receipts',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER receipts_fts_insert AFTER INSERT ON receipts
+            BEGIN
+                INSERT INTO receipts_fts (rowid, ocr_text) VALUES (NEW.id, NEW.ocr_text);
+            END
+            """,
+            """
+            CREATE TRIGGER receipts_fts_delete AFTER DELETE ON receipts
+            BEGIN
+                INSERT INTO receipts_fts (receipts_fts, rowid, ocr_text)
+                VALUES ('delete', OLD.id, OLD.ocr_text);
+            END
+            """,
+            """
+            CREATE TRIGGER receipts_fts_update AFTER UPDATE OF ocr_text ON receipts
+            BEGIN
+                INSERT INTO receipts_fts (receipts_fts, rowid, ocr_text)
+                VALUES ('delete', OLD.id, OLD.ocr_text);
+                INSERT INTO receipts_fts (rowid, ocr_text) VALUES (NEW.id, NEW.ocr_text);
+            END
+            """,
+            # Backfill the index from rows stored before this migration.
+            "INSERT INTO receipts_fts (receipts_fts) VALUES ('rebuild')",
+        ),
+    ),
+    Migration(
+        6,
+        "Move OCR text and image metadata off the hot receipts row",
+        statements=(
+            """
+            CREATE TABLE receipt_documents (
+                receipt_id INTEGER PRIMARY KEY REFERENCES receipts(id),
+                ocr_text TEXT,
+                image_path TEXT
+            )
+            """,
+            """
+            INSERT INTO receipt_documents (receipt_id, ocr_text, image_path)
+            SELECT id, ocr_text, image_path FROM receipts
+            """,
+            # Re-point full-text search at the side table before dropping columns.
+            "DROP TRIGGER receipts_fts_insert",
+            "DROP TRIGGER receipts_fts_delete",
+            "DROP TRIGGER receipts_fts_update",
+            "DROP TABLE receipts_fts",
+            """
+            CREATE VIRTUAL TABLE receipts_fts USING fts5(
+                ocr_text,
+                content='receipt_documents',
+                content_rowid='receipt_id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER receipt_documents_fts_insert AFTER INSERT ON receipt_documents
+            BEGIN
+                INSERT INTO receipts_fts (rowid, ocr_text) VALUES (NEW.receipt_id, NEW.ocr_text);
+            END
+            """,
+            """
+            CREATE TRIGGER receipt_documents_fts_delete AFTER DELETE ON receipt_documents
+            BEGIN
+                INSERT INTO receipts_fts (receipts_fts, rowid, ocr_text)
+                VALUES ('delete', OLD.receipt_id, OLD.ocr_text);
+            END
+            """,
+            """
+            CREATE TRIGGER receipt_documents_fts_update AFTER UPDATE OF ocr_text ON receipt_documents
+            BEGIN
+                INSERT INTO receipts_fts (receipts_fts, rowid, ocr_text)
+                VALUES ('delete', OLD.receipt_id, OLD.ocr_text);
+                INSERT INTO receipts_fts (rowid, ocr_text) VALUES (NEW.receipt_id, NEW.ocr_text);
+            END
+            """,
+            "INSERT INTO receipts_fts (receipts_fts) VALUES ('rebuild')",
+            """
+            CREATE TRIGGER receipts_documents_delete AFTER DELETE ON receipts
+            BEGIN
+                DELETE FROM receipt_documents WHERE receipt_id = OLD.id;
+            END
+            """,
+            # Dropping the columns rewrites receipts with only the small fields.
+            "ALTER TABLE receipts DROP COLUMN ocr_text",
+            "ALTER TABLE receipts DROP COLUMN image_path",
+        ),
+    ),
+    Migration(
+        7,
+        "Track background receipt processing jobs",
+        statements=(
+            """
+            CREATE TABLE receipt_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                receipt_id INTEGER,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """,
+            # Recovery and retries only ever look for unfinished jobs.
+            """
+            CREATE INDEX idx_receipt_jobs_unfinished ON receipt_jobs(created_at)
+            WHERE status IN ('queued', 'running', 'needs_retry')
+            """,
+            "CREATE INDEX idx_receipt_documents_image_path ON receipt_documents(image_path)",
+        ),
+    ),
+    Migration(
+        8,
+        "Cache OCR text by upload content hash",
+        statements=(
+            # Only the text is cached; it is parsed again on every hit, so
+            # parser changes never leave stale fields behind.
+            """
+            CREATE TABLE ocr_cache (
+                content_hash TEXT PRIMARY KEY,
+                ocr_text TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """,
+            # Covers eviction without touching ocr_text.
+            "CREATE INDEX idx_ocr_cache_lru ON ocr_cache(last_used_at, size_bytes)",
+            # One row, kept in step by triggers, so eviction checks never
+            # aggregate the cache.
+            """
+            CREATE TABLE ocr_cache_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                entries INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL
+            )
+            """,
+            "INSERT INTO ocr_cache_totals (id, entries, size_bytes) VALUES (1, 0, 0)",
+            """
+            CREATE TRIGGER ocr_cache_totals_insert AFTER INSERT ON ocr_cache
+            BEGIN
+                UPDATE ocr_cache_totals
+                SET entries = entries + 1, size_bytes = size_bytes + NEW.size_bytes;
+            END
+            """,
+            """
+            CREATE TRIGGER ocr_cache_totals_delete AFTER DELETE ON ocr_cache
+            BEGIN
+                UPDATE ocr_cache_totals
+                SET entries = entries - 1, size_bytes = size_bytes - OLD.size_bytes;
+            END
+            """,
+            """
+            CREATE TRIGGER ocr_cache_totals_update AFTER UPDATE OF size_bytes ON ocr_cache
+            BEGIN
+                UPDATE ocr_cache_totals SET size_bytes = size_bytes - OLD.size_bytes + NEW.size_bytes;
+            END
+            """,
+        ),
+    ),
+    Migration(
+        9,
+        "Record which OCR pass produced a receipt and its field confidences",
+        statements=(
+            "ALTER TABLE receipt_documents ADD COLUMN ocr_tier TEXT",
+            "ALTER TABLE receipt_documents ADD COLUMN vendor_confidence REAL",
+            "ALTER TABLE receipt_documents ADD COLUMN date_confidence REAL",
+            "ALTER TABLE receipt_documents ADD COLUMN total_confidence REAL",
+        ),
+    ),
+    Migration(
+        10,
+        "Checkpoint resumable backfills over receipts",
+        statements=(
+            """
+            CREATE TABLE backfill_checkpoints (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migration(
+        11,
+        "Map vendor spellings to canonical vendor names",
+        statements=(
+            # alias_key is the normalized spelling (see services/vendors.py).
+            """
+            CREATE TABLE vendor_aliases (
+                alias_key TEXT PRIMARY KEY,
+                alias TEXT NOT NULL,
+                canonical TEXT NOT NULL,
+                category TEXT,
+                created_at TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migration(
+        12,
+        "Keyword rules that assign receipt categories",
+        statements=(
+            """
+            CREATE TABLE category_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                keyword TEXT NOT NULL,
+                category TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migration(
+        13,
+        "Store parsed line items for item-level spend queries",
+        statements=(
+            # receipt_date is the receipt's ISO date (or upload day), copied
+            # onto each item so spend queries never join receipts.
+            """
+            CREATE TABLE receipt_items (
+                id INTEGER PRIMARY KEY,
+                receipt_id INTEGER NOT NULL REFERENCES receipts(id),
+                name TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 1,
+                amount REAL NOT NULL,
+                receipt_date TEXT
+            )
+            """,
+            # Both cover the spend aggregates: by item name prefix, or by
+            # date range across all items.
+            """
+            CREATE INDEX idx_receipt_items_key_date
+            ON receipt_items(item_key, receipt_date, amount, quantity)
+            """,
+            """
+            CREATE INDEX idx_receipt_items_date_key
+            ON receipt_items(receipt_date, item_key, amount, quantity)
+            """,
+            "CREATE INDEX idx_receipt_items_receipt ON receipt_items(receipt_id)",
+        ),
+    ),
+)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """Apply pending migrations in order and return the resulting version.
+
+    An up-to-date database costs a single ``PRAGMA user_version`` read.
+    """
+    current = schema_version(conn)
+    pending = [migration for migration in migrations if migration.version > current]
+    for migration in sorted(pending, key=lambda item: item.version):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock.
+            if schema_version(conn) >= migration.version:
+                current = schema_version(conn)
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(statement)
+            if migration.apply is not None:
+                migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        current = migration.version
+    return current
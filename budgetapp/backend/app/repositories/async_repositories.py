@@ -0,0 +1,56 @@
+"""Async repository adapters that keep SQLite work off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Iterable, TypeVar
+
+from ..core.executor import DatabaseExecutor
+from ..core.interfaces import IAsyncBudgetRepository, IAsyncJobRepository, IBudgetRepository, IJobRepository
+
+
+T = TypeVar("T")
+
+
+class _AsyncRepository:
+    def __init__(self, executor: DatabaseExecutor | None) -> None:
+        self._executor = executor
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Without a dedicated executor fall back to the loop's default pool.
+        if self._executor is None:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return await self._executor.run(func, *args, **kwargs)
+
+
+class AsyncJobRepository(_AsyncRepository, IAsyncJobRepository):
+    """Awaitable facade over the job repository for the upload routes."""
+    def __init__(self, repository: IJobRepository, executor: DatabaseExecutor | None = None) -> None:
+        super().__init__(executor)
+        self._repository = repository
+
+    async def create_job(self, job_id: str, image_path: str, created_at: str) -> None:
+        await self._run(self._repository.create_job, job_id, image_path, created_at)
+
+
+class AsyncBudgetRepository(_AsyncRepository, IAsyncBudgetRepository):
+    """Awaitable facade over a synchronous budget repository."""
+    def __init__(self, repository: IBudgetRepository, executor: DatabaseExecutor | None = None) -> None:
+        super().__init__(executor)
+        self._repository = repository
+
+    async def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
+        return await self._run(self._repository.list_budgets, month)
+
+    async def upsert_budget(
+        self,
+        category: str,
+        monthly_limit: float,
+        spent: float,
+        prior_balance: float = 0,
+    ) -> dict[str, Any]:
+        return await self._run(self._repository.upsert_budget, category, monthly_limit, spent, prior_balance)
+
+    async def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        # Materialize on the loop so lazy inputs are not consumed cross-thread.
+        return await self._run(self._repository.bulk_upsert_budgets, list(budgets))
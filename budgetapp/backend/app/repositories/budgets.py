@@ -2,21 +2,51 @@
 
 from __future__ import annotations
 
-from typing import Any
+from datetime import datetime
+from typing import Any, Iterable
 
 from ..core.database import Database
 from ..core.interfaces import IBudgetRepository
 
 
+_UPSERT_BUDGET_SQL = """
+    INSERT INTO budgets (category, monthly_limit, spent, prior_balance)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(category) DO UPDATE SET
+        monthly_limit=excluded.monthly_limit,
+        spent=excluded.spent,
+        prior_balance=excluded.prior_balance
+"""
+
+
 class BudgetRepository(IBudgetRepository):
     """SQL access for budget data."""
     def __init__(self, db: Database) -> None:
         self._db = db
 
-    def list_budgets(self) -> list[dict[str, Any]]:
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
+        # `spent` is the manually posted amount exactly as stored, so a listed
+        # budget can be posted back unchanged. The month's receipt rollup is
+        # `receipt_spent` (one primary-key lookup per budget rather than a
+        # receipts scan), and `total_spent`/`remaining` combine the two.
+        month = month or datetime.utcnow().strftime("%Y-%m")
         with self._db.connect() as conn:
             rows = conn.execute(
-                "SELECT id, category, monthly_limit, spent, prior_balance FROM budgets ORDER BY category"
+                """
+                SELECT
+                    b.id,
+                    b.category,
+                    b.monthly_limit,
+                    b.spent,
+                    b.prior_balance,
+                    COALESCE(r.total, 0) AS receipt_spent,
+                    b.spent + COALESCE(r.total, 0) AS total_spent,
+                    b.monthly_limit + b.prior_balance - b.spent - COALESCE(r.total, 0) AS remaining
+                FROM budgets AS b
+                LEFT JOIN spend_rollups AS r ON r.category = b.category AND r.month = ?
+                ORDER BY b.category
+                """,
+                (month,),
             ).fetchall()
         return [dict(row) for row in rows]
 
@@ -28,20 +58,19 @@ class BudgetRepository(IBudgetRepository):
         prior_balance: float = 0,
     ) -> dict[str, Any]:
         with self._db.connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO budgets (category, monthly_limit, spent, prior_balance)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(category) DO UPDATE SET
-                    monthly_limit=excluded.monthly_limit,
-                    spent=excluded.spent,
-                    prior_balance=excluded.prior_balance
-                """,
-                (category, monthly_limit, spent, prior_balance),
-            )
+            conn.execute(_UPSERT_BUDGET_SQL, (category, monthly_limit, spent, prior_balance))
         return {
             "category": category,
             "monthly_limit": monthly_limit,
             "spent": spent,
             "prior_balance": prior_balance,
         }
+
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        # One executemany inside one transaction: a single commit for the batch.
+        rows = list(budgets)
+        if not rows:
+            return 0
+        with self._db.connect() as conn:
+            conn.executemany(_UPSERT_BUDGET_SQL, rows)
+        return len(rows)
@@ -0,0 +1,115 @@
+"""Group-commit receipt writer for burst uploads."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Sequence
+
+from ..core.database import Database
+from ..core.interfaces import OcrFieldConfidence
+from .receipts import NewReceipt, ReceiptRepository
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class GroupCommitReceiptRepository(ReceiptRepository):
+    """Receipt repository whose inserts are committed in shared transactions.
+
+    Inserts are queued to a writer thread that collects everything arriving
+    within ``batch_window_ms`` (or up to ``max_batch_size`` rows) and commits
+    it at once, so a burst of uploads pays one fsync instead of one each.
+    Every caller still gets its own row id. ``close()`` flushes the queue.
+    """
+    def __init__(
+        self,
+        db: Database,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 64,
+    ) -> None:
+        super().__init__(db)
+        self._batch_window = batch_window_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.batches_committed = 0
+        self._writer = threading.Thread(target=self._run, name="receipt-writer", daemon=True)
+        self._writer.start()
+
+    def insert_receipt(
+        self,
+        date: str | None,
+        vendor: str,
+        total: float,
+        image_path: str,
+        ocr_text: str,
+        created_at: str,
+        category: str | None = None,
+        ocr_confidence: OcrFieldConfidence | None = None,
+        items: Sequence[tuple[str, float, int]] = (),
+    ) -> int:
+        record = NewReceipt(date, vendor, total, image_path, ocr_text, created_at, category, ocr_confidence, items)
+        return self.submit_receipt(record).result()
+
+    def submit_receipt(self, record: NewReceipt) -> Future[int]:
+        # Non-blocking variant for callers that can await the future.
+        future: Future[int] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Receipt writer is closed")
+            self._queue.put((record, future))
+        return future
+
+    def close(self) -> None:
+        # Stop accepting inserts and wait until everything queued is committed.
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._writer.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self._batch_window
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple[NewReceipt, Future[int]]]) -> None:
+        try:
+            receipt_ids = self.insert_receipts([record for record, _ in batch])
+        except Exception:
+            # One bad row must not fail its neighbours: retry individually.
+            logger.exception("Group commit of %d receipts failed; retrying one by one", len(batch))
+            for record, future in batch:
+                try:
+                    future.set_result(self.insert_receipts([record])[0])
+                except Exception as exc:
+                    future.set_exception(exc)
+            return
+        self.batches_committed += 1
+        for (_, future), receipt_id in zip(batch, receipt_ids):
+            future.set_result(receipt_id)
@@ -0,0 +1,110 @@
+"""Receipt job repository for SQLite operations."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, Sequence
+
+from ..core.database import Database
+from ..core.interfaces import IJobRepository
+
+
+# Statuses a job can be left in that still need work.
+UNFINISHED_STATUSES = ("queued", "running", "needs_retry")
+# Spelled out exactly as in idx_receipt_jobs_unfinished's WHERE clause:
+# SQLite only uses a partial index when the query repeats that term, and
+# bound parameters never match it.
+_UNFINISHED_CLAUSE = f"status IN ({', '.join(repr(status) for status in UNFINISHED_STATUSES)})"
+
+
+class JobRepository(IJobRepository):
+    """SQL access for background receipt jobs."""
+    def __init__(self, db: Database) -> None:
+        self._db = db
+
+    def create_job(self, job_id: str, image_path: str, created_at: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO receipt_jobs (id, status, image_path, created_at, updated_at)
+                VALUES (?, 'queued', ?, ?, ?)
+                """,
+                (job_id, image_path, created_at, created_at),
+            )
+
+    def mark_queued(self, job_id: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE receipt_jobs SET status = 'queued', updated_at = ? WHERE id = ?",
+                (_now(), job_id),
+            )
+
+    def mark_running(self, job_id: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE receipt_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (_now(), job_id),
+            )
+
+    def mark_done(self, job_id: str, receipt_id: int) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE receipt_jobs SET status = 'done', receipt_id = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (receipt_id, _now(), job_id),
+            )
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE receipt_jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, _now(), job_id),
+            )
+
+    def mark_needs_retry(self, job_id: str, error: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute(
+                "UPDATE receipt_jobs SET status = 'needs_retry', error = ?, updated_at = ? WHERE id = ?",
+                (error, _now(), job_id),
+            )
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        with self._db.connect() as conn:
+            row = conn.execute(
+                """
+                SELECT id, status, receipt_id, error, attempts, created_at, updated_at
+                FROM receipt_jobs WHERE id = ?
+                """,
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_unfinished_jobs(self, statuses: Sequence[str] = UNFINISHED_STATUSES) -> list[dict[str, Any]]:
+        unknown = set(statuses) - set(UNFINISHED_STATUSES)
+        if unknown:
+            raise ValueError(f"Not an unfinished job status: {', '.join(sorted(unknown))}")
+        # A subset narrows the rows the partial index already selects.
+        narrow = ""
+        if set(statuses) != set(UNFINISHED_STATUSES):
+            narrow = f"AND status IN ({', '.join('?' for _ in statuses)})"
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, status, image_path, attempts, created_at FROM receipt_jobs
+                WHERE {_UNFINISHED_CLAUSE} {narrow}
+                ORDER BY created_at
+                """,
+                tuple(statuses) if narrow else (),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def relocate_image_paths(self, moves: Iterable[tuple[str, str]]) -> int:
+        with self._db.connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE receipt_jobs SET image_path = ? WHERE image_path = ?",
+                ((new, old) for old, new in moves),
+            )
+        return cursor.rowcount
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
@@ -0,0 +1,129 @@
+"""Persistent OCR text cache keyed by upload content hash."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple
+
+from ..core.database import Database
+from ..core.interfaces import IOcrCache
+
+
+class CachedOcr(NamedTuple):
+    ocr_text: str
+
+
+class OcrCacheRepository(IOcrCache):
+    """SQL-backed LRU cache of OCR text.
+
+    Only OCR text is cached; callers parse it again, so a parser change
+    never serves stale fields. Entries past ``max_entries`` or
+    ``max_bytes`` of OCR text are evicted least recently used first.
+    Entry and byte totals are kept by triggers, so a put reads one row
+    instead of aggregating the table. Hits queue their last-used time
+    and ``touch_batch`` of them are written at once (or before an
+    eviction). Hit and miss counts are per process.
+    """
+    def __init__(
+        self,
+        db: Database,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        touch_batch: int = 64,
+    ) -> None:
+        self._db = db
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._touch_batch = max(1, touch_batch)
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash: str) -> CachedOcr | None:
+        with self._db.connect() as conn:
+            row = conn.execute(
+                "SELECT ocr_text FROM ocr_cache WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[content_hash] = time.time()
+            touched = self._take_touched() if len(self._touched) >= self._touch_batch else None
+        if touched:
+            with self._db.connect() as conn:
+                self._write_touched(conn, touched)
+        return CachedOcr(row["ocr_text"])
+
+    def put(self, content_hash: str, ocr_text: str) -> None:
+        size_bytes = len(ocr_text.encode("utf-8"))
+        if self._max_entries <= 0 or size_bytes > self._max_bytes:
+            return
+        with self._lock:
+            touched = self._take_touched()
+        with self._db.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO ocr_cache (content_hash, ocr_text, size_bytes, last_used_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO UPDATE SET
+                    ocr_text = excluded.ocr_text,
+                    size_bytes = excluded.size_bytes,
+                    last_used_at = excluded.last_used_at
+                """,
+                (content_hash, ocr_text, size_bytes, time.time()),
+            )
+            self._write_touched(conn, touched)
+            self._evict(conn)
+
+    def stats(self) -> dict[str, Any]:
+        with self._db.connect() as conn:
+            entries, size_bytes = self._totals(conn)
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def _take_touched(self) -> list[tuple[float, str]]:
+        # Caller holds self._lock.
+        touched = [(used_at, content_hash) for content_hash, used_at in self._touched.items()]
+        self._touched.clear()
+        return touched
+
+    def _write_touched(self, conn: sqlite3.Connection, touched: list[tuple[float, str]]) -> None:
+        if touched:
+            conn.executemany(
+                "UPDATE ocr_cache SET last_used_at = MAX(last_used_at, ?) WHERE content_hash = ?",
+                touched,
+            )
+
+    def _totals(self, conn: sqlite3.Connection) -> tuple[int, int]:
+        entries, size_bytes = conn.execute("SELECT entries, size_bytes FROM ocr_cache_totals").fetchone()
+        return entries, size_bytes
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        entries, size_bytes = self._totals(conn)
+        if entries <= self._max_entries and size_bytes <= self._max_bytes:
+            return
+        # Walk the LRU index oldest first until both limits are met.
+        stale = []
+        for content_hash, entry_bytes in conn.execute(
+            "SELECT content_hash, size_bytes FROM ocr_cache ORDER BY last_used_at"
+        ):
+            if entries <= self._max_entries and size_bytes <= self._max_bytes:
+                break
+            stale.append((content_hash,))
+            entries -= 1
+            size_bytes -= entry_bytes
+        conn.executemany("DELETE FROM ocr_cache WHERE content_hash = ?", stale)
@@ -2,10 +2,92 @@
 
 from __future__ import annotations
 
-from typing import Any
+import html
+import re
+import sqlite3
+from datetime import datetime
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
 
 from ..core.database import Database
-from ..core.interfaces import IReceiptRepository
+from ..core.dates import iso_date, month_key
+from ..core.items import item_key, prefix_upper_bound
+from ..core.interfaces import IReceiptRepository, OcrFieldConfidence
+
+
+# Columns on the hot receipts row vs. the heavy side-table columns.
+RECEIPT_FIELDS = ("id", "date", "vendor", "total", "category", "created_at")
+RECEIPT_DOCUMENT_FIELDS = (
+    "ocr_text",
+    "image_path",
+    "ocr_tier",
+    "vendor_confidence",
+    "date_confidence",
+    "total_confidence",
+)
+
+_SEARCH_TERM_RE = re.compile(r"\w+")
+
+# snippet() marks matches with these; the OCR text is escaped before they
+# become <mark> tags.
+_MATCH_START, _MATCH_END = "\x02", "\x03"
+
+# SQL expression per item spend grouping.
+ITEM_SPEND_GROUPS = {"month": "substr(receipt_date, 1, 7)", "item": "item_key"}
+
+_INSERT_ITEM_SQL = """
+    INSERT INTO receipt_items (receipt_id, name, item_key, quantity, amount, receipt_date)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+class NewReceipt(NamedTuple):
+    """Column values for one receipt insert, in insert_receipt argument order."""
+    date: str | None
+    vendor: str
+    total: float
+    image_path: str
+    ocr_text: str
+    created_at: str
+    category: str | None = None
+    ocr_confidence: OcrFieldConfidence | None = None
+    # (name, amount, quantity) per parsed line item.
+    items: Sequence[tuple[str, float, int]] = ()
+
+
+class StoredOcrText(NamedTuple):
+    receipt_id: int
+    ocr_text: str
+    created_at: str | None
+
+
+class ReparsedReceipt(NamedTuple):
+    """Fields re-derived from a receipt's stored OCR text."""
+    receipt_id: int
+    vendor: str
+    date: str | None
+    total: float
+    created_at: str | None
+    # None leaves the receipt's stored line items alone.
+    items: Sequence[tuple[str, float, int]] | None = None
+    # Only fills in a missing category.
+    category: str | None = None
+
+
+def _fts_query(query: str) -> str:
+    # Quote each term so user input can never be parsed as FTS5 syntax;
+    # the last term matches as a prefix to support search-as-you-type.
+    terms = _SEARCH_TERM_RE.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet: str) -> str:
+    # Raw OCR text comes from user uploads, so only the markers become HTML.
+    escaped = html.escape(snippet)
+    return escaped.replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
 
 
 class ReceiptRepository(IReceiptRepository):
@@ -21,35 +103,355 @@ class ReceiptRepository(IReceiptRepository):
         image_path: str,
         ocr_text: str,
         created_at: str,
+        category: str | None = None,
+        ocr_confidence: OcrFieldConfidence | None = None,
+        items: Sequence[tuple[str, float, int]] = (),
     ) -> int:
+        # Spend rollups and the search index are maintained by triggers
+        # inside this transaction.
+        record = NewReceipt(date, vendor, total, image_path, ocr_text, created_at, category, ocr_confidence, items)
+        with self._db.connect() as conn:
+            return self._insert(conn, record)
+
+    def insert_receipts(self, receipts: Sequence[NewReceipt]) -> list[int]:
+        # Many receipts, one transaction and one commit.
         with self._db.connect() as conn:
+            return [self._insert(conn, record) for record in receipts]
+
+    def _insert(self, conn: sqlite3.Connection, record: NewReceipt) -> int:
+        cursor = conn.execute(
+            """
+            INSERT INTO receipts (date, date_iso, vendor, total, created_at, category, month)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                record.date,
+                iso_date(record.date),
+                record.vendor,
+                record.total,
+                record.created_at,
+                record.category,
+                month_key(record.date, record.created_at),
+            ),
+        )
+        receipt_id = int(cursor.lastrowid)
+        confidence = record.ocr_confidence
+        conn.execute(
+            """
+            INSERT INTO receipt_documents (
+                receipt_id, ocr_text, image_path,
+                ocr_tier, vendor_confidence, date_confidence, total_confidence
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                receipt_id,
+                record.ocr_text,
+                record.image_path,
+                *(
+                    (confidence.tier, confidence.vendor, confidence.date, confidence.total)
+                    if confidence is not None
+                    else (None, None, None, None)
+                ),
+            ),
+        )
+        if record.items:
+            self._insert_items(conn, receipt_id, record.items, iso_date(record.date) or iso_date(record.created_at))
+        return receipt_id
+
+    def _insert_items(
+        self,
+        conn: sqlite3.Connection,
+        receipt_id: int,
+        items: Sequence[tuple[str, float, int]],
+        receipt_date: str | None,
+    ) -> None:
+        conn.executemany(
+            _INSERT_ITEM_SQL,
+            ((receipt_id, name, item_key(name), quantity, amount, receipt_date) for name, amount, quantity in items),
+        )
+
+    def update_receipt_category(self, receipt_id: int, category: str | None) -> bool:
+        with self._db.connect() as conn:
+            cursor = conn.execute(
+                "UPDATE receipts SET category = ? WHERE id = ?",
+                (category, receipt_id),
+            )
+        return cursor.rowcount > 0
+
+    def rebuild_spend_rollups(self) -> int:
+        # Recompute every rollup from the receipts table in one transaction.
+        with self._db.connect() as conn:
+            conn.execute("DELETE FROM spend_rollups")
             cursor = conn.execute(
                 """
-                INSERT INTO receipts (date, vendor, total, image_path, ocr_text, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (date, vendor, total, image_path, ocr_text, created_at),
+                INSERT INTO spend_rollups (category, month, total, receipt_count)
+                SELECT category, month, SUM(COALESCE(total, 0)), COUNT(*)
+                FROM receipts
+                WHERE category IS NOT NULL AND month IS NOT NULL
+                GROUP BY category, month
+                """
             )
-            return int(cursor.lastrowid)
+        return cursor.rowcount
 
-    def list_receipts(self) -> list[dict[str, Any]]:
+    def list_receipts(
+        self,
+        limit: int = 50,
+        after_id: int | None = None,
+        vendor: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        min_total: float | None = None,
+        max_total: float | None = None,
+    ) -> list[dict[str, Any]]:
+        # Keyset pagination: newest first, resuming strictly below `after_id`.
+        clauses: list[str] = []
+        params: list[Any] = []
+        if after_id is not None:
+            clauses.append("id < ?")
+            params.append(after_id)
+        if vendor:
+            clauses.append("vendor = ? COLLATE NOCASE")
+            params.append(vendor)
+        # Receipt dates are stored as parsed ("01/02/2024"); ranges compare
+        # their normalized ISO form.
+        if date_from:
+            clauses.append("date_iso >= ?")
+            params.append(iso_date(date_from) or date_from)
+        if date_to:
+            clauses.append("date_iso <= ?")
+            params.append(iso_date(date_to) or date_to)
+        if min_total is not None:
+            clauses.append("total >= ?")
+            params.append(min_total)
+        if max_total is not None:
+            clauses.append("total <= ?")
+            params.append(max_total)
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        params.append(limit)
         with self._db.connect() as conn:
             rows = conn.execute(
-                "SELECT id, date, vendor, total, created_at FROM receipts ORDER BY id DESC"
+                "SELECT id, date, vendor, total, category, created_at FROM receipts "
+                + where
+                + "ORDER BY id DESC LIMIT ?",
+                params,
             ).fetchall()
         return [dict(row) for row in rows]
 
-    def get_receipt(self, receipt_id: int) -> dict[str, Any] | None:
+    def get_receipt(
+        self,
+        receipt_id: int,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any] | None:
+        # Only touch receipt_documents when a heavy field is requested.
+        if fields is None:
+            fields = RECEIPT_FIELDS
+        unknown = set(fields) - set(RECEIPT_FIELDS) - set(RECEIPT_DOCUMENT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown receipt fields: {', '.join(sorted(unknown))}")
+
+        columns = ["r.id"] + [f"r.{name}" for name in RECEIPT_FIELDS if name in fields and name != "id"]
+        heavy = [f"d.{name}" for name in RECEIPT_DOCUMENT_FIELDS if name in fields]
+        query = f"SELECT {', '.join(columns + heavy)} FROM receipts AS r "
+        if heavy:
+            query += "LEFT JOIN receipt_documents AS d ON d.receipt_id = r.id "
+        with self._db.connect() as conn:
+            row = conn.execute(query + "WHERE r.id = ?", (receipt_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_receipt_id_by_image_path(self, image_path: str, created_after: str | None = None) -> int | None:
+        # Images are deduplicated, so older receipts may share the same path.
         with self._db.connect() as conn:
             row = conn.execute(
-                "SELECT * FROM receipts WHERE id = ?",
-                (receipt_id,),
+                """
+                SELECT d.receipt_id FROM receipt_documents d
+                JOIN receipts r ON r.id = d.receipt_id
+                WHERE d.image_path = ? AND (? IS NULL OR r.created_at >= ?)
+                ORDER BY d.receipt_id DESC LIMIT 1
+                """,
+                (image_path, created_after, created_after),
             ).fetchone()
-        return dict(row) if row else None
+        return int(row[0]) if row else None
+
+    def list_image_paths(self) -> list[str]:
+        with self._db.connect() as conn:
+            rows = conn.execute("SELECT DISTINCT image_path FROM receipt_documents").fetchall()
+        return [row[0] for row in rows]
 
-    def export_rows(self) -> list[dict[str, Any]]:
+    def relocate_image_paths(self, moves: Iterable[tuple[str, str]]) -> int:
+        # (old path, new path) pairs, applied in one transaction.
+        with self._db.connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE receipt_documents SET image_path = ? WHERE image_path = ?",
+                ((new, old) for old, new in moves),
+            )
+        return cursor.rowcount
+
+    def list_ocr_texts(self, after_id: int = 0, limit: int = 1000) -> list[StoredOcrText]:
+        # One page of stored OCR text in id order, walked on the primary key.
         with self._db.connect() as conn:
             rows = conn.execute(
-                "SELECT date, vendor, total, created_at FROM receipts ORDER BY id DESC"
+                """
+                SELECT d.receipt_id, d.ocr_text, r.created_at
+                FROM receipt_documents AS d
+                JOIN receipts AS r ON r.id = d.receipt_id
+                WHERE d.receipt_id > ? AND d.ocr_text IS NOT NULL
+                ORDER BY d.receipt_id
+                LIMIT ?
+                """,
+                (after_id, limit),
             ).fetchall()
-        return [dict(row) for row in rows]
+        return [StoredOcrText(*row) for row in rows]
+
+    def update_parsed_fields(
+        self,
+        updates: Iterable[ReparsedReceipt],
+        checkpoint: tuple[str, int] | None = None,
+    ) -> int:
+        # Rewrites only rows whose fields changed (rollup triggers follow),
+        # keeps categories already set, replaces line items given with a
+        # row when they differ from the stored ones, and records the
+        # (name, last id) checkpoint in the same transaction.
+        updates = list(updates)
+        with self._db.connect() as conn:
+            cursor = conn.executemany(
+                """
+                UPDATE receipts
+                SET vendor = ?, date = ?, date_iso = ?, total = ?, month = ?, category = COALESCE(category, ?)
+                WHERE id = ? AND (
+                    vendor IS NOT ? OR date IS NOT ? OR total IS NOT ?
+                    OR (category IS NULL AND ? IS NOT NULL)
+                )
+                """,
+                (
+                    (
+                        row.vendor,
+                        row.date,
+                        iso_date(row.date),
+                        row.total,
+                        month_key(row.date, row.created_at),
+                        row.category,
+                        row.receipt_id,
+                        row.vendor,
+                        row.date,
+                        row.total,
+                        row.category,
+                    )
+                    for row in updates
+                ),
+            )
+            changed = cursor.rowcount
+            for row in updates:
+                if row.items is None:
+                    continue
+                receipt_date = iso_date(row.date) or iso_date(row.created_at)
+                stored = conn.execute(
+                    "SELECT name, amount, quantity, receipt_date FROM receipt_items WHERE receipt_id = ? ORDER BY id",
+                    (row.receipt_id,),
+                ).fetchall()
+                if [tuple(item) for item in stored] == [(*item, receipt_date) for item in row.items]:
+                    continue
+                conn.execute("DELETE FROM receipt_items WHERE receipt_id = ?", (row.receipt_id,))
+                self._insert_items(conn, row.receipt_id, row.items, receipt_date)
+            if checkpoint is not None:
+                conn.execute(
+                    """
+                    INSERT INTO backfill_checkpoints (name, last_id, updated_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        last_id = excluded.last_id,
+                        updated_at = excluded.updated_at
+                    """,
+                    (*checkpoint, datetime.utcnow().isoformat()),
+                )
+        return changed
+
+    def get_checkpoint(self, name: str) -> int:
+        with self._db.connect() as conn:
+            row = conn.execute("SELECT last_id FROM backfill_checkpoints WHERE name = ?", (name,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def clear_checkpoint(self, name: str) -> None:
+        with self._db.connect() as conn:
+            conn.execute("DELETE FROM backfill_checkpoints WHERE name = ?", (name,))
+
+    def item_spend(
+        self,
+        item: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        group_by: str = "month",
+        limit: int = 100,
+    ) -> dict[str, Any]:
+        # Spend on items whose normalized name starts with `item`. Both
+        # queries are answered from a covering receipt_items index: the
+        # name index when an item is given, the date index otherwise.
+        if group_by not in ITEM_SPEND_GROUPS:
+            raise ValueError(f"Unknown item spend grouping: {group_by}")
+        key = item_key(item) if item else ""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if key:
+            clauses.append("item_key >= ? AND item_key < ?")
+            params += [key, prefix_upper_bound(key)]
+        if date_from:
+            clauses.append("receipt_date >= ?")
+            params.append(iso_date(date_from) or date_from)
+        if date_to:
+            clauses.append("receipt_date <= ?")
+            params.append(iso_date(date_to) or date_to)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        aggregates = "ROUND(COALESCE(SUM(amount), 0), 2) AS total, COALESCE(SUM(quantity), 0) AS quantity, COUNT(*) AS count"
+        order = "total DESC" if group_by == "item" else "key"
+        with self._db.connect() as conn:
+            summary = conn.execute(f"SELECT {aggregates} FROM receipt_items {where}", params).fetchone()
+            groups = conn.execute(
+                f"SELECT {ITEM_SPEND_GROUPS[group_by]} AS key, {aggregates} FROM receipt_items {where}"
+                f"GROUP BY key ORDER BY {order} LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        return {"item": key or None, **dict(summary), "groups": [dict(row) for row in groups]}
+
+    def search_receipts(self, query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+        # Ranked full-text search over OCR text, best matches first.
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT
+                    r.id,
+                    r.date,
+                    r.vendor,
+                    r.total,
+                    r.category,
+                    r.created_at,
+                    snippet(receipts_fts, 0, ?, ?, '…', 12) AS snippet
+                FROM receipts_fts
+                JOIN receipts AS r ON r.id = receipts_fts.rowid
+                WHERE receipts_fts MATCH ?
+                ORDER BY bm25(receipts_fts)
+                LIMIT ? OFFSET ?
+                """,
+                (_MATCH_START, _MATCH_END, match, limit, offset),
+            ).fetchall()
+        return [{**dict(row), "snippet": _highlight(row["snippet"])} for row in rows]
+
+    def export_rows(self, batch_size: int = 1000) -> Iterator[dict[str, Any]]:
+        # Stream rows from a live cursor on a dedicated connection so the
+        # export can be consumed lazily, possibly across worker threads.
+        conn = self._db.open_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT date, vendor, total, created_at FROM receipts ORDER BY id DESC"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
@@ -0,0 +1,92 @@
+"""Category rule repository for SQLite operations."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple
+
+from ..core.database import Database
+from ..core.interfaces import ICategoryRuleRepository
+
+
+RULE_FIELDS = ("id", "keyword", "category", "priority", "created_at")
+
+
+class CategorizationInput(NamedTuple):
+    receipt_id: int
+    vendor: str | None
+    ocr_text: str | None
+
+
+class CategoryRuleRepository(ICategoryRuleRepository):
+    """SQL access for keyword category rules and bulk category writes."""
+    def __init__(self, db: Database) -> None:
+        self._db = db
+
+    def list_rules(self) -> list[dict[str, Any]]:
+        with self._db.connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(RULE_FIELDS)} FROM category_rules ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def insert_rule(self, keyword: str, category: str, priority: int = 0) -> dict[str, Any]:
+        created_at = datetime.utcnow().isoformat()
+        with self._db.connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO category_rules (keyword, category, priority, created_at) VALUES (?, ?, ?, ?)",
+                (keyword, category, priority, created_at),
+            )
+        return {
+            "id": int(cursor.lastrowid),
+            "keyword": keyword,
+            "category": category,
+            "priority": priority,
+            "created_at": created_at,
+        }
+
+    def update_rule(self, rule_id: int, keyword: str, category: str, priority: int = 0) -> dict[str, Any] | None:
+        with self._db.connect() as conn:
+            row = conn.execute(
+                f"""
+                UPDATE category_rules SET keyword = ?, category = ?, priority = ?
+                WHERE id = ?
+                RETURNING {', '.join(RULE_FIELDS)}
+                """,
+                (keyword, category, priority, rule_id),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def delete_rule(self, rule_id: int) -> bool:
+        with self._db.connect() as conn:
+            cursor = conn.execute("DELETE FROM category_rules WHERE id = ?", (rule_id,))
+        return cursor.rowcount > 0
+
+    def list_categorization_inputs(
+        self,
+        after_id: int = 0,
+        limit: int = 1000,
+        uncategorized_only: bool = True,
+    ) -> list[CategorizationInput]:
+        # One page of vendor + OCR text in id order, walked on the primary key.
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.id, r.vendor, d.ocr_text
+                FROM receipts AS r
+                LEFT JOIN receipt_documents AS d ON d.receipt_id = r.id
+                WHERE r.id > ? AND (? = 0 OR r.category IS NULL)
+                ORDER BY r.id
+                LIMIT ?
+                """,
+                (after_id, int(uncategorized_only), limit),
+            ).fetchall()
+        return [CategorizationInput(*row) for row in rows]
+
+    def update_categories(self, updates: Iterable[tuple[int, str]]) -> int:
+        # (receipt id, category) pairs in one transaction; unchanged rows are
+        # skipped so the rollup triggers only fire for real moves.
+        with self._db.connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE receipts SET category = ? WHERE id = ? AND category IS NOT ?",
+                ((category, receipt_id, category) for receipt_id, category in updates),
+            )
+        return cursor.rowcount
@@ -0,0 +1,64 @@
+"""Vendor alias repository for SQLite operations."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from ..core.database import Database
+from ..core.interfaces import IVendorAliasRepository
+
+
+class VendorAlias(NamedTuple):
+    alias_key: str
+    alias: str
+    canonical: str
+    category: str | None = None
+
+
+class VendorAliasRepository(IVendorAliasRepository):
+    """SQL access for vendor aliases and bulk vendor renames."""
+    def __init__(self, db: Database) -> None:
+        self._db = db
+
+    def list_aliases(self) -> list[VendorAlias]:
+        with self._db.connect() as conn:
+            rows = conn.execute(
+                "SELECT alias_key, alias, canonical, category FROM vendor_aliases ORDER BY canonical, alias"
+            ).fetchall()
+        return [VendorAlias(*row) for row in rows]
+
+    def upsert_alias(self, alias_key: str, alias: str, canonical: str, category: str | None = None) -> None:
+        # Re-adding a spelling moves it to the new canonical name.
+        with self._db.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO vendor_aliases (alias_key, alias, canonical, category, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(alias_key) DO UPDATE SET
+                    alias = excluded.alias,
+                    canonical = excluded.canonical,
+                    category = excluded.category
+                """,
+                (alias_key, alias, canonical, category, datetime.utcnow().isoformat()),
+            )
+
+    def list_vendor_names(self) -> list[str]:
+        with self._db.connect() as conn:
+            rows = conn.execute("SELECT DISTINCT vendor FROM receipts").fetchall()
+        return [row[0] for row in rows]
+
+    def rename_vendors(self, renames: Iterable[tuple[str, str, str | None]]) -> int:
+        # (old name, new name, category) in one transaction; receipts that
+        # already have a category keep it. Rollup triggers follow.
+        with self._db.connect() as conn:
+            cursor = conn.executemany(
+                """
+                UPDATE receipts SET vendor = ?, category = COALESCE(category, ?)
+                WHERE vendor = ? COLLATE NOCASE AND vendor = ?
+                    AND (vendor IS NOT ? OR (category IS NULL AND ? IS NOT NULL))
+                """,
+                # The NOCASE comparison lets idx_receipts_vendor find the rows.
+                ((new, category, old, old, new, category) for old, new, category in renames),
+            )
+        return cursor.rowcount
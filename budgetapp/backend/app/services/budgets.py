@@ -2,22 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
 import io
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import pandas as pd
 
-from ..core.interfaces import IBudgetRepository
+from ..core.interfaces import IAsyncBudgetRepository, IBudgetRepository
 
 
 class BudgetService:
     """Coordinates budget retrieval and updates."""
-    def __init__(self, repository: IBudgetRepository) -> None:
+    def __init__(
+        self,
+        repository: IBudgetRepository,
+        async_repository: IAsyncBudgetRepository | None = None,
+    ) -> None:
         self._repository = repository
+        self._async_repository = async_repository
 
-    def list_budgets(self) -> list[dict[str, Any]]:
-        return self._repository.list_budgets()
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
+        return self._repository.list_budgets(month)
 
     def upsert_budget(
         self,
@@ -28,7 +34,26 @@ class BudgetService:
     ) -> dict[str, Any]:
         return self._repository.upsert_budget(category, monthly_limit, spent, prior_balance)
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        return self._repository.bulk_upsert_budgets(budgets)
+
     def import_budgets(self, filename: str, contents: bytes) -> dict[str, Any]:
+        rows = self._read_budget_rows(filename, contents)
+        imported = self._repository.bulk_upsert_budgets(rows)
+
+        return {"imported": imported}
+
+    async def import_budgets_async(self, filename: str, contents: bytes) -> dict[str, Any]:
+        # Parse the spreadsheet on a worker thread, then await the batched write.
+        rows = await asyncio.to_thread(self._read_budget_rows, filename, contents)
+        if self._async_repository is not None:
+            imported = await self._async_repository.bulk_upsert_budgets(rows)
+        else:
+            imported = await asyncio.to_thread(self._repository.bulk_upsert_budgets, rows)
+
+        return {"imported": imported}
+
+    def _read_budget_rows(self, filename: str, contents: bytes) -> list[tuple[str, float, float, float]]:
         suffix = Path(filename).suffix.lower()
         data = io.BytesIO(contents)
 
@@ -54,14 +79,9 @@ class BudgetService:
         for column in ("monthly_limit", "spent", "prior_balance"):
             frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0)
 
-        imported = 0
-        for row in frame.itertuples(index=False):
-            self._repository.upsert_budget(
-                getattr(row, "category"),
-                float(getattr(row, "monthly_limit")),
-                float(getattr(row, "spent")),
-                float(getattr(row, "prior_balance")),
-            )
-            imported += 1
-
-        return {"imported": imported}
+        return [
+            (category, float(monthly_limit), float(spent), float(prior_balance))
+            for category, monthly_limit, spent, prior_balance in frame[
+                ["category", "monthly_limit", "spent", "prior_balance"]
+            ].itertuples(index=False, name=None)
+        ]
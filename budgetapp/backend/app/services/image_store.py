@@ -0,0 +1,86 @@
+"""Content-addressed receipt image storage."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import BinaryIO
+
+from ..core.interfaces import IAsyncUpload
+from .uploads import HEADER_BYTES, StoredUpload, UploadWriter
+
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def detect_image_format(header: bytes) -> str:
+    # Sniff magic bytes instead of trusting the client's filename or type.
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif"
+    if header.startswith((b"II*\x00", b"MM\x00*")):
+        return ".tif"
+    if header.startswith(b"BM"):
+        return ".bmp"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    if header[4:8] == b"ftyp" and header[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return ".heic"
+    if header.startswith(b"%PDF"):
+        return ".pdf"
+    return ".bin"
+
+
+class ImageStore:
+    """Stores each distinct image once under ``<root>/ab/cd/<sha256><ext>``.
+
+    Two levels of hash-prefix shards keep directories small, names never
+    collide across workers, and re-uploading the same bytes reuses the
+    existing file.
+    """
+    def __init__(self, root: Path, max_bytes: int, chunk_bytes: int = 1024 * 1024) -> None:
+        self._root = root
+        self._writer = UploadWriter(root, max_bytes, chunk_bytes)
+
+    def save(self, stream: BinaryIO) -> StoredUpload:
+        return self._writer.save(stream, self.path_for)
+
+    async def save_async(self, upload: IAsyncUpload) -> StoredUpload:
+        return await self._writer.save_async(upload, self.path_for)
+
+    def path_for(self, content_hash: str, header: bytes) -> Path:
+        shard = self._root / content_hash[:2] / content_hash[2:4]
+        shard.mkdir(parents=True, exist_ok=True)
+        return shard / f"{content_hash}{detect_image_format(header)}"
+
+    def contains(self, path: Path) -> bool:
+        # True for paths already laid out by this store.
+        try:
+            first, second, name = path.relative_to(self._root).parts
+        except ValueError:
+            return False
+        content_hash = name.split(".", 1)[0]
+        return bool(_HASH_RE.match(content_hash)) and (first, second) == (content_hash[:2], content_hash[2:4])
+
+    def adopt(self, path: Path) -> StoredUpload:
+        # Place an existing file into the store, leaving the original alone
+        # (a hard link when possible) so callers can repoint rows first.
+        with path.open("rb") as source:
+            header = source.read(HEADER_BYTES)
+            source.seek(0)
+            content_hash = hashlib.file_digest(source, "sha256").hexdigest()
+        target = self.path_for(content_hash, header)
+        if not target.exists():
+            try:
+                os.link(path, target)
+            except OSError:
+                partial = target.with_name(target.name + ".part")
+                shutil.copy2(path, partial)
+                os.replace(partial, target)
+        return StoredUpload(target, content_hash, target.stat().st_size)
@@ -0,0 +1,231 @@
+"""Background receipt processing jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Sequence
+
+from ..core.interfaces import IAsyncJobRepository, IAsyncUpload, IJobRepository
+from .ocr import OcrTimeoutError, OcrUnavailableError
+from .receipts import ReceiptService
+from .uploads import UploadTooLargeError
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp"})
+ZIP_CONTENT_TYPES = frozenset({"application/zip", "application/x-zip-compressed"})
+# Raised by ZipFile.open() or while reading a member: bad headers or CRCs,
+# corrupt deflate data, encrypted entries, unsupported compression.
+_UNREADABLE_MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError)
+
+
+class ArchiveTooLargeError(ValueError):
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        super().__init__(
+            f"ZIP archives may hold at most {max_entries} files and "
+            f"{max_bytes // (1024 * 1024)} MiB uncompressed per upload"
+        )
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+
+class ReceiptJobService:
+    """Runs OCR, parsing and persistence for uploads on a worker pool.
+
+    The upload is written to disk and a job row recorded before the job id
+    is returned, so jobs interrupted by a crash can be resumed at startup.
+    """
+    def __init__(
+        self,
+        repository: IJobRepository,
+        receipt_service: ReceiptService,
+        workers: int = 2,
+        max_attempts: int = 3,
+        max_archive_entries: int = 500,
+        max_archive_bytes: int = 512 * 1024 * 1024,
+        async_repository: IAsyncJobRepository | None = None,
+    ) -> None:
+        self._repository = repository
+        self._async_repository = async_repository
+        self._receipt_service = receipt_service
+        self._max_attempts = max_attempts
+        self._max_archive_entries = max_archive_entries
+        self._max_archive_bytes = max_archive_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="receipt-job")
+
+    async def submit_receipt(self, contents: bytes) -> dict[str, Any]:
+        image_path = await asyncio.to_thread(self._receipt_service.store_receipt_image, contents)
+        return await self._enqueue_image_async(image_path)
+
+    async def submit_upload(self, upload: IAsyncUpload) -> dict[str, Any]:
+        # Stream the request body to disk rather than buffering it.
+        stored = await self._receipt_service.store_receipt_upload(upload)
+        return await self._enqueue_image_async(stored.path, stored.content_hash)
+
+    async def submit_batch(self, uploads: Sequence[tuple[str, str, BinaryIO]]) -> list[dict[str, Any]]:
+        # (filename, content type, file) triples; archives are read off the loop.
+        return await asyncio.to_thread(self.enqueue_batch, uploads)
+
+    def enqueue_batch(self, uploads: Sequence[tuple[str, str, BinaryIO]]) -> list[dict[str, Any]]:
+        # One entry per image: a job id, or the reason it was rejected.
+        # Every archive's central directory is checked against the limits
+        # before anything is stored, so an oversized batch creates no jobs.
+        with ExitStack() as stack:
+            archives: dict[int, zipfile.ZipFile | None] = {}
+            entries = total_bytes = 0
+            for index, (filename, content_type, upload) in enumerate(uploads):
+                if content_type in ZIP_CONTENT_TYPES or filename.lower().endswith(".zip"):
+                    try:
+                        archive = stack.enter_context(zipfile.ZipFile(upload))
+                    except zipfile.BadZipFile:
+                        archives[index] = None
+                        continue
+                    archives[index] = archive
+                    members = _archive_members(archive)
+                    entries += len(members)
+                    # Reads stop at each entry's declared size, so these
+                    # sizes bound what decompression can produce.
+                    total_bytes += sum(member.file_size for member in members)
+            if entries > self._max_archive_entries or total_bytes > self._max_archive_bytes:
+                raise ArchiveTooLargeError(self._max_archive_entries, self._max_archive_bytes)
+
+            results: list[dict[str, Any]] = []
+            for index, (filename, content_type, upload) in enumerate(uploads):
+                if index in archives:
+                    results.extend(self._enqueue_archive(filename, archives[index]))
+                elif content_type.startswith("image/"):
+                    results.append(self._enqueue_upload(filename, upload))
+                else:
+                    results.append(_rejected(filename, "Upload an image file or a ZIP archive"))
+            return results
+
+    def enqueue_image(self, image_path: Path, content_hash: str | None = None) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        self._repository.create_job(job_id, str(image_path), datetime.utcnow().isoformat())
+        self._executor.submit(self._run_job, job_id, image_path, False, content_hash)
+        return {"id": job_id, "status": "queued"}
+
+    async def _enqueue_image_async(self, image_path: Path, content_hash: str | None = None) -> dict[str, Any]:
+        # The job row is written on the dedicated DB thread when one is wired.
+        if self._async_repository is None:
+            return await asyncio.to_thread(self.enqueue_image, image_path, content_hash)
+        job_id = uuid.uuid4().hex
+        await self._async_repository.create_job(job_id, str(image_path), datetime.utcnow().isoformat())
+        self._executor.submit(self._run_job, job_id, image_path, False, content_hash)
+        return {"id": job_id, "status": "queued"}
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        job = self._repository.get_job(job_id)
+        if job is None:
+            return None
+        job["receipt"] = (
+            self._receipt_service.get_receipt(job["receipt_id"]) if job["receipt_id"] is not None else None
+        )
+        return job
+
+    def resume_unfinished(self) -> int:
+        # Re-queue jobs left queued or running by a previous process.
+        jobs = self._repository.list_unfinished_jobs()
+        for job in jobs:
+            self._executor.submit(
+                self._run_job, job["id"], Path(job["image_path"]), True, None, job["created_at"]
+            )
+        if jobs:
+            logger.info("Resumed %d unfinished receipt jobs", len(jobs))
+        return len(jobs)
+
+    def retry_jobs(self) -> int:
+        # Re-queue jobs parked after OCR timeouts or an open circuit breaker.
+        jobs = self._repository.list_unfinished_jobs(["needs_retry"])
+        for job in jobs:
+            self._repository.mark_queued(job["id"])
+            self._executor.submit(self._run_job, job["id"], Path(job["image_path"]), False)
+        return len(jobs)
+
+    def shutdown(self) -> None:
+        # Finish running jobs; queued ones stay queued and resume next start.
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _enqueue_archive(self, filename: str, archive: zipfile.ZipFile | None) -> list[dict[str, Any]]:
+        # ZipFile seeks via the central directory, so only the entry being
+        # stored is ever held in memory.
+        if archive is None:
+            return [_rejected(filename, "Not a valid ZIP archive")]
+        results = []
+        for entry in _archive_members(archive):
+            if Path(entry.filename).suffix.lower() not in IMAGE_SUFFIXES:
+                results.append(_rejected(entry.filename, "Not an image file"))
+                continue
+            try:
+                member = archive.open(entry)
+            except _UNREADABLE_MEMBER_ERRORS as exc:
+                results.append(_rejected(entry.filename, f"Cannot extract from the archive: {exc}"))
+                continue
+            with member:
+                results.append(self._enqueue_upload(entry.filename, member))
+        return results
+
+    def _enqueue_upload(self, filename: str, stream: BinaryIO) -> dict[str, Any]:
+        # Archive members are decompressed under the same size limit.
+        try:
+            stored = self._receipt_service.store_receipt_stream(stream)
+        except UploadTooLargeError as exc:
+            return _rejected(filename, str(exc))
+        except _UNREADABLE_MEMBER_ERRORS as exc:
+            # A corrupt member fails part-way through; the partial file is discarded.
+            return _rejected(filename, f"Cannot extract from the archive: {exc}")
+        return {"filename": filename, **self.enqueue_image(stored.path, stored.content_hash)}
+
+    def _run_job(
+        self,
+        job_id: str,
+        image_path: Path,
+        recovering: bool,
+        content_hash: str | None = None,
+        job_created_at: str | None = None,
+    ) -> None:
+        try:
+            self._repository.mark_running(job_id)
+            receipt_id = None
+            if recovering:
+                # The previous attempt may have inserted before it could finish.
+                receipt_id = self._receipt_service.find_receipt_id_for_image(image_path, job_created_at)
+            if receipt_id is None:
+                receipt_id = self._receipt_service.process_receipt_image(image_path, content_hash)["id"]
+            self._repository.mark_done(job_id, receipt_id)
+        except OcrUnavailableError as exc:
+            # OCR was never attempted, so the attempt limit does not apply.
+            self._repository.mark_needs_retry(job_id, str(exc))
+        except OcrTimeoutError as exc:
+            job = self._repository.get_job(job_id)
+            if job is not None and job["attempts"] < self._max_attempts:
+                logger.warning("Receipt job %s timed out in OCR; parked for retry", job_id)
+                self._repository.mark_needs_retry(job_id, str(exc))
+            else:
+                self._repository.mark_failed(job_id, str(exc))
+        except Exception as exc:
+            logger.exception("Receipt job %s failed", job_id)
+            self._repository.mark_failed(job_id, str(exc) or exc.__class__.__name__)
+
+
+def _archive_members(archive: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    # Files only, without macOS resource forks and other dotfiles.
+    members = []
+    for entry in archive.infolist():
+        name = Path(entry.filename)
+        if not (entry.is_dir() or name.name.startswith(".") or "__MACOSX" in name.parts):
+            members.append(entry)
+    return members
+
+
+def _rejected(filename: str, error: str) -> dict[str, Any]:
+    return {"filename": filename, "id": None, "status": "rejected", "error": error}
@@ -2,20 +2,409 @@
 
 from __future__ import annotations
 
+import logging
+import multiprocessing
+import os
 import re
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator, NamedTuple
 
-from PIL import Image
+from PIL import Image, ImageChops, ImageFilter, ImageOps, UnidentifiedImageError
 import pytesseract
 
 
+logger = logging.getLogger(__name__)
+
+
+class OcrTimeoutError(TimeoutError):
+    """Tesseract did not finish within its time limit (and was killed)."""
+
+
+class OcrUnavailableError(RuntimeError):
+    """OCR is failing fast because the circuit breaker is open."""
+
+
+class OcrInputError(ValueError):
+    """The image file is missing, truncated or not an image Pillow can decode."""
+
+
+@contextmanager
+def _decoding(image_path: str | Path) -> Iterator[None]:
+    # Only wraps opening and decoding: Tesseract's own OSErrors (a missing
+    # binary) are engine failures, not bad input.
+    try:
+        yield
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise OcrInputError(f"Cannot decode {Path(image_path).name}: {exc}") from exc
+
+
+def _load_image(image_path: str | Path) -> Image.Image:
+    with _decoding(image_path):
+        image = Image.open(image_path)
+        image.load()
+    return image
+
+
+@dataclass(frozen=True)
+class ImagePreprocessor:
+    """Shrinks and cleans receipt photos before Tesseract sees them.
+
+    Phone photos are far larger than Tesseract needs; scaling the receipt
+    to ``target_dpi`` across an assumed ``paper_width_in`` keeps glyphs
+    legible while cutting the pixels it has to process.
+    """
+    target_dpi: int = 300
+    paper_width_in: float = 3.15
+    adaptive_threshold: bool = True
+    threshold_window: int = 31
+    threshold_offset: int = 10
+    crop_borders: bool = True
+    crop_margin_px: int = 10
+
+    @property
+    def target_width_px(self) -> int:
+        return max(1, round(self.target_dpi * self.paper_width_in))
+
+    def run(self, image_path: str) -> tuple[Image.Image, dict[str, float]]:
+        # Returns the prepared image and the seconds spent in each stage.
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+
+        def lap(stage: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = now - started
+            started = now
+
+        with _decoding(image_path), Image.open(image_path) as source:
+            # JPEG can decode straight to a power-of-two smaller grayscale size.
+            scale = self.target_width_px / min(source.size)
+            if scale < 1:
+                source.draft("L", (round(source.width * scale), round(source.height * scale)))
+            source.load()
+            lap("decode")
+            image = ImageOps.exif_transpose(source)
+        lap("rotate")
+
+        image = image.convert("L")
+        lap("grayscale")
+
+        if image.width > self.target_width_px:
+            height = max(1, round(image.height * self.target_width_px / image.width))
+            image = image.resize((self.target_width_px, height), Image.Resampling.LANCZOS)
+        lap("downscale")
+
+        if self.adaptive_threshold:
+            image = self._threshold(image)
+        lap("threshold")
+
+        if self.crop_borders:
+            image = self._crop(image)
+        lap("crop")
+        return image, timings
+
+    def _threshold(self, image: Image.Image) -> Image.Image:
+        # Ink is anything darker than its local mean by more than the offset,
+        # which copes with shadows and uneven lighting across a photo.
+        local_mean = image.filter(ImageFilter.BoxBlur(self.threshold_window // 2))
+        darkness = ImageChops.subtract(local_mean, image)
+        offset = self.threshold_offset
+        return darkness.point(lambda value: 0 if value > offset else 255)
+
+    def _crop(self, image: Image.Image) -> Image.Image:
+        box = ImageOps.invert(image).getbbox()
+        if box is None:
+            return image
+        margin = self.crop_margin_px
+        left, top, right, bottom = box
+        return image.crop(
+            (
+                max(0, left - margin),
+                max(0, top - margin),
+                min(image.width, right + margin),
+                min(image.height, bottom + margin),
+            )
+        )
+
+
+def _tesseract(func: Callable[..., Any], image: Image.Image, timeout_s: float | None, **kwargs: Any) -> Any:
+    # pytesseract kills the tesseract subprocess once the timeout expires.
+    try:
+        return func(image, timeout=timeout_s or 0, **kwargs)
+    except RuntimeError as exc:
+        if str(exc) == "Tesseract process timeout":
+            raise OcrTimeoutError(f"Tesseract timed out after {timeout_s}s") from exc
+        raise
+
+
+def tesseract_image_to_string(
+    image_path: str,
+    preprocessor: ImagePreprocessor | None = None,
+    timeout_s: float | None = None,
+) -> str:
+    # Module-level so it can be pickled into OCR worker processes.
+    if preprocessor is None:
+        return _tesseract(pytesseract.image_to_string, _load_image(image_path), timeout_s)
+    image, timings = preprocessor.run(image_path)
+    started = time.perf_counter()
+    text = _tesseract(pytesseract.image_to_string, image, timeout_s)
+    timings["tesseract"] = time.perf_counter() - started
+    logger.debug(
+        "OCR %s: %s",
+        Path(image_path).name,
+        ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items()),
+    )
+    return text
+
+
+@dataclass(frozen=True)
+class FieldConfidence:
+    tier: str
+    vendor: float
+    date: float
+    total: float
+
+    @property
+    def lowest(self) -> float:
+        return min(self.vendor, self.date, self.total)
+
+
+@dataclass(frozen=True)
+class OcrResult:
+    text: str
+    confidence: FieldConfidence | None = None
+
+
+OcrCallable = Callable[[str], str | OcrResult]
+
+# Treat the image as one block of text: skips page layout analysis.
+FAST_PASS_CONFIG = "--psm 6"
+
+
+@dataclass(frozen=True)
+class TieredOcr:
+    """Cheap OCR pass first, full pass only when key fields look unreliable.
+
+    The fast pass reads a reduced-resolution image with ``image_to_data``.
+    If Tesseract's confidence in the vendor line, date or total is below
+    ``min_confidence`` (0-100), the full-resolution pass is run instead.
+    Instances are picklable, so they can serve as a pool ``ocr_callable``.
+    """
+    fast_preprocessor: ImagePreprocessor = ImagePreprocessor(target_dpi=150)
+    full_preprocessor: ImagePreprocessor | None = None
+    min_confidence: float = 70.0
+    timeout_s: float | None = None
+
+    def __call__(self, image_path: str) -> OcrResult:
+        image, _ = self.fast_preprocessor.run(image_path)
+        result = _read_fields(self._image_data(image, FAST_PASS_CONFIG), "fast")
+        if result.confidence.lowest >= self.min_confidence:
+            return result
+
+        if self.full_preprocessor is not None:
+            image, _ = self.full_preprocessor.run(image_path)
+            return _read_fields(self._image_data(image), "full")
+        return _read_fields(self._image_data(_load_image(image_path)), "full")
+
+    def _image_data(self, image: Image.Image, config: str = "") -> dict[str, list[Any]]:
+        return _tesseract(
+            pytesseract.image_to_data,
+            image,
+            self.timeout_s,
+            config=config,
+            output_type=pytesseract.Output.DICT,
+        )
+
+
+def _read_fields(data: dict[str, list[Any]], tier: str) -> OcrResult:
+    # Rebuild text line by line from image_to_data output, then score the
+    # words the parser took the vendor, date and total from.
+    lines: dict[tuple[int, int, int], list[tuple[str, float]]] = {}
+    for index, word in enumerate(data["text"]):
+        confidence = float(data["conf"][index])
+        if confidence < 0 or not word.strip():
+            continue
+        key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+        lines.setdefault(key, []).append((word.strip(), confidence))
+    words_by_line = [lines[key] for key in sorted(lines)]
+    text = "\n".join(" ".join(word for word, _ in line) for line in words_by_line)
+    parsed = _DEFAULT_RECEIPT_PARSER.parse(text)
+    words = [word for line in words_by_line for word in line]
+
+    vendor = sum(conf for _, conf in words_by_line[0]) / len(words_by_line[0]) if words_by_line else 0.0
+    date = _match_confidence(words, parsed.date) if parsed.date else 0.0
+    total = _match_confidence(words, f"{parsed.total:.2f}") if parsed.total else 0.0
+    return OcrResult(text, FieldConfidence(tier, vendor, date, total))
+
+
+def _match_confidence(words: list[tuple[str, float]], value: str) -> float:
+    return max((conf for word, conf in words if value in word), default=0.0)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _as_result(output: str | OcrResult) -> OcrResult:
+    return output if isinstance(output, OcrResult) else OcrResult(output)
+
+
 class OcrService:
     """Wrapper around Tesseract OCR."""
+    def __init__(self, ocr_callable: OcrCallable = tesseract_image_to_string) -> None:
+        self._ocr_callable = ocr_callable
+
+    def extract(self, image_path: Path) -> OcrResult:
+        return _as_result(self._ocr_callable(str(image_path)))
+
+    def extract_text(self, image_path: Path) -> str:
+        return self.extract(image_path).text
+
+
+class ProcessPoolOcrService:
+    """Runs OCR on a pool of warm worker processes.
+
+    ``extract_text`` keeps the ``IOcrService`` contract, so each calling
+    thread (e.g. a receipt job worker) blocks on its own task while the
+    pool spreads tasks across cores.
+    """
+    def __init__(
+        self,
+        workers: int,
+        task_timeout_s: float | None = 120.0,
+        ocr_callable: OcrCallable = tesseract_image_to_string,
+    ) -> None:
+        self._workers = max(1, workers)
+        self._task_timeout_s = task_timeout_s
+        self._ocr_callable = ocr_callable
+        # Spawned workers do not inherit the parent's threads or SQLite handles.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def warm_up(self) -> set[int]:
+        # Start every worker (and import Tesseract bindings) before traffic.
+        futures = [self._executor.submit(_worker_ready) for _ in range(self._workers)]
+        return {future.result() for future in futures}
+
+    def extract(self, image_path: Path) -> OcrResult:
+        future = self._executor.submit(self._ocr_callable, str(image_path))
+        try:
+            return _as_result(future.result(timeout=self._task_timeout_s))
+        except FutureTimeoutError as exc:
+            future.cancel()
+            raise OcrTimeoutError(f"OCR timed out after {self._task_timeout_s}s: {image_path.name}") from exc
+
+    def extract_text(self, image_path: Path) -> str:
+        return self.extract(image_path).text
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call is refused until ``reset_timeout_s`` has passed;
+    then a single trial call is let through, which closes the breaker on
+    success or re-opens it on failure.
+    """
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self._reset_timeout_s:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or self._clock() - self._opened_at < self._reset_timeout_s:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self._failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+    def release(self) -> None:
+        # The call said nothing about the engine's health: free the trial
+        # slot without changing the failure count.
+        with self._lock:
+            self._trial_running = False
+
+
+# The image itself could not be decoded; the engine never got to run.
+_BAD_INPUT_ERRORS = (OcrInputError, UnidentifiedImageError, Image.DecompressionBombError)
+
+
+class CircuitBreakingOcrService:
+    """Fails fast with ``OcrUnavailableError`` while OCR keeps failing.
+
+    Timeouts and engine errors (a broken worker pool, a missing tesseract
+    binary) trip the breaker. A missing, truncated or undecodable image is
+    the image's fault and counts neither way.
+    """
+    def __init__(self, engine: OcrService | ProcessPoolOcrService, breaker: CircuitBreaker) -> None:
+        self._engine = engine
+        self.breaker = breaker
+
+    def extract(self, image_path: Path) -> OcrResult:
+        if not self.breaker.allow():
+            raise OcrUnavailableError("OCR is temporarily unavailable after repeated failures")
+        try:
+            result = self._engine.extract(image_path)
+        except _BAD_INPUT_ERRORS:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
     def extract_text(self, image_path: Path) -> str:
-        with Image.open(image_path) as image:
-            return pytesseract.image_to_string(image)
+        return self.extract(image_path).text
+
+
+class LineItem(NamedTuple):
+    name: str
+    amount: float
+    quantity: int = 1
 
 
 @dataclass
@@ -23,24 +412,143 @@ class ReceiptParseResult:
     vendor: str
     date: str | None
     total: float
+    subtotal: float | None = None
+    tax: float | None = None
+    # The text after the vendor line; line items are read from it on first
+    # access, so callers that only need the totals never pay for them.
+    item_text: str = field(default="", repr=False, compare=False)
+
+    @cached_property
+    def items(self) -> list[LineItem]:
+        return _line_items(self.item_text)
+
+
+# Scanning patterns start with a literal character so the regex engine can
+# skip straight to candidates instead of trying a match at every position;
+# lookbehinds then check what precedes the literal.
+_VENDOR_RE = re.compile(r"\s*(\S[^\n]*)")
+_ISO_DATE_RE = re.compile(r"-(?<=\d{4}-)\d{2}-\d{2}")
+_SLASH_DATE_RE = re.compile(r"/(?<=\d/)\d{1,2}/\d{2,4}")
+_AMOUNT_RE = re.compile(r"\d+\.\d{2}")
+_SUBTOTAL_LABELS = r"SUB[ -]?TOTAL"
+_TOTAL_LABELS = r"(?:GRAND )?TOTAL|AMOUNT DUE|BALANCE DUE"
+_TAX_LABELS = r"(?:SALES )?TAX|VAT|GST|HST"
+# A total label is followed directly by the amount, so "TOTAL SAVINGS 5.00"
+# and "TOTAL ITEMS 3 9.87" never count as the total. Group 1 is the amount.
+_TOTAL_LINE = rf"(?:{_TOTAL_LABELS})[ \t:]*[ \t]\$?(\d+\.\d\d)"
+_LINE_END = r"[ \t\r]*(?=\n|\Z)"
+# Run over the upper-cased text: one match per labelled line ending in an
+# amount. Groups are the total, the subtotal and the tax amount. The
+# lookahead on the labels' first letters rejects most item lines before
+# the alternation is tried.
+_LABELLED_AMOUNT_RE = re.compile(
+    rf"\n[ \t]*(?=[ABGHSTV])(?:{_TOTAL_LINE}{_LINE_END}"
+    rf"|{_SUBTOTAL_LABELS}\b[^\n]*?[ \t]\$?(\d+\.\d\d){_LINE_END}"
+    rf"|(?:{_TAX_LABELS})\b[^\n]*?[ \t]\$?(\d+\.\d\d){_LINE_END})"
+)
+# Matched against a whole upper-cased line that ends in an amount, to tell
+# label lines whose first word is not a bare label from items.
+_LABELLED_LINE_RE = re.compile(
+    rf"[ \t]*(?:{_TOTAL_LINE}|({_SUBTOTAL_LABELS})\b.*[ \t]\$?\d+\.\d\d|(?:{_TAX_LABELS})\b.*[ \t]\$?\d+\.\d\d)"
+)
+# "2 @ 1.25 BANANAS" or "3 x APPLES": a count, optionally a unit price.
+_QUANTITY_RE = re.compile(r"\s*(\d+) ?[@xX] (?:\$?\d+\.\d\d )?")
+# First words of lines that end in an amount but are not items.
+_NON_ITEM_LABELS = frozenset(
+    word
+    for label in (
+        "TOTAL", "GRAND", "AMOUNT", "BALANCE", "SUBTOTAL", "SUB-TOTAL", "SUB",
+        "TAX", "SALES", "VAT", "GST", "HST",
+        "CASH", "CHANGE", "CARD", "CREDIT", "DEBIT", "VISA", "MASTERCARD", "AMEX", "TENDER",
+    )
+    for word in (label, label + ":")
+)
 
 
 class ReceiptParser:
-    """Extracts key fields from OCR text using simple heuristics."""
+    """Extracts vendor, date, totals and line items from OCR text.
+
+    The vendor is the first non-empty line and the date the first date in
+    the text. The total is the first line labelled as one, else the
+    largest amount; subtotal and tax come from their labelled lines. Line
+    items are every other line ending in an amount, read lazily from the
+    result's ``items``.
+    """
     def parse(self, text: str) -> ReceiptParseResult:
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        vendor = lines[0] if lines else "Unknown Vendor"
+        vendor_match = _VENDOR_RE.match(text)
+        if vendor_match is None:
+            return ReceiptParseResult(vendor="Unknown Vendor", date=None, total=0.0)
+
+        total = subtotal = tax = None
+        # Labelled lines need a newline before them, so the vendor line
+        # (first once leading blanks are stripped) never counts as one.
+        for total_amount, subtotal_amount, tax_amount in _LABELLED_AMOUNT_RE.findall(text.lstrip().upper()):
+            if total_amount:
+                if total is None:
+                    total = float(total_amount)
+            elif subtotal_amount:
+                subtotal = float(subtotal_amount)
+            else:
+                tax = float(tax_amount)
+        if total is None:
+            total = max(map(float, _AMOUNT_RE.findall(text)), default=0.0)
 
-        date_match = re.search(
-            r"(\d{4}-\d{2}-\d{2})|(\d{1,2}/\d{1,2}/\d{2,4})",
-            text,
+        return ReceiptParseResult(
+            vendor=vendor_match.group(1).rstrip(),
+            date=_find_date(text),
+            total=total,
+            subtotal=subtotal,
+            tax=tax,
+            item_text=text[vendor_match.end():],
         )
-        date_value = date_match.group(0) if date_match else None
 
-        amounts = [float(m) for m in re.findall(r"(\d+\.\d{2})", text)]
-        total = max(amounts) if amounts else 0.0
 
-        return ReceiptParseResult(vendor=vendor, date=date_value, total=total)
+def _line_items(text: str) -> list[LineItem]:
+    # Every line ending in an amount that is not a total, tax or payment
+    # line. Splitting and checking the third-last character is far cheaper
+    # than a regex over every line; most lines end in no amount.
+    items: list[LineItem] = []
+    for line in text.split("\n"):
+        if line[-3:-2] != ".":
+            line = line.rstrip(" \t\r")
+            if line[-3:-2] != ".":
+                continue
+        head, _, last = line.replace("\t", " ").rpartition(" ")
+        digits = last[1:] if last[:1] == "$" else last
+        if not (digits[:-3].isdecimal() and digits[-2:].isdecimal()):
+            continue
+        words = head.split(None, 1)
+        if not words:
+            continue
+        # Label lines start with a label word, alone or followed by
+        # punctuation; any other plain word starts an item.
+        first = words[0].upper()
+        if first in _NON_ITEM_LABELS:
+            continue
+        if not first.isalnum() and _LABELLED_LINE_RE.fullmatch(line.upper()):
+            continue
+        amount = float(digits)
+        quantity = _QUANTITY_RE.match(head) if head.lstrip()[:1].isdigit() else None
+        if quantity:
+            items.append(LineItem(head[quantity.end():].strip(), amount, int(quantity.group(1))))
+        else:
+            items.append(LineItem(head.strip(), amount))
+    return items
+
+
+def _find_date(text: str) -> str | None:
+    # The leftmost "yyyy-mm-dd" or "m/d/yy[yy]", widened back over the
+    # leading digits the lookbehinds only checked for.
+    iso = _ISO_DATE_RE.search(text)
+    slash = _SLASH_DATE_RE.search(text, 0, iso.start() if iso else len(text))
+    if slash is not None:
+        start = slash.start() - 1
+        if start > 0 and text[start - 1].isdecimal():
+            start -= 1
+        return text[start:slash.end()]
+    if iso is not None:
+        return text[iso.start() - 4:iso.end()]
+    return None
 
 
 _DEFAULT_RECEIPT_PARSER = ReceiptParser()
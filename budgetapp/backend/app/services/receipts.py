@@ -3,13 +3,50 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import io
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator, NamedTuple, Sequence
 
 from ..core.config import AppConfig
-from ..core.interfaces import IReceiptParser, IReceiptRepository, IOcrService
+from ..core.interfaces import (
+    IAsyncUpload,
+    ICategorizer,
+    IOcrCache,
+    IOcrService,
+    IReceiptParser,
+    IReceiptRepository,
+    IVendorNormalizer,
+    OcrFieldConfidence,
+    ReceiptParseResult,
+)
+from .image_store import ImageStore
+from .uploads import StoredUpload
+
+
+class ReceiptRead(NamedTuple):
+    ocr_text: str
+    parsed: ReceiptParseResult
+    confidence: OcrFieldConfidence | None
+    created_at: str
+
+
+def vendor_and_category(
+    vendor: str,
+    ocr_text: str,
+    vendors: IVendorNormalizer | None = None,
+    categorizer: ICategorizer | None = None,
+) -> tuple[str, str | None]:
+    # Known spellings map to one vendor name and its default category;
+    # otherwise keyword rules pick the category from the receipt text.
+    category = None
+    if vendors is not None:
+        match = vendors.canonicalize(vendor)
+        vendor, category = match.canonical, match.category
+    if category is None and categorizer is not None:
+        category = categorizer.categorize(vendor, ocr_text)
+    return vendor, category
 
 
 class ReceiptService:
@@ -20,58 +57,170 @@ class ReceiptService:
         config: AppConfig,
         ocr_service: IOcrService,
         parser: IReceiptParser,
+        ocr_cache: IOcrCache | None = None,
+        vendors: IVendorNormalizer | None = None,
+        categorizer: ICategorizer | None = None,
     ) -> None:
         self._repository = repository
         self._config = config
         self._ocr = ocr_service
         self._parser = parser
+        self._ocr_cache = ocr_cache
+        self._vendors = vendors
+        self._categorizer = categorizer
+        self._images = ImageStore(config.receipts_dir, config.max_upload_bytes, config.upload_chunk_bytes)
 
     def create_receipt(self, contents: bytes) -> dict[str, Any]:
-        # Save image, run OCR, parse fields, then persist.
-        image_path = self._store_receipt_image(contents)
-        ocr_text = self._ocr.extract_text(image_path)
-        parsed = self._parser.parse(ocr_text)
-        created_at = datetime.utcnow().isoformat()
+        # Save image, run OCR (unless cached), parse fields, then persist.
+        stored = self.store_receipt_stream(io.BytesIO(contents))
+        return self.process_receipt_image(stored.path, stored.content_hash)
+
+    def process_receipt_image(self, image_path: Path, content_hash: str | None = None) -> dict[str, Any]:
+        # OCR, parse and persist an image that is already stored on disk.
+        ocr_text, parsed, confidence, created_at = self._read_receipt(image_path, content_hash)
+        vendor, category = self._vendor_and_category(parsed.vendor, ocr_text)
 
         receipt_id = self._repository.insert_receipt(
             parsed.date,
-            parsed.vendor,
+            vendor,
             parsed.total,
             str(image_path),
             ocr_text,
             created_at,
+            category=category,
+            ocr_confidence=confidence,
+            items=parsed.items,
+        )
+
+        return self._receipt_summary(receipt_id, parsed, vendor, category, created_at)
+
+    def find_receipt_id_for_image(self, image_path: Path, created_after: str | None = None) -> int | None:
+        return self._repository.find_receipt_id_by_image_path(str(image_path), created_after)
+
+    def list_receipts(
+        self,
+        limit: int = 50,
+        after_id: int | None = None,
+        vendor: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        min_total: float | None = None,
+        max_total: float | None = None,
+    ) -> list[dict[str, Any]]:
+        return self._repository.list_receipts(
+            limit=limit,
+            after_id=after_id,
+            vendor=vendor,
+            date_from=date_from,
+            date_to=date_to,
+            min_total=min_total,
+            max_total=max_total,
         )
 
+    def get_receipt(
+        self,
+        receipt_id: int,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any] | None:
+        return self._repository.get_receipt(receipt_id, fields)
+
+    def search_receipts(self, query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+        return self._repository.search_receipts(query, limit=limit, offset=offset)
+
+    def update_receipt_category(self, receipt_id: int, category: str | None) -> bool:
+        return self._repository.update_receipt_category(receipt_id, category)
+
+    def item_spend(
+        self,
+        item: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        group_by: str = "month",
+        limit: int = 100,
+    ) -> dict[str, Any]:
+        return self._repository.item_spend(item, date_from, date_to, group_by, limit)
+
+    def export_csv(self, chunk_rows: int = 500) -> Iterator[str]:
+        # Encode repository rows lazily, yielding one CSV chunk per batch.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["date", "vendor", "total", "created_at"])
+
+        pending = 0
+        for row in self._repository.export_rows():
+            writer.writerow([row["date"], row["vendor"], row["total"], row["created_at"]])
+            pending += 1
+            if pending >= chunk_rows:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        yield buffer.getvalue()
+
+    def ocr_cache_stats(self) -> dict[str, Any]:
+        if self._ocr_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._ocr_cache.stats()}
+
+    def _read_receipt(
+        self,
+        image_path: Path,
+        content_hash: str | None = None,
+    ) -> ReceiptRead:
+        created_at = datetime.utcnow().isoformat()
+        if self._ocr_cache is None:
+            ocr_text, confidence = self._extract(image_path)
+            return ReceiptRead(ocr_text, self._parser.parse(ocr_text), confidence, created_at)
+
+        # Identical bytes always OCR to the same text: reuse earlier results.
+        if content_hash is None:
+            with image_path.open("rb") as image_file:
+                content_hash = hashlib.file_digest(image_file, "sha256").hexdigest()
+        cached = self._ocr_cache.get(content_hash)
+        if cached is not None:
+            # Only OCR text is cached: parsing is cheap next to OCR, and
+            # parsing again keeps results current after parser changes.
+            return ReceiptRead(cached.ocr_text, self._parser.parse(cached.ocr_text), None, created_at)
+
+        ocr_text, confidence = self._extract(image_path)
+        self._ocr_cache.put(content_hash, ocr_text)
+        return ReceiptRead(ocr_text, self._parser.parse(ocr_text), confidence, created_at)
+
+    def _vendor_and_category(self, vendor: str, ocr_text: str) -> tuple[str, str | None]:
+        return vendor_and_category(vendor, ocr_text, self._vendors, self._categorizer)
+
+    def _extract(self, image_path: Path) -> tuple[str, OcrFieldConfidence | None]:
+        # Engines with an `extract` method also report field confidences.
+        extract = getattr(self._ocr, "extract", None)
+        if extract is None:
+            return self._ocr.extract_text(image_path), None
+        result = extract(image_path)
+        return result.text, result.confidence
+
+    def _receipt_summary(
+        self,
+        receipt_id: int,
+        parsed: ReceiptParseResult,
+        vendor: str,
+        category: str | None,
+        created_at: str,
+    ) -> dict[str, Any]:
         return {
             "id": receipt_id,
             "date": parsed.date,
-            "vendor": parsed.vendor,
+            "vendor": vendor,
             "total": parsed.total,
+            "category": category,
             "created_at": created_at,
         }
 
-    def list_receipts(self) -> list[dict[str, Any]]:
-        return self._repository.list_receipts()
-
-    def get_receipt(self, receipt_id: int) -> dict[str, Any] | None:
-        return self._repository.get_receipt(receipt_id)
-
-    def export_csv(self) -> io.StringIO:
-        # Build CSV from repository rows.
-        rows = self._repository.export_rows()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["date", "vendor", "total", "created_at"])
-        for row in rows:
-            writer.writerow([row["date"], row["vendor"], row["total"], row["created_at"]])
+    def store_receipt_image(self, contents: bytes) -> Path:
+        return self.store_receipt_stream(io.BytesIO(contents)).path
 
-        output.seek(0)
-        return output
+    def store_receipt_stream(self, stream: BinaryIO) -> StoredUpload:
+        # Chunked copy with the upload size limit; identical bytes share a file.
+        return self._images.save(stream)
 
-    def _store_receipt_image(self, contents: bytes) -> Path:
-        # Generate a unique filename based on timestamp.
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-        image_path = self._config.receipts_dir / f"receipt_{timestamp}.png"
-        image_path.write_bytes(contents)
-        return image_path
+    async def store_receipt_upload(self, upload: IAsyncUpload) -> StoredUpload:
+        return await self._images.save_async(upload)
@@ -0,0 +1,158 @@
+"""Keyword rules that assign receipt categories."""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Iterable, Mapping
+
+from ..core.interfaces import ICategoryRuleRepository
+
+
+_SPACES_RE = re.compile(r"\s+")
+_MAX_KEYWORD_LENGTH = 100
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Lower case with single spaces; raises ValueError for unusable keywords."""
+    normalized = _SPACES_RE.sub(" ", keyword.strip().lower())
+    if not normalized:
+        raise ValueError("Keyword must not be blank")
+    if len(normalized) > _MAX_KEYWORD_LENGTH:
+        raise ValueError(f"Keyword must be at most {_MAX_KEYWORD_LENGTH} characters")
+    # Matches are anchored on word boundaries at both ends.
+    if not (normalized[0].isalnum() and normalized[-1].isalnum()):
+        raise ValueError("Keyword must start and end with a letter or digit")
+    return normalized
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    # "coffee", "coffee beans", "cola" -> c(?:offee(?:[ \t]+beans)?|ola)
+    trie: dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        branches = [
+            (r"[ \t]+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class CompiledRules:
+    """Every keyword rule folded into one regex.
+
+    Keywords share a trie, emitted as nested alternations, so one
+    ``finditer`` pass over a receipt tests all rules at once instead of
+    running one search per rule. The pattern is a lookahead, so every start
+    position is tried and keywords nested inside longer ones are found too.
+    Among the keywords found, the highest priority wins, then the longest
+    keyword, then the oldest rule.
+    """
+    def __init__(self, rules: Iterable[Mapping[str, Any]]) -> None:
+        self._rules: dict[str, tuple[tuple[int, int, int], str]] = {}
+        for rule in rules:
+            keyword = _SPACES_RE.sub(" ", rule["keyword"].lower())
+            rank = (rule["priority"], len(keyword), -rule["id"])
+            current = self._rules.get(keyword)
+            if current is None or rank > current[0]:
+                self._rules[keyword] = (rank, rule["category"])
+        self._pattern = re.compile(rf"\b(?=({_trie_pattern(self._rules)})\b)") if self._rules else None
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def categorize(self, vendor: str, text: str) -> str | None:
+        if self._pattern is None:
+            return None
+        best: tuple[tuple[int, int, int], str] | None = None
+        for match in self._pattern.finditer(f"{vendor}\n{text}".lower()):
+            # The longest keyword starting here; shorter ones starting at the
+            # same position are its prefixes that end on a word boundary.
+            longest = _SPACES_RE.sub(" ", match.group(1))
+            for end in range(1, len(longest) + 1):
+                if end < len(longest) and (longest[end].isalnum() or longest[end] == "_"):
+                    continue
+                found = self._rules.get(longest[:end])
+                if found is not None and (best is None or found[0] > best[0]):
+                    best = found
+        return best[1] if best is not None else None
+
+
+class CategoryRuleService:
+    """Keyword rule CRUD; the compiled rule set is rebuilt on every change."""
+    def __init__(self, repository: ICategoryRuleRepository, chunk_size: int = 1000) -> None:
+        self._repository = repository
+        self._chunk_size = chunk_size
+        self._compiled: CompiledRules | None = None
+        self._lock = threading.Lock()
+
+    def categorize(self, vendor: str, text: str) -> str | None:
+        return self._rules().categorize(vendor, text)
+
+    def list_rules(self) -> list[dict[str, Any]]:
+        return self._repository.list_rules()
+
+    def add_rule(self, keyword: str, category: str, priority: int = 0) -> dict[str, Any]:
+        rule = self._repository.insert_rule(normalize_keyword(keyword), category, priority)
+        self._recompile()
+        return rule
+
+    def update_rule(self, rule_id: int, keyword: str, category: str, priority: int = 0) -> dict[str, Any] | None:
+        rule = self._repository.update_rule(rule_id, normalize_keyword(keyword), category, priority)
+        if rule is not None:
+            self._recompile()
+        return rule
+
+    def delete_rule(self, rule_id: int) -> bool:
+        deleted = self._repository.delete_rule(rule_id)
+        if deleted:
+            self._recompile()
+        return deleted
+
+    def recategorize(self, overwrite: bool = False) -> dict[str, int]:
+        # Walk receipts in id-ordered pages, one executemany per page. By
+        # default only uncategorized receipts are touched, so manual
+        # categories survive; receipts no rule matches are left alone.
+        rules = self._rules()
+        last_id = scanned = updated = 0
+        while True:
+            rows = self._repository.list_categorization_inputs(
+                after_id=last_id,
+                limit=self._chunk_size,
+                uncategorized_only=not overwrite,
+            )
+            if not rows:
+                break
+            last_id = rows[-1].receipt_id
+            scanned += len(rows)
+            matches = []
+            for row in rows:
+                category = rules.categorize(row.vendor or "", row.ocr_text or "")
+                if category is not None:
+                    matches.append((row.receipt_id, category))
+            updated += self._repository.update_categories(matches)
+        return {"scanned": scanned, "updated": updated}
+
+    def _rules(self) -> CompiledRules:
+        # Compiled on first use, after the schema exists.
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._recompile()
+        return compiled
+
+    def _recompile(self) -> CompiledRules:
+        # Readers keep using the previous rule set until the swap.
+        with self._lock:
+            self._compiled = CompiledRules(self._repository.list_rules())
+            return self._compiled
@@ -0,0 +1,111 @@
+"""Chunked, size-limited upload storage."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, NamedTuple
+
+from ..core.interfaces import IAsyncUpload
+
+
+class UploadTooLargeError(ValueError):
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds the {max_bytes // (1024 * 1024)} MiB limit")
+        self.max_bytes = max_bytes
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    content_hash: str
+    size_bytes: int
+
+
+# Maps (content hash, leading bytes) to the final path of an upload.
+Destination = Callable[[str, bytes], Path]
+
+HEADER_BYTES = 32
+
+
+class _PendingUpload:
+    # A temp file in the target directory, so the final rename is atomic.
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        fd, name = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._path = Path(name)
+        self._max_bytes = max_bytes
+        self._digest = hashlib.sha256()
+        self._header = b""
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._size += len(chunk)
+        if self._size > self._max_bytes:
+            raise UploadTooLargeError(self._max_bytes)
+        if len(self._header) < HEADER_BYTES:
+            self._header = (self._header + chunk)[:HEADER_BYTES]
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self, destination: Destination) -> StoredUpload:
+        self._file.close()
+        content_hash = self._digest.hexdigest()
+        path = destination(content_hash, self._header)
+        if path.exists():
+            # Same bytes already stored (content-addressed paths): keep that copy.
+            self._path.unlink()
+        else:
+            os.replace(self._path, path)
+        return StoredUpload(path, content_hash, self._size)
+
+    def discard(self) -> None:
+        self._file.close()
+        self._path.unlink(missing_ok=True)
+
+
+class UploadWriter:
+    """Streams uploads to disk in chunks, hashing them on the way.
+
+    Nothing larger than one chunk is held in memory, uploads over
+    ``max_bytes`` are rejected as soon as they cross the limit, and the
+    file only appears at its final path once it is complete.
+    """
+    def __init__(self, directory: Path, max_bytes: int, chunk_bytes: int = 1024 * 1024) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._chunk_bytes = chunk_bytes
+
+    def save(self, stream: BinaryIO, destination: Destination) -> StoredUpload:
+        pending = _PendingUpload(self._directory, self._max_bytes)
+        try:
+            while chunk := stream.read(self._chunk_bytes):
+                pending.write(chunk)
+            return pending.commit(destination)
+        except BaseException:
+            pending.discard()
+            raise
+
+    async def save_async(self, upload: IAsyncUpload, destination: Destination) -> StoredUpload:
+        # Reads are awaited; hashing and disk writes run on worker threads.
+        pending = await asyncio.to_thread(_PendingUpload, self._directory, self._max_bytes)
+        try:
+            while chunk := await upload.read(self._chunk_bytes):
+                await asyncio.to_thread(pending.write, chunk)
+            return await asyncio.to_thread(pending.commit, destination)
+        except BaseException:
+            await asyncio.to_thread(pending.discard)
+            raise
+
+    async def read_async(self, upload: IAsyncUpload) -> bytes:
+        # For uploads that must be parsed in memory anyway, e.g. spreadsheets.
+        chunks: list[bytes] = []
+        size = 0
+        while chunk := await upload.read(self._chunk_bytes):
+            size += len(chunk)
+            if size > self._max_bytes:
+                raise UploadTooLargeError(self._max_bytes)
+            chunks.append(chunk)
+        return b"".join(chunks)
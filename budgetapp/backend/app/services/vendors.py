@@ -0,0 +1,174 @@
+"""Vendor name canonicalization."""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter
+from typing import Any, NamedTuple
+
+from ..core.interfaces import IVendorAliasRepository
+
+
+# Store numbers ("#123", "STORE 0612", trailing "57442") say nothing about
+# who the vendor is; everything that is not a letter or digit splits words.
+_STORE_NUMBER_RE = re.compile(r"#\s*\d+|\b(?:STORE|STO|ST|NO)\b\.?\s*\d+|\b\d{3,}\b")
+_WORD_RE = re.compile(r"[A-Z0-9]+")
+
+# Shorter keys are only matched exactly.
+_MIN_FUZZY_LENGTH = 4
+# Known keys sharing the most trigrams with a query are scored in full.
+_FUZZY_CANDIDATES = 16
+
+
+def vendor_words(name: str) -> list[str]:
+    return _WORD_RE.findall(_STORE_NUMBER_RE.sub(" ", name.upper()))
+
+
+def vendor_key(name: str) -> str:
+    """Normalized spelling: "WAL-MART #123" and "Wal Mart" are both WALMART."""
+    return "".join(vendor_words(name))
+
+
+def _ngrams(key: str, size: int) -> frozenset[str]:
+    padded = f"^{key}$"
+    return frozenset(padded[i:i + size] for i in range(len(padded) - size + 1))
+
+
+class VendorMatch(NamedTuple):
+    canonical: str
+    category: str | None = None
+    # exact, prefix, fuzzy or none; score is the bigram Dice similarity.
+    method: str = "none"
+    score: float = 0.0
+
+
+class VendorIndex:
+    """In-memory lookup from vendor spellings to canonical names.
+
+    Keys are tried exactly, then each word-boundary prefix ("WALMART
+    SUPERCENTER" -> "WALMART"), then fuzzily: a trigram inverted index
+    picks the known keys sharing the most trigrams with the OCR spelling,
+    and the best bigram Dice score among them at or above ``threshold``
+    wins, so typos like "WALMRT" still resolve. Trigram postings stay
+    short, so a lookup touches a few dozen keys however many are known.
+    """
+    def __init__(self, threshold: float = 0.7) -> None:
+        self._threshold = threshold
+        self._canonical: dict[str, str] = {}
+        self._categories: dict[str, str | None] = {}
+        self._keys: list[str] = []
+        self._bigrams: list[frozenset[str]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, canonical: str, category: str | None = None) -> None:
+        if not key:
+            return
+        with self._lock:
+            if category is not None or canonical not in self._categories:
+                self._categories[canonical] = category
+            if key in self._canonical:
+                self._canonical[key] = canonical
+                return
+            self._canonical[key] = canonical
+            key_id = len(self._keys)
+            self._keys.append(key)
+            self._bigrams.append(_ngrams(key, 2))
+            for gram in _ngrams(key, 3):
+                self._postings.setdefault(gram, []).append(key_id)
+
+    def match(self, name: str) -> VendorMatch:
+        words = vendor_words(name)
+        key = "".join(words)
+        with self._lock:
+            canonical = self._canonical.get(key)
+            if canonical is not None:
+                return VendorMatch(canonical, self._categories.get(canonical), "exact", 1.0)
+            prefixes = ["".join(words[:count]) for count in range(len(words) - 1, 0, -1)]
+            for prefix in prefixes:
+                canonical = self._canonical.get(prefix)
+                if canonical is not None:
+                    return VendorMatch(canonical, self._categories.get(canonical), "prefix", 1.0)
+            for candidate in [key, *prefixes]:
+                if len(candidate) < _MIN_FUZZY_LENGTH:
+                    break
+                found = self._fuzzy(candidate)
+                if found is not None:
+                    return found
+        return VendorMatch(name)
+
+    def _fuzzy(self, key: str) -> VendorMatch | None:
+        shared: Counter[int] = Counter()
+        for gram in _ngrams(key, 3):
+            shared.update(self._postings.get(gram, ()))
+        bigrams = _ngrams(key, 2)
+        best_id, best_score = -1, self._threshold
+        for key_id, _ in shared.most_common(_FUZZY_CANDIDATES):
+            known = self._bigrams[key_id]
+            score = 2 * len(bigrams & known) / (len(bigrams) + len(known))
+            if score >= best_score:
+                best_id, best_score = key_id, score
+        if best_id < 0:
+            return None
+        canonical = self._canonical[self._keys[best_id]]
+        return VendorMatch(canonical, self._categories.get(canonical), "fuzzy", round(best_score, 3))
+
+
+class VendorService:
+    """Persists vendor aliases and canonicalizes vendor names against them."""
+    def __init__(self, repository: IVendorAliasRepository, threshold: float = 0.7) -> None:
+        self._repository = repository
+        self._threshold = threshold
+        self._index: VendorIndex | None = None
+        self._load_lock = threading.Lock()
+
+    def canonicalize(self, vendor: str) -> VendorMatch:
+        return self._loaded_index().match(vendor)
+
+    def lookup(self, vendor: str) -> dict[str, Any]:
+        return {"vendor": vendor, **self.canonicalize(vendor)._asdict()}
+
+    def list_aliases(self) -> list[dict[str, Any]]:
+        return [
+            {"alias": row.alias, "canonical": row.canonical, "category": row.category}
+            for row in self._repository.list_aliases()
+        ]
+
+    def add_alias(self, alias: str, canonical: str, category: str | None = None) -> dict[str, Any]:
+        key = vendor_key(alias)
+        if not key:
+            raise ValueError("Alias must contain letters or digits")
+        self._repository.upsert_alias(key, alias, canonical, category)
+        index = self._loaded_index()
+        index.add(key, canonical, category)
+        index.add(vendor_key(canonical), canonical, category)
+        return {"alias": alias, "canonical": canonical, "category": category}
+
+    def renormalize(self) -> dict[str, int]:
+        # Each distinct stored name is looked up once and every receipt
+        # under it is renamed in one statement.
+        index = self._loaded_index()
+        names = self._repository.list_vendor_names()
+        renames = []
+        for name in names:
+            found = index.match(name)
+            if found.method != "none" and (found.canonical != name or found.category is not None):
+                renames.append((name, found.canonical, found.category))
+        return {"scanned": len(names), "updated": self._repository.rename_vendors(renames)}
+
+    def _loaded_index(self) -> VendorIndex:
+        # Loaded on first use, after the schema exists.
+        if self._index is not None:
+            return self._index
+        with self._load_lock:
+            if self._index is None:
+                index = VendorIndex(self._threshold)
+                for row in self._repository.list_aliases():
+                    index.add(row.alias_key, row.canonical, row.category)
+                    index.add(vendor_key(row.canonical), row.canonical, row.category)
+                self._index = index
+            return self._index
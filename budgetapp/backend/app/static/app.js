@@ -4,16 +4,28 @@ const receiptFile = document.getElementById("receipt-file");
 const uploadStatus = document.getElementById("upload-status");
 const receiptsList = document.getElementById("receipts-list");
 const refreshReceipts = document.getElementById("refresh-receipts");
+const loadMoreReceipts = document.getElementById("load-more-receipts");
 const budgetForm = document.getElementById("budget-form");
 const budgetsList = document.getElementById("budgets-list");
 
-async function fetchReceipts() {
-  // Load receipts from the API and render them.
-  const response = await fetch("/receipts");
+let nextReceiptsCursor = null;
+
+async function fetchReceipts(append = false) {
+  // Load a page of receipts from the API and render them.
+  const params = new URLSearchParams({ limit: "50" });
+  if (append && nextReceiptsCursor) {
+    params.set("after_id", nextReceiptsCursor);
+  }
+  const response = await fetch(`/receipts?${params}`);
   const receipts = await response.json();
-  receiptsList.innerHTML = "";
+  nextReceiptsCursor = response.headers.get("X-Next-After-Id");
+  loadMoreReceipts.hidden = !nextReceiptsCursor;
+
+  if (!append) {
+    receiptsList.innerHTML = "";
+  }
 
-  if (!receipts.length) {
+  if (!append && !receipts.length) {
     receiptsList.innerHTML = "<li>No receipts yet.</li>";
     return;
   }
@@ -43,12 +55,78 @@ async function fetchBudgets() {
     const li = document.createElement("li");
     li.innerHTML = `
       <span>${budget.category}</span>
-      <span>${budget.spent} / ${budget.monthly_limit}</span>
+      <span>${budget.total_spent} / ${budget.monthly_limit} (${budget.remaining} left)</span>
     `;
     budgetsList.appendChild(li);
   });
 }
 
+const MAX_JOB_POLLS = 120;
+
+async function waitForJob(jobId) {
+  // Poll a background receipt job until it settles; returns its last status.
+  // Jobs parked as needs_retry only resume on a retry, so stop there too.
+  for (let poll = 0; poll < MAX_JOB_POLLS; poll += 1) {
+    const response = await fetch(`/jobs/${jobId}`);
+    if (!response.ok) {
+      uploadStatus.textContent = "Could not check the receipt's progress.";
+      return "unknown";
+    }
+    const job = await response.json();
+
+    if (job.status === "done") {
+      uploadStatus.textContent = "Receipt uploaded.";
+      fetchReceipts();
+      return job.status;
+    }
+    if (job.status === "failed") {
+      uploadStatus.textContent = job.error || "Processing failed.";
+      return job.status;
+    }
+    if (job.status === "needs_retry") {
+      uploadStatus.textContent = "OCR is unavailable right now; the receipt will be processed on retry.";
+      return job.status;
+    }
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+  }
+  uploadStatus.textContent = "Still processing; check back later.";
+  return "pending";
+}
+
+async function uploadBatch(files) {
+  // Several images or a ZIP archive go to the batch endpoint in one request.
+  const formData = new FormData();
+  Array.from(files).forEach((file) => formData.append("files", file));
+  uploadStatus.textContent = "Uploading...";
+
+  const response = await fetch("/receipts/batch", {
+    method: "POST",
+    body: formData,
+  });
+  if (!response.ok) {
+    const message = await response.json();
+    uploadStatus.textContent = message.detail || "Upload failed";
+    return;
+  }
+
+  const results = await response.json();
+  receiptFile.value = "";
+  const jobs = results.filter((result) => result.id);
+  const rejected = results.length - jobs.length;
+  uploadStatus.textContent = `Processing ${jobs.length} receipts...`;
+  let processed = 0;
+  for (const job of jobs) {
+    if ((await waitForJob(job.id)) === "done") {
+      processed += 1;
+    }
+  }
+  const unfinished = jobs.length - processed;
+  uploadStatus.textContent =
+    `${processed} receipts processed` +
+    (unfinished ? `, ${unfinished} failed or waiting for retry` : "") +
+    (rejected ? `, ${rejected} skipped.` : ".");
+}
+
 uploadForm.addEventListener("submit", async (event) => {
   // Upload a receipt image.
   event.preventDefault();
@@ -56,6 +134,16 @@ uploadForm.addEventListener("submit", async (event) => {
     return;
   }
 
+  const first = receiptFile.files[0];
+  if (receiptFile.files.length > 1 || first.name.toLowerCase().endsWith(".zip")) {
+    try {
+      await uploadBatch(receiptFile.files);
+    } catch (error) {
+      uploadStatus.textContent = "Upload failed.";
+    }
+    return;
+  }
+
   const formData = new FormData();
   formData.append("file", receiptFile.files[0]);
   uploadStatus.textContent = "Uploading...";
@@ -72,9 +160,10 @@ uploadForm.addEventListener("submit", async (event) => {
       return;
     }
 
-    uploadStatus.textContent = "Receipt uploaded.";
+    const job = await response.json();
     receiptFile.value = "";
-    fetchReceipts();
+    uploadStatus.textContent = "Processing receipt...";
+    await waitForJob(job.id);
   } catch (error) {
     uploadStatus.textContent = "Upload failed.";
   }
@@ -85,6 +174,11 @@ refreshReceipts.addEventListener("click", () => {
   fetchReceipts();
 });
 
+loadMoreReceipts.addEventListener("click", () => {
+  // Fetch the next page using the keyset cursor.
+  fetchReceipts(true);
+});
+
 budgetForm.addEventListener("submit", async (event) => {
   // Submit a budget update.
   event.preventDefault();
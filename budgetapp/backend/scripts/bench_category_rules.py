@@ -0,0 +1,69 @@
+"""Compare the compiled keyword rule set with testing rules one by one.
+
+Builds a few thousand synthetic keyword rules (plus a handful that match
+the ``bench_parser`` corpus) and categorizes the corpus with one search
+per rule and with ``CompiledRules``. Run from the backend folder:
+``python -m scripts.bench_category_rules``.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import string
+import time
+
+from app.services.rules import CompiledRules
+from scripts.bench_parser import make_corpus
+
+
+REAL_RULES = [("coffee", "Coffee"), ("latte", "Coffee"), ("unleaded", "Transport"), ("milk", "Groceries")]
+
+
+def make_rules(count: int, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    keywords = {"".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10))) for _ in range(count)}
+    rules = [(keyword, f"Category {index % 20}") for index, keyword in enumerate(sorted(keywords))] + REAL_RULES
+    return [
+        {"id": index, "keyword": keyword, "category": category, "priority": 0}
+        for index, (keyword, category) in enumerate(rules, start=1)
+    ]
+
+
+def per_rule_categorize(patterns: list[tuple[re.Pattern[str], str]], vendor: str, text: str) -> str | None:
+    # One search per rule; with equal priorities the longest matching
+    # keyword wins, then the oldest rule.
+    haystack = f"{vendor}\n{text}".lower()
+    best: tuple[int, str] | None = None
+    for pattern, category in patterns:
+        if pattern.search(haystack) and (best is None or len(pattern.pattern) > best[0]):
+            best = (len(pattern.pattern), category)
+    return best[1] if best is not None else None
+
+
+def main(rule_count: int = 5000, receipts: int = 200) -> None:
+    rules = make_rules(rule_count)
+    corpus = make_corpus(receipts)
+
+    start = time.perf_counter()
+    compiled = CompiledRules(rules)
+    compile_s = time.perf_counter() - start
+    patterns = [(re.compile(rf"\b{re.escape(rule['keyword'])}\b"), rule["category"]) for rule in rules]
+
+    start = time.perf_counter()
+    expected = [per_rule_categorize(patterns, "", text) for text in corpus]
+    looped = (time.perf_counter() - start) / receipts
+    start = time.perf_counter()
+    found = [compiled.categorize("", text) for text in corpus]
+    combined = (time.perf_counter() - start) / receipts
+
+    print(f"rules           {len(rules)}")
+    print(f"compile         {compile_s * 1e3:8.1f} ms")
+    print(f"per-rule loop   {looped * 1e6:8.1f} us/receipt")
+    print(f"compiled        {combined * 1e6:8.1f} us/receipt  ({looped / combined:.0f}x)")
+    print(f"categorized     {sum(category is not None for category in found)}/{receipts}, "
+          f"{sum(a != b for a, b in zip(expected, found))} differ from the per-rule loop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark repository calls with pooled vs. per-call SQLite connections.
+
+Run from the backend folder: ``python -m scripts.bench_database``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.core.database import Database
+from app.repositories.budgets import BudgetRepository
+from app.repositories.receipts import ReceiptRepository
+
+
+class UnpooledDatabase(Database):
+    """Reproduces the previous behaviour: a fresh, untuned connection per call."""
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def seed(db: Database, receipts: int) -> int:
+    repository = ReceiptRepository(db)
+    receipt_id = 0
+    for index in range(receipts):
+        receipt_id = repository.insert_receipt(
+            "2024-01-01",
+            f"Store {index % 50}",
+            float(index % 100),
+            f"/tmp/receipt_{index}.png",
+            "OCR TEXT " * 20,
+            "2024-01-02T00:00:00",
+        )
+    return receipt_id
+
+
+def timed(label: str, iterations: int, func: Callable[[int], object]) -> float:
+    start = time.perf_counter()
+    for index in range(iterations):
+        func(index)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<16} {iterations / elapsed:>10.0f} ops/s")
+    return elapsed
+
+
+def run_case(label: str, db: Database, iterations: int) -> float:
+    db.init()
+    last_id = seed(db, 200)
+    receipts = ReceiptRepository(db)
+    budgets = BudgetRepository(db)
+
+    print(label)
+    total = 0.0
+    total += timed("get_receipt", iterations, lambda i: receipts.get_receipt(1 + i % last_id))
+    total += timed("list_receipts", iterations // 10, lambda i: receipts.list_receipts())
+    total += timed(
+        "upsert_budget",
+        iterations,
+        lambda i: budgets.upsert_budget(f"Category {i % 20}", 100.0, float(i), 0.0),
+    )
+    return total
+
+
+def main(iterations: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = Path(tmp_dir)
+        unpooled = run_case(
+            "per-call connections (rollback journal, synchronous=FULL)",
+            UnpooledDatabase(base / "unpooled.db", journal_mode="DELETE", synchronous="FULL"),
+            iterations,
+        )
+        pooled_db = Database(base / "pooled.db")
+        pooled = run_case("pooled connections (WAL, synchronous=NORMAL)", pooled_db, iterations)
+        pooled_db.close()
+
+    print(f"\nspeedup: {unpooled / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare item-spend queries over receipt_items with scanning OCR text.
+
+Seeds a temporary database with years of synthetic receipts from
+``bench_parser`` (line items included), then answers "how much was spent
+on coffee, per month" by re-parsing every stored OCR text in Python and
+with ``ReceiptRepository.item_spend``. Run from the backend folder:
+``python -m scripts.bench_item_spend``.
+"""
+
+from __future__ import annotations
+
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.core.database import Database
+from app.core.items import item_key
+from app.repositories.receipts import NewReceipt, ReceiptRepository
+from app.services.ocr import ReceiptParser
+from scripts.bench_parser import make_corpus
+
+
+def seed(repository: ReceiptRepository, count: int, years: int = 5) -> None:
+    rng = random.Random(11)
+    parser = ReceiptParser()
+    start = date(2024 - years, 1, 1)
+    records = []
+    for text in make_corpus(count):
+        day = (start + timedelta(days=rng.randrange(365 * years))).isoformat()
+        parsed = parser.parse(text)
+        records.append(
+            NewReceipt(day, parsed.vendor, parsed.total, "bench.png", text, f"{day}T12:00:00", items=parsed.items)
+        )
+    for offset in range(0, len(records), 5000):
+        repository.insert_receipts(records[offset:offset + 5000])
+
+
+def scan_ocr_text(db: Database, item: str) -> dict[str, float]:
+    # What answering the question took before: parse every stored text.
+    parser = ReceiptParser()
+    totals: dict[str, float] = defaultdict(float)
+    with db.connect() as conn:
+        rows = conn.execute(
+            "SELECT r.date, d.ocr_text FROM receipts AS r JOIN receipt_documents AS d ON d.receipt_id = r.id"
+        ).fetchall()
+    for receipt_date, text in rows:
+        for line in parser.parse(text).items:
+            if item_key(line.name).startswith(item):
+                totals[receipt_date[:7]] += line.amount
+    return totals
+
+
+def main(count: int = 50_000) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        db = Database(Path(folder) / "bench.db")
+        db.init()
+        repository = ReceiptRepository(db)
+        seed(repository, count)
+        with db.connect() as conn:
+            items = conn.execute("SELECT COUNT(*) FROM receipt_items").fetchone()[0]
+
+        start = time.perf_counter()
+        scanned = scan_ocr_text(db, "coffee")
+        scan_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(10):
+            result = repository.item_spend("coffee", group_by="month", limit=1000)
+        index_s = (time.perf_counter() - start) / 10
+        db.close()
+
+    if abs(sum(scanned.values()) - result["total"]) > 0.01 * len(scanned):
+        raise SystemExit("item_spend disagrees with the OCR text scan")
+    print(f"receipts        {count} over 5 years, {items} line items")
+    print(f"ocr_text scan   {scan_s * 1e3:8.1f} ms")
+    print(f"item_spend      {index_s * 1e3:8.1f} ms  ({scan_s / index_s:.0f}x), {result['count']} coffee items")
+
+
+if __name__ == "__main__":
+    main()
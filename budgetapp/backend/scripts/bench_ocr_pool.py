@@ -0,0 +1,63 @@
+"""Measure OCR throughput of the process pool against inline OCR.
+
+Uses a CPU-bound stub instead of Tesseract so the numbers reflect the
+executor, not the OCR engine. Run from the backend folder:
+``python -m scripts.bench_ocr_pool``.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.services.ocr import ProcessPoolOcrService
+
+
+def stub_ocr(image_path: str, iterations: int = 2_000_000) -> str:
+    # Burn CPU roughly like a small Tesseract pass would.
+    acc = 0
+    for index in range(iterations):
+        acc = (acc + index * index) % 1_000_003
+    return f"{image_path}:{acc}"
+
+
+def run_inline(images: list[Path]) -> float:
+    start = time.perf_counter()
+    for image in images:
+        stub_ocr(str(image))
+    return time.perf_counter() - start
+
+
+def run_pool(images: list[Path], workers: int) -> float:
+    service = ProcessPoolOcrService(workers=workers, ocr_callable=stub_ocr)
+    service.warm_up()
+    try:
+        # One calling thread per worker, like the receipt job pool.
+        with ThreadPoolExecutor(max_workers=workers) as callers:
+            start = time.perf_counter()
+            list(callers.map(service.extract_text, images))
+            return time.perf_counter() - start
+    finally:
+        service.shutdown()
+
+
+def main(tasks: int = 32) -> None:
+    images = [Path(f"receipt_{index}.png") for index in range(tasks)]
+    baseline = run_inline(images)
+    print(f"inline         {tasks / baseline:6.1f} images/s")
+
+    cores = os.cpu_count() or 1
+    workers = 1
+    while workers <= cores:
+        elapsed = run_pool(images, workers)
+        print(
+            f"pool x{workers:<2}       {tasks / elapsed:6.1f} images/s"
+            f"  ({baseline / elapsed:.2f}x, {baseline / elapsed / workers:.0%} per-core efficiency)"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare average OCR latency of full-resolution vs. tiered OCR.
+
+Renders synthetic receipt photos, some clean and some blurred (which should
+fail the confidence gate), and times both engines over the same set.
+Requires a Tesseract binary. Run from the backend folder:
+``python -m scripts.bench_ocr_tiered``.
+"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+from app.services.ocr import ImagePreprocessor, TieredOcr, tesseract_image_to_string
+from scripts.bench_ocr_preprocess import make_photo
+
+
+def make_receipts(directory: Path, count: int, blurred_every: int) -> list[Path]:
+    paths = []
+    for index in range(count):
+        path = directory / f"receipt_{index}.jpg"
+        make_photo(path)
+        if blurred_every and index % blurred_every == 0:
+            with Image.open(path) as photo:
+                photo.filter(ImageFilter.GaussianBlur(6)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def average_latency(engine, paths: list[Path]) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for path in paths:
+        results.append(engine(str(path)))
+    return (time.perf_counter() - start) / len(paths), results
+
+
+def main(count: int = 20, blurred_every: int = 4) -> None:
+    if shutil.which("tesseract") is None:
+        print("tesseract not found; install it to run this benchmark")
+        return
+
+    preprocessor = ImagePreprocessor()
+    full = partial(tesseract_image_to_string, preprocessor=preprocessor)
+    tiered = TieredOcr(fast_preprocessor=ImagePreprocessor(target_dpi=150), full_preprocessor=preprocessor)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = make_receipts(Path(tmp_dir), count, blurred_every)
+        full_latency, _ = average_latency(full, paths)
+        tiered_latency, results = average_latency(tiered, paths)
+
+    escalated = sum(1 for result in results if result.confidence.tier == "full")
+    print(f"full pass only  {full_latency * 1000:8.1f} ms/receipt")
+    print(f"tiered          {tiered_latency * 1000:8.1f} ms/receipt  ({escalated}/{count} needed the full pass)")
+    print(f"saved           {(full_latency - tiered_latency) * 1000:8.1f} ms/receipt on average")
+
+
+if __name__ == "__main__":
+    main()
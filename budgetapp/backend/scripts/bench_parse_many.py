@@ -0,0 +1,51 @@
+"""Compare batch parsing with parsing texts one at a time.
+
+Parses the synthetic OCR corpus from ``bench_parser`` into a DataFrame of
+vendor, date and total with the legacy parser, ``ReceiptParser.parse`` in a
+loop, and ``parse_many``, and checks the last two agree. Run from the
+backend folder: ``python -m scripts.bench_parse_many``.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+
+from app.services.batch_parsing import parse_many
+from app.services.ocr import ReceiptParser
+from scripts.bench_parser import legacy_parse, make_corpus
+
+
+COLUMNS = ["vendor", "date", "total"]
+
+
+def timed(func) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    frame = func()
+    return time.perf_counter() - start, frame
+
+
+def main(count: int = 100_000) -> None:
+    texts = make_corpus(count)
+    parser = ReceiptParser()
+
+    legacy, _ = timed(lambda: pd.DataFrame([legacy_parse(text) for text in texts], columns=COLUMNS))
+    looped, expected = timed(
+        lambda: pd.DataFrame(
+            [(result.vendor, result.date, result.total) for result in map(parser.parse, texts)],
+            columns=COLUMNS,
+        )
+    )
+    batched, frame = timed(lambda: parse_many(texts))
+    if not frame.equals(expected):
+        raise SystemExit("parse_many disagrees with ReceiptParser.parse")
+
+    print(f"texts            {count}")
+    print(f"legacy loop      {legacy:6.2f} s")
+    print(f"parse() loop     {looped:6.2f} s  ({legacy / looped:.1f}x legacy)")
+    print(f"parse_many       {batched:6.2f} s  ({legacy / batched:.1f}x legacy, {looped / batched:.2f}x parse loop)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare receipt parsing throughput of the legacy and current parsers.
+
+Generates a fixed-seed corpus of synthetic OCR receipts (header noise,
+items, totals, payment lines, footers) and times both parsers over it.
+Run from the backend folder: ``python -m scripts.bench_parser``.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+
+from app.services.ocr import ReceiptParser
+
+
+VENDORS = [
+    "CORNER GROCERY", "WAL-MART SUPERCENTER", "Blue Bottle Coffee", "SHELL OIL 57442", "TARGET",
+    "Coffee Hut", "TRADER JOE'S #552", "CVS/pharmacy", "HOME DEPOT 0612", "Joe's Diner",
+]
+ITEMS = [
+    "MILK 2% 1GAL", "BREAD WHEAT", "EGGS LARGE 12CT", "BANANAS", "COFFEE BEANS 12OZ", "LATTE",
+    "PAPER TOWELS 6PK", "UNLEADED 10.512 GAL", "CHICKEN BREAST", "ORANGE JUICE", "GREEK YOGURT", "BAGEL",
+]
+FOOTERS = [
+    "THANK YOU FOR SHOPPING", "PLEASE COME AGAIN", "RETURNS WITHIN 30 DAYS WITH RECEIPT",
+    "Tell us how we did: survey.example.com", "ITEMS SOLD {count}", "TC# 4821 7730 1196 2245 0071",
+]
+
+
+def make_receipt(rng: random.Random) -> str:
+    lines = [
+        rng.choice(VENDORS),
+        f"{rng.randint(10, 9999)} Main St",
+        f"Springfield IL 6{rng.randint(1000, 9999)}",
+        f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        f"ST# {rng.randint(1000, 9999)} OP# {rng.randint(1, 99):05d} TE# {rng.randint(1, 40)} TR# {rng.randint(1, 9999):05d}",
+    ]
+    if rng.random() < 0.6:
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    else:
+        date = f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/24"
+    date_line = f"Date: {date} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+    # Some receipts print the date in the header, others at the bottom.
+    date_on_top = rng.random() < 0.5
+    if date_on_top:
+        lines.append(date_line)
+
+    count = rng.randint(2, 25)
+    subtotal = 0.0
+    for _ in range(count):
+        name = rng.choice(ITEMS)
+        if rng.random() < 0.15:
+            quantity, unit = rng.randint(2, 6), rng.randint(50, 900) / 100
+            price = round(quantity * unit, 2)
+            lines.append(f"{quantity} @ {unit:.2f} {name} {price:.2f}")
+        else:
+            price = rng.randint(50, 2500) / 100
+            lines.append(f"{name} {price:.2f}")
+        if rng.random() < 0.3:
+            lines.append(f"  {rng.randint(10**11, 10**12 - 1)} F")
+        subtotal += price
+
+    tax = round(subtotal * 0.0825, 2)
+    total = round(subtotal + tax, 2)
+    tendered = float(int(total) + 20)
+    lines += [
+        f"SUBTOTAL {subtotal:.2f}",
+        f"TAX 8.25% {tax:.2f}",
+        f"TOTAL {total:.2f}",
+        rng.choice([f"VISA {total:.2f}", f"CASH {tendered:.2f}"]),
+        f"CHANGE {max(tendered - total, 0):.2f}",
+        f"XXXX XXXX XXXX {rng.randint(1000, 9999)}",
+        f"AUTH CODE {rng.randint(100000, 999999)}",
+    ]
+    if not date_on_top:
+        lines.append(date_line)
+    lines += [footer.format(count=count) for footer in rng.sample(FOOTERS, 3)]
+    return "\n".join(lines) + "\n"
+
+
+def make_corpus(count: int = 5000, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [make_receipt(rng) for _ in range(count)]
+
+
+def legacy_parse(text: str) -> tuple[str, str | None, float]:
+    # The parser as it was before the single-pass rewrite.
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    vendor = lines[0] if lines else "Unknown Vendor"
+    date_match = re.search(r"(\d{4}-\d{2}-\d{2})|(\d{1,2}/\d{1,2}/\d{2,4})", text)
+    amounts = [float(m) for m in re.findall(r"(\d+\.\d{2})", text)]
+    return vendor, date_match.group(0) if date_match else None, max(amounts) if amounts else 0.0
+
+
+def best_of(func, corpus: list[str], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus)
+
+
+def main(count: int = 5000, repeats: int = 5) -> None:
+    corpus = make_corpus(count)
+    parser = ReceiptParser()
+    legacy = best_of(legacy_parse, corpus, repeats)
+    current = best_of(parser.parse, corpus, repeats)
+    # Line items are read on first access to ``items``.
+    with_items = best_of(lambda text: parser.parse(text).items, corpus, repeats)
+    print(f"corpus          {count} receipts, {sum(map(len, corpus)) // count} chars on average")
+    print(f"legacy parse    {legacy * 1e6:8.1f} us/receipt")
+    print(f"parse           {current * 1e6:8.1f} us/receipt  ({legacy / current:.1f}x throughput)")
+    print(f"parse + items   {with_items * 1e6:8.1f} us/receipt  ({legacy / with_items:.1f}x throughput)")
+
+
+if __name__ == "__main__":
+    main()
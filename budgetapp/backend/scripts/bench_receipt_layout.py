@@ -0,0 +1,88 @@
+"""Compare list/export cost with OCR text inline vs. in receipt_documents.
+
+Run from the backend folder: ``python -m scripts.bench_receipt_layout``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from app.core.migrations import MIGRATIONS, migrate
+
+
+LIST_QUERY = "SELECT id, date, vendor, total, created_at FROM receipts ORDER BY id DESC LIMIT 50 OFFSET 5000"
+EXPORT_QUERY = "SELECT date, vendor, total, created_at FROM receipts ORDER BY id DESC"
+AGGREGATE_QUERY = "SELECT vendor, SUM(total) FROM receipts GROUP BY vendor"
+
+
+def seed(db_path: Path, receipts: int, ocr_bytes: int) -> None:
+    # Build the pre-split layout (schema version 6 is the split).
+    conn = sqlite3.connect(db_path)
+    migrate(conn, [migration for migration in MIGRATIONS if migration.version < 6])
+    ocr_text = ("TOTAL 12.34 MILK BREAD EGGS " * (ocr_bytes // 28 + 1))[:ocr_bytes]
+    with conn:
+        conn.executemany(
+            "INSERT INTO receipts (date, vendor, total, image_path, ocr_text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                ("2024-01-01", f"Vendor {index % 200}", index / 100, f"/data/r_{index}.png", ocr_text, "2024-01-02")
+                for index in range(receipts)
+            ),
+        )
+    conn.close()
+
+
+def receipts_pages(db_path: Path) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return int(conn.execute("SELECT COUNT(*) FROM dbstat WHERE name = 'receipts'").fetchone()[0])
+    except sqlite3.OperationalError:
+        return -1
+    finally:
+        conn.close()
+
+
+def time_query(db_path: Path, query: str, repeats: int = 5) -> float:
+    # A fresh connection per run so every run starts with a cold page cache.
+    best = float("inf")
+    for _ in range(repeats):
+        conn = sqlite3.connect(db_path)
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        best = min(best, time.perf_counter() - start)
+        conn.close()
+    return best
+
+
+def report(label: str, db_path: Path) -> dict[str, float]:
+    timings = {
+        "list page": time_query(db_path, LIST_QUERY),
+        "export": time_query(db_path, EXPORT_QUERY),
+        "aggregate": time_query(db_path, AGGREGATE_QUERY),
+    }
+    print(f"{label}: receipts b-tree pages = {receipts_pages(db_path)}")
+    for name, seconds in timings.items():
+        print(f"  {name:<10} {seconds * 1000:8.2f} ms")
+    return timings
+
+
+def main(receipts: int = 20000, ocr_bytes: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "layout.db"
+        seed(db_path, receipts, ocr_bytes)
+        before = report("inline ocr_text", db_path)
+
+        conn = sqlite3.connect(db_path)
+        migrate(conn)
+        conn.execute("VACUUM")
+        conn.close()
+        after = report("receipt_documents side table", db_path)
+
+    for name in before:
+        print(f"{name} speedup: {before[name] / after[name]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time vendor canonicalization lookups against a large alias index.
+
+Builds an in-memory ``VendorIndex`` of synthetic aliases plus the vendors
+from ``bench_parser`` and times exact, prefix, fuzzy (OCR typo) and
+unmatched lookups. Run from the backend folder:
+``python -m scripts.bench_vendor_index``.
+"""
+
+from __future__ import annotations
+
+import random
+import string
+import time
+
+from app.services.vendors import VendorIndex, vendor_key
+from scripts.bench_parser import VENDORS
+
+
+QUERIES = {
+    "exact": "WAL-MART #4471",
+    "prefix": "TARGET GREATLAND #1182",
+    "fuzzy": "TRADR JOES #552",
+    "no match": "MOUNTAIN VIEW HARDWARE & GARDEN",
+}
+
+
+def make_index(count: int, seed: int = 7) -> VendorIndex:
+    rng = random.Random(seed)
+    index = VendorIndex()
+    for _ in range(count):
+        words = [
+            "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        name = " ".join(words)
+        index.add(vendor_key(name), name.title())
+    for vendor in VENDORS + ["WAL-MART"]:
+        index.add(vendor_key(vendor), vendor.title())
+    return index
+
+
+def main(count: int = 20_000, repeats: int = 2000) -> None:
+    index = make_index(count)
+    print(f"aliases         {len(index)}")
+    for label, query in QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            match = index.match(query)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{label:<15} {elapsed * 1e6:8.1f} us  -> {match.canonical} ({match.method})")
+
+
+if __name__ == "__main__":
+    main()
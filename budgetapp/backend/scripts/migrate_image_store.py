@@ -0,0 +1,70 @@
+"""Move flat-directory receipt images into the sharded content-addressed store.
+
+Each legacy file is linked (or copied) to its ``ab/cd/<sha256><ext>`` path,
+``image_path`` rows in receipt_documents and receipt_jobs are repointed, and
+only then are the old names removed, so an interrupted run can simply be
+re-run. Run from the backend folder: ``python -m scripts.migrate_image_store``.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.jobs import JobRepository
+from app.repositories.receipts import ReceiptRepository
+from app.services.image_store import ImageStore
+
+
+def legacy_paths(store: ImageStore, receipts_dir: Path, referenced: list[str]) -> list[Path]:
+    # Flat files in receipts_dir plus anything rows point at outside the store.
+    candidates = {Path(path) for path in referenced}
+    candidates.update(path for path in receipts_dir.iterdir() if path.is_file() and not path.name.startswith("."))
+    return sorted(path for path in candidates if not store.contains(path))
+
+
+def migrate_images(config: AppConfig, db: Database) -> dict[str, int]:
+    store = ImageStore(config.receipts_dir, config.max_upload_bytes, config.upload_chunk_bytes)
+    receipts = ReceiptRepository(db)
+    jobs = JobRepository(db)
+
+    moves: list[tuple[str, str]] = []
+    missing = 0
+    for path in legacy_paths(store, config.receipts_dir, receipts.list_image_paths()):
+        if not path.is_file():
+            missing += 1
+            continue
+        moves.append((str(path), str(store.adopt(path).path)))
+
+    receipt_rows = receipts.relocate_image_paths(moves)
+    job_rows = jobs.relocate_image_paths(moves)
+    for old_path, _ in moves:
+        Path(old_path).unlink(missing_ok=True)
+    return {
+        "files": len(moves),
+        "blobs": len({new_path for _, new_path in moves}),
+        "receipt_rows": receipt_rows,
+        "job_rows": job_rows,
+        "missing": missing,
+    }
+
+
+def main() -> None:
+    config = AppConfig.from_environment()
+    config.ensure_directories()
+    db = Database.from_config(config)
+    db.init()
+    try:
+        summary = migrate_images(config, db)
+    finally:
+        db.close()
+    print(
+        f"Moved {summary['files']} files into {summary['blobs']} blobs; "
+        f"updated {summary['receipt_rows']} receipt and {summary['job_rows']} job rows; "
+        f"{summary['missing']} referenced files were missing"
+    )
+
+
+if __name__ == "__main__":
+    main()
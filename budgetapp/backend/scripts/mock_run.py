@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from app.core.config import AppConfig
@@ -25,6 +25,7 @@ class DummyParserResult:
     vendor: str
     date: str | None
     total: float
+    items: list = field(default_factory=list)
 
 
 @dataclass
@@ -83,7 +84,7 @@ def run_mock() -> None:
 
         receipts = receipt_service.list_receipts()
         budgets = budget_service.list_budgets()
-        csv_output = receipt_service.export_csv().getvalue()
+        csv_output = "".join(receipt_service.export_csv())
 
         print("Receipts:")
         for receipt in receipts:
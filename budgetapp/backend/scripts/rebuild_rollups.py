@@ -0,0 +1,26 @@
+"""Recompute the per-category monthly spend rollups from the receipts table.
+
+Run from the backend folder: ``python -m scripts.rebuild_rollups``.
+"""
+
+from __future__ import annotations
+
+from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository
+
+
+def main() -> None:
+    config = AppConfig.from_environment()
+    config.ensure_directories()
+    db = Database.from_config(config)
+    db.init()
+    try:
+        rollups = ReceiptRepository(db).rebuild_spend_rollups()
+    finally:
+        db.close()
+    print(f"Rebuilt {rollups} spend rollups in {config.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Re-run the receipt parser over OCR text that is already stored.
+
+Receipts keep the vendor, date and total their parser produced at upload
+time; after the parser improves, this backfill brings them (and their
+line items in ``receipt_items``) up to date without redoing OCR. OCR text
+is read in id-ordered chunks and parsed in a process pool. Vendors then
+go through the alias index and uncategorized receipts get a category,
+as on upload, and changed rows are written back with one ``executemany``
+per chunk. Each write also records the last id done, so an interrupted
+run resumes where it stopped (``--restart`` starts over).
+
+Run from the backend folder: ``python -m scripts.reparse_receipts``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository, ReparsedReceipt, StoredOcrText
+from app.repositories.rules import CategoryRuleRepository
+from app.repositories.vendors import VendorAliasRepository
+from app.services.ocr import ReceiptParser
+from app.services.receipts import vendor_and_category
+from app.services.rules import CategoryRuleService
+from app.services.vendors import VendorService
+
+
+CHECKPOINT = "reparse_receipts"
+
+_PARSER = ReceiptParser()
+
+
+def parse_chunk(rows: list[StoredOcrText]) -> list[ReparsedReceipt]:
+    # Runs in the worker processes.
+    results = []
+    for row in rows:
+        parsed = _PARSER.parse(row.ocr_text)
+        results.append(
+            ReparsedReceipt(row.receipt_id, parsed.vendor, parsed.date, parsed.total, row.created_at, parsed.items)
+        )
+    return results
+
+
+class _InlineExecutor(Executor):
+    # workers=0: parse in this process, e.g. for tests or tiny databases.
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def reparse_receipts(
+    db: Database,
+    chunk_size: int = 1000,
+    workers: int | None = None,
+    restart: bool = False,
+    vendor_match_threshold: float = 0.7,
+) -> dict[str, int]:
+    repository = ReceiptRepository(db)
+    # The alias index and compiled rules live in this process; vendor
+    # lookups are cheap next to parsing.
+    vendors = VendorService(VendorAliasRepository(db), vendor_match_threshold)
+    rules = CategoryRuleService(CategoryRuleRepository(db))
+    if restart:
+        repository.clear_checkpoint(CHECKPOINT)
+    resumed_from = last_id = repository.get_checkpoint(CHECKPOINT)
+
+    if workers == 0:
+        executor: Executor = _InlineExecutor()
+    else:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    # Keep a couple of chunks per worker in flight so reading, parsing and
+    # writing overlap. Results are written strictly in id order, so the
+    # checkpoint never covers a row that has not been written yet.
+    max_in_flight = 2 * (workers if workers is not None else os.cpu_count() or 1) or 1
+    in_flight: deque[tuple[list[StoredOcrText], Future]] = deque()
+    scanned = updated = 0
+    with executor:
+        while True:
+            rows = repository.list_ocr_texts(after_id=last_id, limit=chunk_size)
+            if rows:
+                last_id = rows[-1].receipt_id
+                in_flight.append((rows, executor.submit(parse_chunk, rows)))
+            while in_flight and (not rows or len(in_flight) >= max_in_flight):
+                chunk, future = in_flight.popleft()
+                reparsed = []
+                for stored, row in zip(chunk, future.result()):
+                    vendor, category = vendor_and_category(row.vendor, stored.ocr_text, vendors, rules)
+                    reparsed.append(row._replace(vendor=vendor, category=category))
+                updated += repository.update_parsed_fields(reparsed, (CHECKPOINT, chunk[-1].receipt_id))
+                scanned += len(chunk)
+            if not rows:
+                break
+
+    repository.clear_checkpoint(CHECKPOINT)
+    return {"resumed_from": resumed_from, "scanned": scanned, "updated": updated}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes; 0 parses inline")
+    parser.add_argument("--restart", action="store_true", help="ignore a checkpoint left by an interrupted run")
+    args = parser.parse_args()
+
+    config = AppConfig.from_environment()
+    config.ensure_directories()
+    db = Database.from_config(config)
+    db.init()
+    try:
+        summary = reparse_receipts(db, args.chunk_size, args.workers, args.restart, config.vendor_match_threshold)
+    finally:
+        db.close()
+    resumed = f" (resumed after receipt {summary['resumed_from']})" if summary["resumed_from"] else ""
+    print(f"Re-parsed {summary['scanned']} receipts{resumed}; {summary['updated']} changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from app.core.database import Database
+from app.core.executor import DatabaseExecutor
+from app.repositories.async_repositories import AsyncBudgetRepository, AsyncJobRepository
+from app.repositories.budgets import BudgetRepository
+from app.repositories.jobs import JobRepository
+from app.services.budgets import BudgetService
+from app.services.jobs import ReceiptJobService
+
+
+class ThreadRecordingBudgetRepository(BudgetRepository):
+    def __init__(self, db: Database) -> None:
+        super().__init__(db)
+        self.threads: set[str] = set()
+
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        self.threads.add(threading.current_thread().name)
+        return super().bulk_upsert_budgets(budgets)
+
+
+class ThreadRecordingJobRepository(JobRepository):
+    def __init__(self, db: Database) -> None:
+        super().__init__(db)
+        self.threads: set[str] = set()
+
+    def create_job(self, job_id: str, image_path: str, created_at: str) -> None:
+        self.threads.add(threading.current_thread().name)
+        super().create_job(job_id, image_path, created_at)
+
+
+class StubReceiptService:
+    def __init__(self, tmp_path: Path) -> None:
+        self.image_path = tmp_path / "receipt.png"
+
+    def store_receipt_image(self, contents: bytes) -> Path:
+        self.image_path.write_bytes(contents)
+        return self.image_path
+
+    def process_receipt_image(self, image_path: Path, content_hash: str | None = None) -> dict:
+        return {"id": 1}
+
+
+def build_db(tmp_path: Path) -> Database:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    return db
+
+
+def test_job_service_creates_upload_jobs_on_the_db_thread(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    executor = DatabaseExecutor(thread_name_prefix="test-db")
+    repository = ThreadRecordingJobRepository(db)
+    job_service = ReceiptJobService(
+        repository,
+        StubReceiptService(tmp_path),
+        workers=1,
+        async_repository=AsyncJobRepository(repository, executor),
+    )
+
+    try:
+        queued = asyncio.run(job_service.submit_receipt(b"image-bytes"))
+    finally:
+        job_service.shutdown()
+        executor.shutdown()
+
+    assert repository.get_job(queued["id"]) is not None
+    assert len(repository.threads) == 1
+    assert next(iter(repository.threads)).startswith("test-db")
+
+
+def test_budget_service_imports_through_async_repository(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    executor = DatabaseExecutor(thread_name_prefix="test-db")
+    repository = ThreadRecordingBudgetRepository(db)
+    service = BudgetService(repository, AsyncBudgetRepository(repository, executor))
+
+    try:
+        result = asyncio.run(
+            service.import_budgets_async("budgets.csv", b"category,monthly_limit\nFood,300\nTravel,800\n")
+        )
+    finally:
+        executor.shutdown()
+
+    assert result == {"imported": 2}
+    assert [row["category"] for row in repository.list_budgets()] == ["Food", "Travel"]
+    assert len(repository.threads) == 1
+    assert next(iter(repository.threads)).startswith("test-db")
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from app.services.batch_parsing import parse_many
+from app.services.ocr import ReceiptParser
+
+
+TEXTS = [
+    "Coffee Hut\nDate: 2024-05-01\nLatte 4.50\nTotal 12.75\n",
+    "Market\n01/02/2024\nSubtotal 8.25\nTotal 9.99\n",
+    "",
+    "  \n\n",
+    "\n\nTOTAL 5.00\nTea 1.00\n",
+    "Diner\nSoup 4.50\nPie 5.25",
+    "STRAßE CAFÉ\r\nGRAND TOTAL 12.00 \r\nTOTAL 13.00\r\n",
+    "Shop\nPhone 555-1234\n1/2/2024-05-06\nTAX 8.25% 0.85\nAMOUNT DUE $3.00\n",
+    "Shop\n12024-03-14 3/4/24\n",
+    "Shop\nTOTAL SAVINGS 5.00\nTOTAL ITEMS 3 9.87\nTotal:\t$4.00\n",
+]
+
+
+def test_parse_many_matches_parse_for_each_text() -> None:
+    parser = ReceiptParser()
+
+    frame = parse_many(TEXTS)
+
+    expected = [parser.parse(text) for text in TEXTS]
+    assert list(frame.itertuples(index=False, name=None)) == [
+        (result.vendor, result.date, result.total) for result in expected
+    ]
+
+
+def test_parse_many_keeps_series_index() -> None:
+    texts = pd.Series(["Market\nTotal 9.99\n", "Cafe\n2024-01-02\nLatte 4.50\n"], index=[10, 20])
+
+    frame = parse_many(texts)
+
+    assert list(frame.index) == [10, 20]
+    assert frame.loc[20].tolist() == ["Cafe", "2024-01-02", 4.50]
+
+
+def test_parse_many_handles_nul_characters_and_empty_input() -> None:
+    frame = parse_many(["Shop\x00Name\nTotal 1.00\n"])
+
+    assert frame.loc[0].tolist() == ["Shop\x00Name", None, 1.00]
+    assert parse_many([]).empty
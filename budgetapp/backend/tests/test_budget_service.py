@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Iterable
 
 from app.services.budgets import BudgetService
 
@@ -9,8 +10,10 @@ from app.services.budgets import BudgetService
 class RecordingBudgetRepository:
     last_args: tuple[str, float, float, float] | None = None
     upserted: list[tuple[str, float, float, float]] = field(default_factory=list)
+    last_month: str | None = None
 
-    def list_budgets(self) -> list[dict]:
+    def list_budgets(self, month: str | None = None) -> list[dict]:
+        self.last_month = month
         return [{"category": "Food", "monthly_limit": 200.0, "spent": 50.0, "prior_balance": 25.0}]
 
     def upsert_budget(
@@ -29,6 +32,11 @@ class RecordingBudgetRepository:
             "prior_balance": prior_balance,
         }
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        rows = list(budgets)
+        self.upserted.extend(rows)
+        return len(rows)
+
 
 def test_budget_service_lists_budgets() -> None:
     repository = RecordingBudgetRepository()
@@ -38,6 +46,10 @@ def test_budget_service_lists_budgets() -> None:
 
     assert budgets == [{"category": "Food", "monthly_limit": 200.0, "spent": 50.0, "prior_balance": 25.0}]
 
+    service.list_budgets("2024-03")
+
+    assert repository.last_month == "2024-03"
+
 
 def test_budget_service_upserts_budget() -> None:
     repository = RecordingBudgetRepository()
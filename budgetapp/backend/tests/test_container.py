@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from app.core.config import AppConfig
+from app.core.container import Container
+
+
+def build_config(tmp_path: Path, **overrides: object) -> AppConfig:
+    config = AppConfig(
+        base_dir=tmp_path,
+        data_dir=tmp_path / "data",
+        receipts_dir=tmp_path / "data" / "receipts",
+        db_path=tmp_path / "data" / "app.db",
+        static_dir=tmp_path / "static",
+    )
+    return replace(config, **overrides)
+
+
+def test_ocr_task_timeout_covers_every_tesseract_pass(tmp_path: Path) -> None:
+    tiered = Container(build_config(tmp_path, ocr_call_timeout_s=60.0, ocr_task_margin_s=30.0))
+    single = Container(build_config(tmp_path, ocr_mode="single", ocr_call_timeout_s=60.0, ocr_task_margin_s=30.0))
+    explicit = Container(build_config(tmp_path, ocr_task_timeout_s=300.0))
+
+    assert tiered.ocr_task_timeout_s == 150.0
+    assert single.ocr_task_timeout_s == 90.0
+    assert explicit.ocr_task_timeout_s == 300.0
+
+
+def test_ocr_task_timeout_shorter_than_its_passes_is_rejected(tmp_path: Path) -> None:
+    container = Container(build_config(tmp_path, ocr_workers=1, ocr_task_timeout_s=120.0))
+
+    with pytest.raises(ValueError, match="ocr_task_timeout_s"):
+        container.ocr_engine
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.core.database import Database
+from app.core.migrations import MIGRATIONS, Migration, migrate, schema_version
+
+
+def test_connect_reuses_connection_per_thread(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    db.init()
+
+    first = db.connect()
+    second = db.connect()
+
+    other: list = []
+    thread = threading.Thread(target=lambda: other.append(db.connect()))
+    thread.start()
+    thread.join()
+
+    assert first is second
+    assert other[0] is not first
+
+
+def test_connect_applies_configured_pragmas(tmp_path: Path) -> None:
+    db = Database(
+        tmp_path / "app.db",
+        journal_mode="wal",
+        synchronous="normal",
+        cache_size_kib=2048,
+        mmap_size=1024 * 1024,
+        busy_timeout_ms=1234,
+    )
+
+    conn = db.connect()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+
+
+def test_close_discards_pooled_connections(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    first = db.connect()
+
+    db.close()
+
+    assert db.connect() is not first
+
+
+def test_connections_close_when_their_thread_exits(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    opened: list[sqlite3.Connection] = []
+    threads = [threading.Thread(target=lambda: opened.append(db.connect())) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert db.connect().execute("SELECT 1").fetchone()[0] == 1
+    db.close()
+
+
+def test_init_migrates_fresh_database_to_latest_version(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+
+    db.init()
+
+    conn = db.connect()
+    assert schema_version(conn) == MIGRATIONS[-1].version
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_receipts_vendor" in indexes
+
+
+def test_migrate_upgrades_pre_versioned_database(tmp_path: Path) -> None:
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    conn.executescript(
+        """
+        CREATE TABLE receipts (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, vendor TEXT,
+            total REAL, image_path TEXT, ocr_text TEXT, created_at TEXT);
+        CREATE TABLE budgets (id INTEGER PRIMARY KEY AUTOINCREMENT, category TEXT UNIQUE,
+            monthly_limit REAL DEFAULT 0, spent REAL DEFAULT 0);
+        INSERT INTO budgets (category, monthly_limit, spent) VALUES ('Food', 100, 10);
+        INSERT INTO receipts (date, ocr_text, created_at) VALUES ('01/05/2024', 'oat milk 3.99', '2024-02-01');
+        """
+    )
+
+    migrate(conn)
+
+    row = conn.execute("SELECT category, prior_balance FROM budgets").fetchone()
+    assert row == ("Food", 0)
+    assert conn.execute("SELECT month, date_iso FROM receipts").fetchone() == ("2024-01", "2024-01-05")
+    assert conn.execute("SELECT rowid FROM receipts_fts WHERE receipts_fts MATCH 'milk'").fetchone() == (1,)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+
+
+def test_migrate_skips_applied_steps_and_rolls_back_failures(tmp_path: Path) -> None:
+    conn = sqlite3.connect(tmp_path / "app.db")
+    calls: list[int] = []
+    steps = (
+        Migration(1, "create", statements=("CREATE TABLE things (id INTEGER PRIMARY KEY)",)),
+        Migration(2, "record", apply=lambda _: calls.append(2)),
+    )
+
+    assert migrate(conn, steps) == 2
+    assert migrate(conn, steps) == 2
+    assert calls == [2]
+
+    broken = steps + (
+        Migration(3, "broken", statements=("CREATE TABLE other (id INTEGER)", "NOT VALID SQL")),
+    )
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, broken)
+
+    assert schema_version(conn) == 2
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "other" not in tables
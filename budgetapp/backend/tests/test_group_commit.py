@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from app.core.database import Database
+from app.repositories.group_commit import GroupCommitReceiptRepository
+from app.repositories.receipts import NewReceipt
+
+
+def build_db(tmp_path: Path) -> Database:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    return db
+
+
+def test_concurrent_inserts_share_commits_and_keep_ids(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = GroupCommitReceiptRepository(db, batch_window_ms=50, max_batch_size=100)
+    results: dict[int, int] = {}
+    barrier = threading.Barrier(20)
+
+    def insert(index: int) -> None:
+        barrier.wait()
+        results[index] = repository.insert_receipt(
+            "2024-01-01", f"Store {index}", float(index), "", f"OCR {index}", "2024-01-01T00:00:00"
+        )
+
+    threads = [threading.Thread(target=insert, args=(index,)) for index in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    repository.close()
+
+    assert len(set(results.values())) == 20
+    assert repository.batches_committed < 20
+    for index, receipt_id in results.items():
+        assert repository.get_receipt(receipt_id, ["vendor"])["vendor"] == f"Store {index}"
+
+
+def test_close_flushes_pending_inserts(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = GroupCommitReceiptRepository(db, batch_window_ms=1000, max_batch_size=1000)
+    futures = [
+        repository.submit_receipt(NewReceipt("2024-01-01", "Store", 1.0, "", "", "2024-01-01T00:00:00"))
+        for _ in range(5)
+    ]
+
+    repository.close()
+
+    assert all(future.done() for future in futures)
+    assert len(repository.list_receipts()) == 5
+    assert repository.batches_committed == 1
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository
+from app.services.image_store import ImageStore, detect_image_format
+from scripts.migrate_image_store import migrate_images
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"pixels"
+JPEG_BYTES = b"\xff\xd8\xff\xe0" + b"pixels"
+
+
+def build_config(tmp_path: Path) -> AppConfig:
+    data_dir = tmp_path / "data"
+    return AppConfig(
+        base_dir=tmp_path,
+        data_dir=data_dir,
+        receipts_dir=data_dir / "receipts",
+        db_path=data_dir / "app.db",
+        static_dir=tmp_path / "static",
+    )
+
+
+def test_detect_image_format_sniffs_magic_bytes() -> None:
+    assert detect_image_format(PNG_BYTES) == ".png"
+    assert detect_image_format(JPEG_BYTES) == ".jpg"
+    assert detect_image_format(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ".webp"
+    assert detect_image_format(b"plain text") == ".bin"
+
+
+def test_store_shards_and_deduplicates(tmp_path: Path) -> None:
+    store = ImageStore(tmp_path, max_bytes=1024)
+
+    first = store.save(io.BytesIO(JPEG_BYTES))
+    second = store.save(io.BytesIO(JPEG_BYTES))
+    other = store.save(io.BytesIO(PNG_BYTES))
+
+    assert first == second
+    assert first.path.suffix == ".jpg"
+    assert store.contains(first.path)
+    assert first.path.parent.parent.name == first.content_hash[:2]
+    assert len([path for path in tmp_path.rglob("*") if path.is_file()]) == 2
+    assert other.path != first.path
+
+
+def test_migrate_images_moves_flat_files_and_repoints_rows(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    db = Database(config.db_path)
+    db.init()
+    repository = ReceiptRepository(db)
+    legacy = [config.receipts_dir / f"receipt_2024010{index}.png" for index in range(3)]
+    legacy[0].write_bytes(JPEG_BYTES)
+    legacy[1].write_bytes(JPEG_BYTES)
+    legacy[2].write_bytes(PNG_BYTES)
+    receipt_ids = [
+        repository.insert_receipt("2024-01-01", "Store", 1.0, str(path), "text", "2024-01-01T00:00:00")
+        for path in legacy
+    ]
+
+    summary = migrate_images(config, db)
+
+    assert summary == {"files": 3, "blobs": 2, "receipt_rows": 3, "job_rows": 0, "missing": 0}
+    assert not any(path.exists() for path in legacy)
+    paths = [Path(repository.get_receipt(receipt_id, ["image_path"])["image_path"]) for receipt_id in receipt_ids]
+    assert paths[0] == paths[1] and paths[0].suffix == ".jpg"
+    assert paths[2].read_bytes() == PNG_BYTES
+    assert migrate_images(config, db)["files"] == 0
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.jobs import _UNFINISHED_CLAUSE, JobRepository
+from app.repositories.receipts import ReceiptRepository
+from app.services.jobs import ArchiveTooLargeError, ReceiptJobService
+from app.services.ocr import OcrTimeoutError
+from app.services.receipts import ReceiptService
+
+
+@dataclass
+class ParseResult:
+    vendor: str
+    date: str | None
+    total: float
+    items: list = field(default_factory=list)
+
+
+class StubOcrService:
+    def __init__(self, text: str = "Store\nTOTAL 4.20", fail: bool = False) -> None:
+        self.text = text
+        self.fail = fail
+        self.timeouts = 0
+        self.calls = 0
+
+    def extract_text(self, image_path: Path) -> str:
+        self.calls += 1
+        if self.timeouts:
+            self.timeouts -= 1
+            raise OcrTimeoutError("Tesseract timed out after 1s")
+        if self.fail:
+            raise RuntimeError("tesseract exploded")
+        return self.text
+
+
+class StubParser:
+    def parse(self, text: str) -> ParseResult:
+        return ParseResult(vendor="Store", date="2024-01-01", total=4.2)
+
+
+def build_services(
+    tmp_path: Path,
+    ocr_service: StubOcrService,
+    max_attempts: int = 3,
+    **limits: int,
+) -> tuple[ReceiptJobService, JobRepository, ReceiptService]:
+    config = AppConfig(
+        base_dir=tmp_path,
+        data_dir=tmp_path / "data",
+        receipts_dir=tmp_path / "data" / "receipts",
+        db_path=tmp_path / "data" / "app.db",
+        static_dir=tmp_path / "static",
+    )
+    config.ensure_directories()
+    db = Database(config.db_path)
+    db.init()
+    receipt_service = ReceiptService(
+        repository=ReceiptRepository(db),
+        config=config,
+        ocr_service=ocr_service,
+        parser=StubParser(),
+    )
+    job_repository = JobRepository(db)
+    job_service = ReceiptJobService(job_repository, receipt_service, workers=2, max_attempts=max_attempts, **limits)
+    return job_service, job_repository, receipt_service
+
+
+def finish(job_service: ReceiptJobService, job_repository: JobRepository) -> None:
+    # shutdown() cancels jobs no worker has picked up yet, so let them start.
+    deadline = time.monotonic() + 5
+    while job_repository.list_unfinished_jobs(["queued", "running"]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    job_service.shutdown()
+
+
+def test_submitted_job_runs_to_completion(tmp_path: Path) -> None:
+    job_service, job_repository, _ = build_services(tmp_path, StubOcrService())
+
+    queued = asyncio.run(job_service.submit_receipt(b"image-bytes"))
+    finish(job_service, job_repository)
+
+    job = job_service.get_job(queued["id"])
+    assert queued["status"] == "queued"
+    assert job is not None
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+    assert job["receipt"]["vendor"] == "Store"
+
+
+def test_failed_job_records_error(tmp_path: Path) -> None:
+    job_service, job_repository, _ = build_services(tmp_path, StubOcrService(fail=True))
+
+    queued = asyncio.run(job_service.submit_receipt(b"image-bytes"))
+    finish(job_service, job_repository)
+
+    job = job_service.get_job(queued["id"])
+    assert job is not None
+    assert job["status"] == "failed"
+    assert job["error"] == "tesseract exploded"
+    assert job["receipt"] is None
+
+
+def test_resume_unfinished_jobs_after_crash(tmp_path: Path) -> None:
+    ocr_service = StubOcrService()
+    job_service, job_repository, receipt_service = build_services(tmp_path, ocr_service)
+    # A queued job that never started, and a running job that had already
+    # inserted its receipt before the process died.
+    queued_path = receipt_service.store_receipt_image(b"queued")
+    job_repository.create_job("queued-job", str(queued_path), "2024-01-01T00:00:00")
+    running_path = receipt_service.store_receipt_image(b"running")
+    inserted = receipt_service.process_receipt_image(running_path)
+    job_repository.create_job("running-job", str(running_path), "2024-01-01T00:00:01")
+    job_repository.mark_running("running-job")
+    ocr_service.calls = 0
+
+    resumed = job_service.resume_unfinished()
+    finish(job_service, job_repository)
+
+    assert resumed == 2
+    assert job_service.get_job("queued-job")["status"] == "done"
+    running = job_service.get_job("running-job")
+    assert running["status"] == "done"
+    assert running["receipt_id"] == inserted["id"]
+    assert ocr_service.calls == 1
+    assert job_repository.list_unfinished_jobs() == []
+
+
+def test_submit_batch_fans_out_files_and_zip_entries(tmp_path: Path) -> None:
+    ocr_service = StubOcrService()
+    job_service, job_repository, _ = build_services(tmp_path, ocr_service)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("scans/a.jpg", b"a")
+        zip_file.writestr("scans/b.PNG", b"b")
+        zip_file.writestr("scans/notes.txt", b"not an image")
+        zip_file.writestr("__MACOSX/scans/._a.jpg", b"junk")
+    archive.seek(0)
+
+    results = asyncio.run(
+        job_service.submit_batch(
+            [
+                ("single.png", "image/png", io.BytesIO(b"single")),
+                ("shoebox.zip", "application/zip", archive),
+                ("broken.zip", "application/zip", io.BytesIO(b"nope")),
+                ("notes.txt", "text/plain", io.BytesIO(b"hello")),
+            ]
+        )
+    )
+    finish(job_service, job_repository)
+
+    assert [(result["filename"], result["status"]) for result in results] == [
+        ("single.png", "queued"),
+        ("scans/a.jpg", "queued"),
+        ("scans/b.PNG", "queued"),
+        ("scans/notes.txt", "rejected"),
+        ("broken.zip", "rejected"),
+        ("notes.txt", "rejected"),
+    ]
+    assert ocr_service.calls == 3
+    assert all(job_service.get_job(result["id"])["status"] == "done" for result in results[:3])
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [{"max_archive_entries": 2}, {"max_archive_bytes": 1024}],
+)
+def test_submit_batch_rejects_archives_over_the_limits(tmp_path: Path, limits: dict[str, int]) -> None:
+    ocr_service = StubOcrService()
+    job_service, job_repository, _ = build_services(tmp_path, ocr_service, **limits)
+    first, second = io.BytesIO(), io.BytesIO()
+    with zipfile.ZipFile(first, "w") as zip_file:
+        zip_file.writestr("a.jpg", b"a")
+        zip_file.writestr("__MACOSX/._a.jpg", b"junk")
+    # Highly compressible, so the declared size is what trips the cap.
+    with zipfile.ZipFile(second, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("b.jpg", b"b")
+        zip_file.writestr("c.jpg", b"\0" * 2048)
+    first.seek(0)
+    second.seek(0)
+
+    with pytest.raises(ArchiveTooLargeError):
+        asyncio.run(
+            job_service.submit_batch(
+                [
+                    ("one.zip", "application/zip", first),
+                    ("two.zip", "application/zip", second),
+                ]
+            )
+        )
+    job_service.shutdown()
+
+    assert ocr_service.calls == 0
+    assert job_repository.list_unfinished_jobs() == []
+
+
+def test_submit_batch_rejects_corrupt_archive_members(tmp_path: Path) -> None:
+    ocr_service = StubOcrService()
+    job_service, job_repository, _ = build_services(tmp_path, ocr_service)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("good.jpg", b"good")
+        zip_file.writestr("crc.jpg", b"checksum")
+        zip_file.writestr("deflate.jpg", bytes(range(256)) * 64, zipfile.ZIP_DEFLATED)
+    data = bytearray(buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as zip_file:
+        crc, deflated = zip_file.getinfo("crc.jpg"), zip_file.getinfo("deflate.jpg")
+    # Member data starts after the 30-byte local header, name and extra field.
+    data[crc.header_offset + 30 + len(crc.filename)] ^= 0xFF
+    start = deflated.header_offset + 30 + len(deflated.filename)
+    data[start : start + 16] = b"\xff" * 16
+
+    results = asyncio.run(job_service.submit_batch([("scans.zip", "application/zip", io.BytesIO(bytes(data)))]))
+    finish(job_service, job_repository)
+
+    assert [(result["filename"], result["status"]) for result in results] == [
+        ("good.jpg", "queued"),
+        ("crc.jpg", "rejected"),
+        ("deflate.jpg", "rejected"),
+    ]
+    assert all(result["error"].startswith("Cannot extract") for result in results[1:])
+    assert job_service.get_job(results[0]["id"])["status"] == "done"
+
+
+def test_timed_out_job_is_parked_for_retry_until_attempts_run_out(tmp_path: Path) -> None:
+    ocr_service = StubOcrService()
+    ocr_service.timeouts = 1
+    job_service, job_repository, receipt_service = build_services(tmp_path, ocr_service, max_attempts=2)
+
+    queued = job_service.enqueue_image(receipt_service.store_receipt_image(b"slow"))
+    finish(job_service, job_repository)
+    parked = job_service.get_job(queued["id"])
+
+    assert parked["status"] == "needs_retry"
+    assert parked["error"] == "Tesseract timed out after 1s"
+    assert [job["id"] for job in job_repository.list_unfinished_jobs()] == [queued["id"]]
+
+    job_service, job_repository, _ = build_services(tmp_path, ocr_service, max_attempts=2)
+    assert job_service.retry_jobs() == 1
+    finish(job_service, job_repository)
+
+    retried = job_service.get_job(queued["id"])
+    assert retried["status"] == "done"
+    assert retried["attempts"] == 2
+
+
+def test_unfinished_job_listing_uses_the_partial_index(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    repository = JobRepository(db)
+    for job_id in ("queued", "retry", "done"):
+        repository.create_job(job_id, f"{job_id}.png", f"2024-01-01T00:00:0{len(job_id)}")
+    repository.mark_needs_retry("retry", "timed out")
+    repository.mark_done("done", 1)
+
+    assert [job["id"] for job in repository.list_unfinished_jobs()] == ["retry", "queued"]
+    assert [job["id"] for job in repository.list_unfinished_jobs(["needs_retry"])] == ["retry"]
+    with pytest.raises(ValueError):
+        repository.list_unfinished_jobs(["done"])
+    with db.connect() as conn:
+        for narrow, params in (("", ()), ("AND status IN (?)", ("needs_retry",))):
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM receipt_jobs WHERE {_UNFINISHED_CLAUSE} {narrow} ORDER BY created_at",
+                params,
+            ).fetchall()
+            assert "idx_receipt_jobs_unfinished" in " ".join(row[-1] for row in plan)
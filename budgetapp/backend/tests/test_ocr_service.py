@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+import pytesseract
+from PIL import Image, ImageDraw, UnidentifiedImageError
+
+from app.services import ocr
+from app.services.ocr import (
+    CircuitBreaker,
+    CircuitBreakingOcrService,
+    ImagePreprocessor,
+    OcrInputError,
+    OcrResult,
+    OcrService,
+    OcrTimeoutError,
+    OcrUnavailableError,
+    ProcessPoolOcrService,
+    TieredOcr,
+    tesseract_image_to_string,
+)
+
+
+def echo_worker_pid(image_path: str) -> str:
+    return f"{Path(image_path).name}:{os.getpid()}"
+
+
+def slow_ocr(image_path: str) -> str:
+    time.sleep(1)
+    return "late"
+
+
+def test_process_pool_runs_ocr_in_warm_workers(tmp_path: Path) -> None:
+    service = ProcessPoolOcrService(workers=2, ocr_callable=echo_worker_pid)
+    try:
+        worker_pids = service.warm_up()
+        results = [service.extract_text(tmp_path / f"receipt_{index}.png") for index in range(4)]
+    finally:
+        service.shutdown()
+
+    assert len(worker_pids) == 2
+    assert os.getpid() not in worker_pids
+    names = [result.split(":")[0] for result in results]
+    pids = {int(result.split(":")[1]) for result in results}
+    assert names == [f"receipt_{index}.png" for index in range(4)]
+    assert pids <= worker_pids
+
+
+def test_process_pool_enforces_task_timeout(tmp_path: Path) -> None:
+    service = ProcessPoolOcrService(workers=1, task_timeout_s=0.2, ocr_callable=slow_ocr)
+    service.warm_up()
+    try:
+        with pytest.raises(TimeoutError):
+            service.extract_text(tmp_path / "huge.png")
+    finally:
+        service.shutdown()
+
+
+def test_preprocessor_rotates_shrinks_and_binarizes_photos(tmp_path: Path) -> None:
+    # A landscape photo whose EXIF says "rotate 90°": the receipt is portrait.
+    photo = Image.new("RGB", (4000, 3000), (90, 90, 90))
+    draw = ImageDraw.Draw(photo)
+    draw.rectangle((500, 700, 3500, 2300), fill=(235, 235, 235))
+    draw.rectangle((1000, 1200, 3000, 1300), fill=(20, 20, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    image_path = tmp_path / "photo.jpg"
+    photo.save(image_path, exif=exif)
+
+    preprocessor = ImagePreprocessor(target_dpi=100, paper_width_in=4)
+    image, timings = preprocessor.run(str(image_path))
+
+    assert list(timings) == ["decode", "rotate", "grayscale", "downscale", "threshold", "crop"]
+    assert image.mode == "L"
+    assert set(image.getdata()) <= {0, 255}
+    assert image.width <= preprocessor.target_width_px
+    assert image.height > image.width
+
+
+def tesseract_data(lines: list[list[tuple[str, float]]]) -> dict[str, list]:
+    data: dict[str, list] = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": []}
+    for line_num, words in enumerate(lines, start=1):
+        for word, conf in words:
+            data["text"].append(word)
+            data["conf"].append(conf)
+            data["block_num"].append(1)
+            data["par_num"].append(1)
+            data["line_num"].append(line_num)
+    return data
+
+
+def test_tiered_ocr_runs_full_pass_only_for_low_confidence_fields(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    image_path = tmp_path / "receipt.png"
+    Image.new("L", (400, 600), 255).save(image_path)
+    passes: list[str] = []
+    total_confidence = {"--psm 6": 95.0, "": 91.0}
+
+    def image_to_data(
+        image: Image.Image,
+        config: str = "",
+        output_type: str = "",
+        timeout: float = 0,
+    ) -> dict[str, list]:
+        passes.append(config)
+        return tesseract_data(
+            [
+                [("Corner", 96.0), ("Grocery", 92.0)],
+                [("2024-03-14", 88.0)],
+                [("TOTAL", 90.0), ("11.52", total_confidence[config])],
+            ]
+        )
+
+    monkeypatch.setattr(ocr.pytesseract, "image_to_data", image_to_data)
+    engine = TieredOcr(min_confidence=80)
+
+    confident = engine(str(image_path))
+    total_confidence["--psm 6"] = 41.0
+    retried = engine(str(image_path))
+
+    assert passes == ["--psm 6", "--psm 6", ""]
+    assert confident.text == "Corner Grocery\n2024-03-14\nTOTAL 11.52"
+    assert confident.confidence.tier == "fast"
+    assert (confident.confidence.vendor, confident.confidence.date, confident.confidence.total) == (94.0, 88.0, 95.0)
+    assert retried.confidence.tier == "full"
+    assert retried.confidence.total == 91.0
+
+
+def test_tesseract_timeout_is_reported_as_ocr_timeout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    image_path = tmp_path / "receipt.png"
+    Image.new("L", (10, 10), 255).save(image_path)
+    timeouts: list[float] = []
+
+    def image_to_string(image: Image.Image, timeout: float = 0) -> str:
+        timeouts.append(timeout)
+        raise RuntimeError("Tesseract process timeout")
+
+    monkeypatch.setattr(ocr.pytesseract, "image_to_string", image_to_string)
+
+    with pytest.raises(OcrTimeoutError):
+        tesseract_image_to_string(str(image_path), timeout_s=2.5)
+    assert timeouts == [2.5]
+
+
+class ScriptedEngine:
+    def __init__(self) -> None:
+        self.outcomes: list[Exception | None] = []
+        self.calls = 0
+
+    def extract(self, image_path: Path) -> OcrResult:
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+        return OcrResult("ok")
+
+
+def test_circuit_breaker_opens_after_repeated_timeouts_and_recovers() -> None:
+    now = [0.0]
+    engine = ScriptedEngine()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30, clock=lambda: now[0])
+    service = CircuitBreakingOcrService(engine, breaker)
+    image_path = Path("receipt.png")
+
+    # An undecodable image counts neither way.
+    engine.outcomes = [OcrTimeoutError("slow"), UnidentifiedImageError("corrupt"), OcrTimeoutError("slow")]
+    for _ in range(3):
+        with pytest.raises((OcrTimeoutError, UnidentifiedImageError)):
+            service.extract(image_path)
+    assert service.breaker.state == "open"
+
+    with pytest.raises(OcrUnavailableError):
+        service.extract(image_path)
+    assert engine.calls == 3
+
+    now[0] = 31.0
+    assert service.breaker.state == "half_open"
+    engine.outcomes = [OcrTimeoutError("still slow")]
+    with pytest.raises(OcrTimeoutError):
+        service.extract(image_path)
+    assert service.breaker.state == "open"
+
+    now[0] = 62.0
+    engine.outcomes = [None]
+    assert service.extract_text(image_path) == "ok"
+    assert service.breaker.state == "closed"
+
+
+def test_circuit_breaker_counts_engine_errors_but_not_bad_images() -> None:
+    now = [0.0]
+    engine = ScriptedEngine()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30, clock=lambda: now[0])
+    service = CircuitBreakingOcrService(engine, breaker)
+    image_path = Path("receipt.png")
+
+    engine.outcomes = [BrokenProcessPool("worker died"), pytesseract.TesseractNotFoundError()]
+    for _ in range(2):
+        with pytest.raises((BrokenProcessPool, pytesseract.TesseractNotFoundError)):
+            service.extract(image_path)
+    assert service.breaker.state == "open"
+
+    # A bad image during the half-open trial frees the slot for the next call.
+    now[0] = 31.0
+    engine.outcomes = [UnidentifiedImageError("corrupt")]
+    with pytest.raises(UnidentifiedImageError):
+        service.extract(image_path)
+    assert service.breaker.state == "half_open"
+    engine.outcomes = [None]
+    assert service.extract_text(image_path) == "ok"
+    assert service.breaker.state == "closed"
+
+
+def test_corrupt_images_never_trip_the_breaker(tmp_path: Path) -> None:
+    image = Image.new("RGB", (400, 600), "white")
+    ImageDraw.Draw(image).text((20, 20), "COFFEE HUT", fill="black")
+    whole = tmp_path / "whole.jpg"
+    image.save(whole, "JPEG")
+    truncated = tmp_path / "truncated.jpg"
+    truncated.write_bytes(whole.read_bytes()[:400])
+    garbage = tmp_path / "garbage.png"
+    garbage.write_bytes(b"\x89PNG\r\n\x1a\nnot really")
+    missing = tmp_path / "missing.jpg"
+
+    engines = [
+        OcrService(),
+        OcrService(lambda path: tesseract_image_to_string(path, ImagePreprocessor())),
+        OcrService(TieredOcr()),
+    ]
+    for engine in engines:
+        service = CircuitBreakingOcrService(engine, CircuitBreaker(failure_threshold=2, reset_timeout_s=30))
+        for path in (truncated, garbage, missing, truncated):
+            with pytest.raises(OcrInputError):
+                service.extract(path)
+        assert service.breaker.state == "closed"
+
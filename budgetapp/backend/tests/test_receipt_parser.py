@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from app.services.ocr import ReceiptParser, parse_receipt_text
+from app.services.ocr import LineItem, ReceiptParser, parse_receipt_text
 
 
 def test_receipt_parser_extracts_vendor_date_total() -> None:
@@ -30,3 +30,46 @@ def test_parse_receipt_text_returns_dict() -> None:
     parsed = parse_receipt_text(text)
 
     assert parsed == {"vendor": "Market", "date": "01/02/2024", "total": 9.99}
+
+
+def test_receipt_parser_prefers_labelled_total_over_largest_amount() -> None:
+    text = "Corner Grocery\nMILK 3.49\nSUBTOTAL 13.17\nTax 8.25% 0.85\nTOTAL: 14.02\nCASH 20.00\nCHANGE 5.98\n"
+
+    result = ReceiptParser().parse(text)
+
+    assert result.total == 14.02
+    assert result.subtotal == 13.17
+    assert result.tax == 0.85
+
+
+def test_receipt_parser_finds_leftmost_date_of_either_format() -> None:
+    parser = ReceiptParser()
+
+    assert parser.parse("Shop\nPhone 555-1234\n3/14/24 10:22\nRef 2024-01-01\n").date == "3/14/24"
+    assert parser.parse("Shop\n12024-03-14\n").date == "2024-03-14"
+
+
+def test_receipt_parser_reads_items_and_skips_labels() -> None:
+    text = "Corner Grocery 1.00\nMILK 2% 1GAL 3.49\n  123456789012 F\n2 @ 1.25 BANANAS 2.50\nTOTAL 5.99\nVISA 5.99\n"
+
+    result = ReceiptParser().parse(text)
+
+    # Items are only read once asked for.
+    assert "items" not in vars(result)
+    assert result.items == [LineItem("MILK 2% 1GAL", 3.49), LineItem("BANANAS", 2.50, 2)]
+    assert result.total == 5.99
+
+
+def test_receipt_parser_total_label_must_precede_the_amount() -> None:
+    text = "Shop\nMILK 3.49\nTOTAL SAVINGS 5.00\nTOTAL ITEMS 3 9.87\nTOTAL: $3.49\n"
+
+    result = ReceiptParser().parse(text)
+
+    assert result.total == 3.49
+    assert result.items == [LineItem("MILK", 3.49)]
+
+
+def test_receipt_parser_without_a_bare_total_falls_back_to_largest_amount() -> None:
+    result = ReceiptParser().parse("Shop\nTOTAL ITEMS 3\nMILK 3.49\nTOTAL SAVINGS 5.00\n")
+
+    assert result.total == 5.00
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import tracemalloc
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from app.core.config import AppConfig
+from app.core.database import Database
+from app.repositories.ocr_cache import OcrCacheRepository
+from app.repositories.receipts import ReceiptRepository
 from app.services.receipts import ReceiptService
+from app.services.vendors import VendorMatch
 
 
 @dataclass
@@ -12,6 +18,7 @@ class ParseResult:
     vendor: str
     date: str | None
     total: float
+    items: list = field(default_factory=list)
 
 
 class RecordingOcrService:
@@ -34,9 +41,25 @@ class RecordingParser:
         return self.result
 
 
+class StubVendorNormalizer:
+    def canonicalize(self, vendor: str) -> VendorMatch:
+        return VendorMatch("Walmart", "Groceries", "exact", 1.0)
+
+
+class StubCategorizer:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+
+    def categorize(self, vendor: str, text: str) -> str | None:
+        self.calls.append((vendor, text))
+        return "Coffee" if "LATTE" in text else None
+
+
 class RecordingReceiptRepository:
     def __init__(self) -> None:
         self.insert_args: tuple | None = None
+        self.category: str | None = None
+        self.items: list = []
 
     def insert_receipt(
         self,
@@ -46,8 +69,13 @@ class RecordingReceiptRepository:
         image_path: str,
         ocr_text: str,
         created_at: str,
+        category: str | None = None,
+        ocr_confidence: object | None = None,
+        items: tuple = (),
     ) -> int:
         self.insert_args = (date, vendor, total, image_path, ocr_text, created_at)
+        self.category = category
+        self.items = list(items)
         return 1
 
     def list_receipts(self) -> list[dict]:
@@ -88,13 +116,16 @@ def test_create_receipt_stores_bytes_and_calls_ocr(tmp_path: Path) -> None:
         parser=parser,
     )
 
-    contents = b"fake-image-bytes"
+    contents = b"\x89PNG\r\n\x1a\nfake-image-bytes"
+    service.create_receipt(contents)
     service.create_receipt(contents)
 
-    files = list(config.receipts_dir.glob("*.png"))
+    files = [path for path in config.receipts_dir.rglob("*") if path.is_file()]
     assert len(files) == 1
     assert files[0].read_bytes() == contents
     assert ocr_service.last_path == files[0]
+    digest = hashlib.sha256(contents).hexdigest()
+    assert files[0].relative_to(config.receipts_dir).parts == (digest[:2], digest[2:4], f"{digest}.png")
 
 
 def test_create_receipt_maps_parser_output_to_repository(tmp_path: Path) -> None:
@@ -111,7 +142,7 @@ def test_create_receipt_maps_parser_output_to_repository(tmp_path: Path) -> None
         parser=parser,
     )
 
-    service.create_receipt(b"bytes")
+    service.create_receipt(b"\xff\xd8\xff\xe0jpeg-bytes")
 
     assert repository.insert_args is not None
     date, vendor, total, image_path, ocr_text, created_at = repository.insert_args
@@ -119,10 +150,96 @@ def test_create_receipt_maps_parser_output_to_repository(tmp_path: Path) -> None
     assert vendor == "Coffee"
     assert total == 9.99
     assert ocr_text == "parsed text"
-    assert image_path.endswith(".png")
+    assert image_path.endswith(".jpg")
     assert created_at
 
 
+def test_create_receipt_stores_canonical_vendor(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    repository = RecordingReceiptRepository()
+
+    service = ReceiptService(
+        repository=repository,
+        config=config,
+        ocr_service=RecordingOcrService(text="parsed text"),
+        parser=RecordingParser(result=ParseResult(vendor="WAL-MART #123", date=None, total=5.0)),
+        vendors=StubVendorNormalizer(),
+    )
+
+    summary = service.create_receipt(b"\xff\xd8\xff\xe0jpeg-bytes")
+
+    assert repository.insert_args is not None
+    assert repository.insert_args[1] == "Walmart"
+    assert repository.category == "Groceries"
+    assert (summary["vendor"], summary["category"]) == ("Walmart", "Groceries")
+
+
+def test_create_receipt_falls_back_to_category_rules(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    repository = RecordingReceiptRepository()
+    categorizer = StubCategorizer()
+
+    service = ReceiptService(
+        repository=repository,
+        config=config,
+        ocr_service=RecordingOcrService(text="Coffee Hut\nLATTE 4.50"),
+        parser=RecordingParser(result=ParseResult(vendor="Coffee Hut", date=None, total=4.5)),
+        categorizer=categorizer,
+    )
+
+    summary = service.create_receipt(b"\xff\xd8\xff\xe0jpeg-bytes")
+
+    assert categorizer.calls == [("Coffee Hut", "Coffee Hut\nLATTE 4.50")]
+    assert repository.category == "Coffee"
+    assert summary["category"] == "Coffee"
+
+
+def test_create_receipt_stores_parsed_line_items(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    repository = RecordingReceiptRepository()
+
+    service = ReceiptService(
+        repository=repository,
+        config=config,
+        ocr_service=RecordingOcrService(text="Coffee Hut\nLATTE 4.50"),
+        parser=RecordingParser(result=ParseResult(vendor="Coffee Hut", date=None, total=4.5, items=[("LATTE", 4.5, 1)])),
+    )
+    service.create_receipt(b"\xff\xd8\xff\xe0jpeg-bytes")
+
+    assert repository.items == [("LATTE", 4.5, 1)]
+
+
+def test_create_receipt_reuses_cached_ocr_for_identical_uploads(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    db = Database(config.db_path)
+    db.init()
+    cache = OcrCacheRepository(db)
+    repository = RecordingReceiptRepository()
+    ocr_service = RecordingOcrService(text="TOTAL 4.20")
+    service = ReceiptService(
+        repository=repository,
+        config=config,
+        ocr_service=ocr_service,
+        parser=RecordingParser(result=ParseResult(vendor="Deli", date="2024-03-03", total=4.2)),
+        ocr_cache=cache,
+    )
+
+    service.create_receipt(b"same-bytes")
+    ocr_service.last_path = None
+    result = service.create_receipt(b"same-bytes")
+
+    assert ocr_service.last_path is None
+    assert result["vendor"] == "Deli"
+    assert result["total"] == 4.2
+    assert repository.insert_args[4] == "TOTAL 4.20"
+    stats = service.ocr_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
 def test_create_receipt_handles_empty_parser_output(tmp_path: Path) -> None:
     config = build_config(tmp_path)
     config.ensure_directories()
@@ -145,3 +262,41 @@ def test_create_receipt_handles_empty_parser_output(tmp_path: Path) -> None:
     assert vendor == ""
     assert total == 0.0
     assert ocr_text == ""
+
+
+def test_export_csv_streams_with_bounded_memory(tmp_path: Path) -> None:
+    config = build_config(tmp_path)
+    config.ensure_directories()
+    db = Database(config.db_path)
+    db.init()
+    row_count = 50_000
+    with db.connect() as conn:
+        conn.executemany(
+            "INSERT INTO receipts (date, vendor, total, created_at) VALUES (?, ?, ?, ?)",
+            (
+                ("2024-01-01", f"Vendor {index}", index / 100, "2024-01-02T00:00:00")
+                for index in range(row_count)
+            ),
+        )
+
+    service = ReceiptService(
+        repository=ReceiptRepository(db),
+        config=config,
+        ocr_service=RecordingOcrService(text=""),
+        parser=RecordingParser(result=ParseResult(vendor="", date=None, total=0.0)),
+    )
+
+    tracemalloc.start()
+    try:
+        total_bytes = 0
+        lines = 0
+        for chunk in service.export_csv():
+            total_bytes += len(chunk)
+            lines += chunk.count("\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert lines == row_count + 1
+    assert total_bytes > 2_000_000
+    assert peak < 1_000_000
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository, ReparsedReceipt
+from app.repositories.vendors import VendorAliasRepository
+from app.services.vendors import VendorService
+from scripts.reparse_receipts import CHECKPOINT, reparse_receipts
+
+
+OCR_TEXT = "Corner Grocery\n2024-03-14\nMILK 3.49\nTOTAL 3.49\nCASH 20.00\n"
+
+
+def seed(tmp_path: Path, count: int) -> tuple[Database, ReceiptRepository, list[int]]:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    repository = ReceiptRepository(db)
+    # Fields as the old max-amount parser stored them.
+    receipt_ids = [
+        repository.insert_receipt("2024-03-14", "Corner Grocery", 20.0, f"r{index}.png", OCR_TEXT, "2024-03-14T10:00:00")
+        for index in range(count)
+    ]
+    return db, repository, receipt_ids
+
+
+def test_reparse_updates_changed_rows_and_rollups(tmp_path: Path) -> None:
+    db, repository, receipt_ids = seed(tmp_path, 5)
+    repository.update_receipt_category(receipt_ids[0], "Food")
+
+    summary = reparse_receipts(db, chunk_size=2, workers=1)
+
+    assert summary == {"resumed_from": 0, "scanned": 5, "updated": 5}
+    assert repository.get_receipt(receipt_ids[0])["total"] == 3.49
+    with db.connect() as conn:
+        assert conn.execute("SELECT total FROM spend_rollups WHERE category = 'Food'").fetchone()[0] == pytest.approx(3.49)
+    # Line items are backfilled too, and replaced rather than duplicated.
+    assert reparse_receipts(db, chunk_size=2, workers=0)["updated"] == 0
+    assert repository.item_spend("milk")["count"] == 5
+    assert repository.get_checkpoint(CHECKPOINT) == 0
+
+
+def test_reparse_resumes_after_checkpoint(tmp_path: Path) -> None:
+    db, repository, receipt_ids = seed(tmp_path, 4)
+    # An interrupted run that finished the first two receipts.
+    repository.update_parsed_fields([], (CHECKPOINT, receipt_ids[1]))
+
+    summary = reparse_receipts(db, chunk_size=10, workers=0)
+
+    assert summary == {"resumed_from": receipt_ids[1], "scanned": 2, "updated": 2}
+    totals = [repository.get_receipt(receipt_id)["total"] for receipt_id in receipt_ids]
+    assert totals == [20.0, 20.0, 3.49, 3.49]
+    assert reparse_receipts(db, workers=0, restart=True)["updated"] == 2
+
+
+def test_reparse_keeps_canonical_vendor_and_fills_missing_category(tmp_path: Path) -> None:
+    db, repository, receipt_ids = seed(tmp_path, 2)
+    VendorService(VendorAliasRepository(db)).add_alias("Corner Grocery", "Corner Market", "Groceries")
+    # As stored by an upload that already canonicalized the vendor.
+    repository.update_parsed_fields(
+        [ReparsedReceipt(receipt_id, "Corner Market", "2024-03-14", 20.0, None) for receipt_id in receipt_ids]
+    )
+    repository.update_receipt_category(receipt_ids[0], "Food")
+
+    reparse_receipts(db, workers=0)
+
+    first, second = (repository.get_receipt(receipt_id) for receipt_id in receipt_ids)
+    assert (first["vendor"], first["category"], first["total"]) == ("Corner Market", "Food", 3.49)
+    assert (second["vendor"], second["category"]) == ("Corner Market", "Groceries")
+
+
+def test_reparse_rewrites_only_line_items_that_changed(tmp_path: Path) -> None:
+    db, repository, receipt_ids = seed(tmp_path, 3)
+    reparse_receipts(db, workers=0)
+    with db.connect() as conn:
+        before = dict(conn.execute("SELECT receipt_id, id FROM receipt_items").fetchall())
+
+    repository.update_parsed_fields(
+        [
+            ReparsedReceipt(receipt_ids[0], "Corner Grocery", "2024-03-14", 3.49, None, [("MILK", 3.49, 1)]),
+            ReparsedReceipt(receipt_ids[1], "Corner Grocery", "2024-03-14", 3.49, None, [("MILK", 3.49, 2)]),
+            ReparsedReceipt(receipt_ids[2], "Corner Grocery", "2024-03-15", 3.49, None, [("MILK", 3.49, 1)]),
+        ]
+    )
+
+    with db.connect() as conn:
+        after = conn.execute("SELECT receipt_id, id, quantity, receipt_date FROM receipt_items ORDER BY receipt_id").fetchall()
+    assert [tuple(row) for row in after] == [
+        (receipt_ids[0], before[receipt_ids[0]], 1, "2024-03-14"),
+        (receipt_ids[1], after[1]["id"], 2, "2024-03-14"),
+        (receipt_ids[2], after[2]["id"], 1, "2024-03-15"),
+    ]
+    assert after[1]["id"] != before[receipt_ids[1]] and after[2]["id"] != before[receipt_ids[2]]
@@ -4,7 +4,9 @@ from pathlib import Path
 
 from app.core.database import Database
 from app.repositories.budgets import BudgetRepository
+from app.repositories.ocr_cache import OcrCacheRepository
 from app.repositories.receipts import ReceiptRepository
+from app.services.ocr import FieldConfidence
 
 
 def build_db(tmp_path: Path) -> Database:
@@ -43,12 +45,67 @@ def test_receipt_repository_crud(tmp_path: Path) -> None:
     fetched = repository.get_receipt(first_id)
     assert fetched is not None
     assert fetched["vendor"] == "Store A"
-    assert fetched["ocr_text"] == "OCR A"
+    assert "ocr_text" not in fetched
 
-    export_rows = repository.export_rows()
+    projected = repository.get_receipt(first_id, ["ocr_text", "image_path"])
+    assert projected == {"id": first_id, "ocr_text": "OCR A", "image_path": "/tmp/receipt_a.png"}
+
+    export_rows = list(repository.export_rows())
     assert export_rows[0]["vendor"] == "Store B"
 
 
+def test_receipt_repository_keyset_pagination_and_filters(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = ReceiptRepository(db)
+    ids = [
+        repository.insert_receipt(
+            f"2024-01-{day:02d}",
+            "Store A" if day % 2 else "Store B",
+            float(day * 10),
+            f"/tmp/receipt_{day}.png",
+            "OCR",
+            "2024-02-01T00:00:00",
+        )
+        for day in range(1, 7)
+    ]
+
+    first_page = repository.list_receipts(limit=4)
+    second_page = repository.list_receipts(limit=4, after_id=first_page[-1]["id"])
+
+    assert [row["id"] for row in first_page] == ids[::-1][:4]
+    assert [row["id"] for row in second_page] == ids[::-1][4:]
+
+    filtered = repository.list_receipts(
+        vendor="store a",
+        date_from="2024-01-02",
+        date_to="2024-01-05",
+        min_total=20,
+        max_total=50,
+    )
+
+    assert [row["date"] for row in filtered] == ["2024-01-05", "2024-01-03"]
+
+
+def test_list_receipts_filters_dates_stored_in_other_formats(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = ReceiptRepository(db)
+    for receipt_date in ("01/02/2024", "12/30/2023", "2024-01-15", None):
+        repository.insert_receipt(receipt_date, "Store", 1.0, "/tmp/r.png", "OCR", "2024-02-01T00:00:00")
+
+    filtered = repository.list_receipts(date_from="2024-01-01", date_to="1/31/2024")
+
+    assert [row["date"] for row in filtered] == ["2024-01-15", "01/02/2024"]
+    with db.connect() as conn:
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM receipts "
+                "WHERE date_iso >= '2024-01-01' AND date_iso <= '2024-01-31' ORDER BY id DESC LIMIT 50"
+            )
+        )
+    assert "idx_receipts_date_iso" in plan
+
+
 def test_budget_repository_upsert_and_list(tmp_path: Path) -> None:
     db = build_db(tmp_path)
     repository = BudgetRepository(db)
@@ -63,3 +120,187 @@ def test_budget_repository_upsert_and_list(tmp_path: Path) -> None:
     assert rows[0]["monthly_limit"] == 250.0
     assert rows[0]["spent"] == 90.0
     assert rows[0]["prior_balance"] == 15.0
+
+
+def test_budget_repository_bulk_upsert(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = BudgetRepository(db)
+    repository.upsert_budget("Food", 100.0, 10.0, 0.0)
+
+    imported = repository.bulk_upsert_budgets(
+        [("Food", 200.0, 20.0, 5.0), ("Travel", 500.0, 0.0, 0.0)]
+    )
+
+    rows = repository.list_budgets()
+    assert imported == 2
+    assert [(row["category"], row["monthly_limit"], row["spent"]) for row in rows] == [
+        ("Food", 200.0, 20.0),
+        ("Travel", 500.0, 0.0),
+    ]
+
+
+def test_spend_rollups_follow_receipt_writes(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    receipts = ReceiptRepository(db)
+    budgets = BudgetRepository(db)
+    budgets.upsert_budget("Food", 300.0, 10.0, 5.0)
+    budgets.upsert_budget("Travel", 500.0, 0.0, 0.0)
+
+    receipts.insert_receipt("2024-03-02", "Market", 20.0, "", "", "2024-03-02T00:00:00", "Food")
+    receipts.insert_receipt("03/15/2024", "Cafe", 5.5, "", "", "2024-03-16T00:00:00", "Food")
+    receipts.insert_receipt("2024-04-01", "Market", 99.0, "", "", "2024-04-01T00:00:00", "Food")
+    moved_id = receipts.insert_receipt(None, "Airline", 40.0, "", "", "2024-03-20T00:00:00")
+
+    assert receipts.update_receipt_category(moved_id, "Travel")
+    assert not receipts.update_receipt_category(9999, "Travel")
+
+    march = {row["category"]: row for row in budgets.list_budgets("2024-03")}
+    assert march["Food"]["receipt_spent"] == 25.5
+    assert march["Food"]["spent"] == 10.0
+    assert march["Food"]["total_spent"] == 35.5
+    assert march["Food"]["remaining"] == 269.5
+    assert march["Travel"]["receipt_spent"] == 40.0
+
+    # Posting a listed budget back must not fold the rollup into `spent`.
+    food = march["Food"]
+    budgets.upsert_budget("Food", food["monthly_limit"], food["spent"], food["prior_balance"])
+    again = {row["category"]: row for row in budgets.list_budgets("2024-03")}["Food"]
+    assert (again["spent"], again["total_spent"], again["remaining"]) == (10.0, 35.5, 269.5)
+
+    with db.connect() as conn:
+        before = conn.execute("SELECT * FROM spend_rollups ORDER BY category, month").fetchall()
+        conn.execute("DELETE FROM spend_rollups")
+
+    receipts.rebuild_spend_rollups()
+
+    with db.connect() as conn:
+        after = conn.execute("SELECT * FROM spend_rollups ORDER BY category, month").fetchall()
+    assert [tuple(row) for row in after] == [tuple(row) for row in before]
+
+
+def test_receipt_repository_full_text_search(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = ReceiptRepository(db)
+    repository.insert_receipt("2023-12-30", "Old Dairy", 3.99, "", "whole milk 3.99", "2023-12-30T00:00:00")
+    milk_id = repository.insert_receipt(
+        "2024-01-01", "Grocer", 9.5, "", "MILK 2.49\nMILK 2.49\nBread 4.52", "2024-01-01T00:00:00"
+    )
+    repository.insert_receipt("2024-01-02", "Hardware", 20.0, "", "Nails 3.00\nHammer 17.00", "2024-01-02T00:00:00")
+
+    results = repository.search_receipts("milk")
+
+    assert [row["vendor"] for row in results] == ["Grocer", "Old Dairy"]
+    assert results[0]["id"] == milk_id
+    assert "<mark>MILK</mark>" in results[0]["snippet"]
+    assert [row["vendor"] for row in repository.search_receipts("ham")] == ["Hardware"]
+    assert repository.search_receipts('milk" OR') == repository.search_receipts("milk or")
+    assert repository.search_receipts("***") == []
+    assert len(repository.search_receipts("milk", limit=1, offset=1)) == 1
+    script_id = repository.insert_receipt(
+        "2024-01-03", "Upload", 1.0, "", "<script>alert(1)</script> & <b>eggs</b>", "2024-01-03T00:00:00"
+    )
+    # Uploaded OCR text is escaped; only the match markers are HTML.
+    [eggs] = repository.search_receipts("eggs")
+    assert eggs["id"] == script_id
+    assert eggs["snippet"] == "&lt;script&gt;alert(1)&lt;/script&gt; &amp; &lt;b&gt;<mark>eggs</mark>&lt;/b&gt;"
+
+    with db.connect() as conn:
+        conn.execute("DELETE FROM receipts WHERE id = ?", (milk_id,))
+
+    assert [row["vendor"] for row in repository.search_receipts("milk")] == ["Old Dairy"]
+
+
+def test_ocr_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = OcrCacheRepository(build_db(tmp_path), max_entries=2, max_bytes=1000, touch_batch=10)
+    cache.put("a", "alpha")
+    cache.put("b", "bravo")
+    assert cache.get("a") is not None  # "b" is now the oldest entry
+    cache.put("c", "charlie")
+
+    assert cache.get("b") is None
+    assert cache.get("c").ocr_text == "charlie"
+    cache.put("big", "x" * 995)
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["size_bytes"] == 995
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_ocr_cache_keeps_running_totals_and_batches_hit_updates(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    cache = OcrCacheRepository(db, touch_batch=2)
+
+    cache.put("a", "alpha")
+    cache.put("b", "bravo")
+    cache.put("a", "alpha-2")
+    with db.connect() as conn:
+        assert tuple(conn.execute("SELECT entries, size_bytes FROM ocr_cache_totals").fetchone()) == (2, 12)
+        first_used = conn.execute("SELECT last_used_at FROM ocr_cache WHERE content_hash = 'b'").fetchone()[0]
+
+        cache.get("b")
+        assert conn.execute("SELECT last_used_at FROM ocr_cache WHERE content_hash = 'b'").fetchone()[0] == first_used
+        cache.get("a")
+        assert conn.execute("SELECT last_used_at FROM ocr_cache WHERE content_hash = 'b'").fetchone()[0] > first_used
+
+
+def test_receipt_repository_stores_ocr_confidence(tmp_path: Path) -> None:
+    repository = ReceiptRepository(build_db(tmp_path))
+    receipt_id = repository.insert_receipt(
+        "2024-01-01",
+        "Store",
+        5.0,
+        "/tmp/a.png",
+        "Store TOTAL 5.00",
+        "2024-01-02",
+        ocr_confidence=FieldConfidence("fast", 93.5, 0.0, 88.0),
+    )
+    plain_id = repository.insert_receipt("2024-01-01", "Store", 5.0, "/tmp/b.png", "text", "2024-01-02")
+
+    fields = ["ocr_tier", "vendor_confidence", "date_confidence", "total_confidence"]
+    assert repository.get_receipt(receipt_id, fields) == {
+        "id": receipt_id,
+        "ocr_tier": "fast",
+        "vendor_confidence": 93.5,
+        "date_confidence": 0.0,
+        "total_confidence": 88.0,
+    }
+    assert repository.get_receipt(plain_id, ["ocr_tier"])["ocr_tier"] is None
+
+
+def test_receipt_items_answer_spend_queries_from_indexes(tmp_path: Path) -> None:
+    db = build_db(tmp_path)
+    repository = ReceiptRepository(db)
+    repository.insert_receipt(
+        "1/15/24", "Coffee Hut", 9.0, "a.png", "OCR", "2024-01-15T08:00:00",
+        items=[("LATTE", 4.5, 1), ("COFFEE BEANS 12OZ", 4.5, 1)],
+    )
+    repository.insert_receipt(
+        "2024-02-03", "Corner Grocery", 12.0, "b.png", "OCR", "2024-02-03T08:00:00",
+        items=[("Coffee Beans", 9.0, 2), ("MILK 2% 1GAL", 3.0, 1)],
+    )
+    # No receipt date: the upload day is used.
+    repository.insert_receipt(
+        None, "Coffee Hut", 3.0, "c.png", "OCR", "2024-03-01T08:00:00", items=[("COFFEE", 3.0, 1)]
+    )
+
+    coffee = repository.item_spend("Coffee")
+    assert (coffee["item"], coffee["total"], coffee["quantity"], coffee["count"]) == ("coffee", 16.5, 4, 3)
+    assert [(group["key"], group["total"]) for group in coffee["groups"]] == [
+        ("2024-01", 4.5),
+        ("2024-02", 9.0),
+        ("2024-03", 3.0),
+    ]
+    by_item = repository.item_spend(date_from="2024-01-01", date_to="2/29/2024", group_by="item", limit=2)
+    assert by_item["total"] == 21.0
+    assert [(group["key"], group["total"]) for group in by_item["groups"]] == [("coffee beans", 13.5), ("latte", 4.5)]
+
+    with db.connect() as conn:
+        plans = [
+            " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT SUM(amount) FROM receipt_items WHERE {where}"))
+            for where in (
+                "item_key >= 'coffee' AND item_key < 'coffef' AND receipt_date >= '2024-01-01'",
+                "receipt_date >= '2024-01-01' AND receipt_date <= '2024-02-29'",
+            )
+        ]
+    assert "COVERING INDEX idx_receipt_items_key_date" in plans[0]
+    assert "COVERING INDEX idx_receipt_items_date_key" in plans[1]
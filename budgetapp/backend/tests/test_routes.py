@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
@@ -12,6 +12,7 @@ import pandas as pd
 from app.api.routes import build_router
 from app.core.config import AppConfig
 from app.services.budgets import BudgetService
+from app.services.jobs import ArchiveTooLargeError
 
 
 @dataclass
@@ -20,6 +21,11 @@ class DummyReceiptService:
     list_data: list[dict[str, Any]] | None = None
     receipt_data: dict[str, Any] | None = None
     csv_text: str = "date,vendor,total,created_at\n"
+    last_filters: dict[str, Any] | None = None
+    category_update: tuple[int, str | None] | None = None
+    last_search: tuple[str, int, int] | None = None
+    last_fields: list[str] | None = None
+    last_item_spend: tuple | None = None
 
     def create_receipt(self, contents: bytes) -> dict[str, Any]:
         self.created_with = contents
@@ -31,23 +37,45 @@ class DummyReceiptService:
             "created_at": "2024-01-02T00:00:00",
         }
 
-    def list_receipts(self) -> list[dict[str, Any]]:
+    def list_receipts(self, **filters: Any) -> list[dict[str, Any]]:
+        self.last_filters = filters
         return self.list_data or []
 
-    def get_receipt(self, receipt_id: int) -> dict[str, Any] | None:
+    def get_receipt(self, receipt_id: int, fields: list[str] | None = None) -> dict[str, Any] | None:
+        if fields and "bogus" in fields:
+            raise ValueError("Unknown receipt fields: bogus")
+        self.last_fields = fields
         return self.receipt_data
 
+    def search_receipts(self, query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+        self.last_search = (query, limit, offset)
+        return self.list_data or []
+
+    def update_receipt_category(self, receipt_id: int, category: str | None) -> bool:
+        self.category_update = (receipt_id, category)
+        return self.receipt_data is not None
+
     def export_csv(self) -> StringIO:
         return StringIO(self.csv_text)
 
+    def ocr_cache_stats(self) -> dict[str, Any]:
+        return {"enabled": True, "hits": 3, "misses": 1}
+
+    def item_spend(self, *args: Any) -> dict[str, Any]:
+        self.last_item_spend = args
+        return {"item": args[0], "total": 16.5, "quantity": 4, "count": 3, "groups": []}
+
 
 @dataclass
 class DummyBudgetService:
     list_data: list[dict[str, Any]] | None = None
     last_args: tuple[str, float, float, float] | None = None
     last_import: tuple[str, bytes] | None = None
+    bulk_rows: list[tuple[str, float, float, float]] | None = None
+    last_month: str | None = None
 
-    def list_budgets(self) -> list[dict[str, Any]]:
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
+        self.last_month = month
         return self.list_data or []
 
     def upsert_budget(
@@ -65,16 +93,23 @@ class DummyBudgetService:
             "prior_balance": prior_balance,
         }
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        self.bulk_rows = list(budgets)
+        return len(self.bulk_rows)
+
     def import_budgets(self, filename: str, contents: bytes) -> dict[str, Any]:
         self.last_import = (filename, contents)
         return {"imported": 1}
 
+    async def import_budgets_async(self, filename: str, contents: bytes) -> dict[str, Any]:
+        return self.import_budgets(filename, contents)
+
 
 @dataclass
 class RecordingBudgetRepository:
     upserted: list[tuple[str, float, float, float]] = field(default_factory=list)
 
-    def list_budgets(self) -> list[dict[str, Any]]:
+    def list_budgets(self, month: str | None = None) -> list[dict[str, Any]]:
         return []
 
     def upsert_budget(
@@ -92,8 +127,103 @@ class RecordingBudgetRepository:
             "prior_balance": prior_balance,
         }
 
+    def bulk_upsert_budgets(self, budgets: Iterable[tuple[str, float, float, float]]) -> int:
+        rows = list(budgets)
+        self.upserted.extend(rows)
+        return len(rows)
+
+
+@dataclass
+class DummyJobService:
+    submitted: bytes | None = None
+    job_data: dict[str, Any] | None = None
+    batch_error: Exception | None = None
+
+    async def submit_receipt(self, contents: bytes) -> dict[str, Any]:
+        self.submitted = contents
+        return {"id": "job-1", "status": "queued"}
+
+    async def submit_upload(self, upload: Any) -> dict[str, Any]:
+        return await self.submit_receipt(await upload.read())
+
+    async def submit_batch(self, uploads: list[tuple[str, str, Any]]) -> list[dict[str, Any]]:
+        if self.batch_error is not None:
+            raise self.batch_error
+        return [
+            {"filename": filename, "content_type": content_type, "size": len(upload.read())}
+            for filename, content_type, upload in uploads
+        ]
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        return self.job_data
+
+    def retry_jobs(self) -> int:
+        return 2
+
+
+@dataclass
+class DummyVendorService:
+    added: list[tuple[str, str, str | None]] = field(default_factory=list)
+
+    def canonicalize(self, vendor: str) -> Any:
+        return None
+
+    def lookup(self, vendor: str) -> dict[str, Any]:
+        return {"vendor": vendor, "canonical": "Walmart", "category": None, "method": "fuzzy", "score": 0.8}
+
+    def list_aliases(self) -> list[dict[str, Any]]:
+        return [{"alias": alias, "canonical": canonical, "category": category} for alias, canonical, category in self.added]
+
+    def add_alias(self, alias: str, canonical: str, category: str | None = None) -> dict[str, Any]:
+        if not any(char.isalnum() for char in alias):
+            raise ValueError("Alias must contain letters or digits")
+        self.added.append((alias, canonical, category))
+        return {"alias": alias, "canonical": canonical, "category": category}
 
-def build_app(tmp_path: Path, receipt_service: DummyReceiptService, budget_service: DummyBudgetService) -> TestClient:
+    def renormalize(self) -> dict[str, int]:
+        return {"scanned": 4, "updated": 3}
+
+
+@dataclass
+class DummyRuleService:
+    rules: dict[int, dict[str, Any]] = field(default_factory=dict)
+    recategorized_with: bool | None = None
+
+    def categorize(self, vendor: str, text: str) -> str | None:
+        return None
+
+    def list_rules(self) -> list[dict[str, Any]]:
+        return list(self.rules.values())
+
+    def add_rule(self, keyword: str, category: str, priority: int = 0) -> dict[str, Any]:
+        if not keyword.strip():
+            raise ValueError("Keyword must not be blank")
+        rule = {"id": len(self.rules) + 1, "keyword": keyword, "category": category, "priority": priority}
+        self.rules[rule["id"]] = rule
+        return rule
+
+    def update_rule(self, rule_id: int, keyword: str, category: str, priority: int = 0) -> dict[str, Any] | None:
+        if rule_id not in self.rules:
+            return None
+        self.rules[rule_id] = {"id": rule_id, "keyword": keyword, "category": category, "priority": priority}
+        return self.rules[rule_id]
+
+    def delete_rule(self, rule_id: int) -> bool:
+        return self.rules.pop(rule_id, None) is not None
+
+    def recategorize(self, overwrite: bool = False) -> dict[str, int]:
+        self.recategorized_with = overwrite
+        return {"scanned": 10, "updated": 4}
+
+
+def build_app(
+    tmp_path: Path,
+    receipt_service: DummyReceiptService,
+    budget_service: DummyBudgetService,
+    job_service: DummyJobService | None = None,
+    vendor_service: DummyVendorService | None = None,
+    rule_service: DummyRuleService | None = None,
+) -> TestClient:
     base_dir = tmp_path / "app"
     data_dir = base_dir / "data"
     receipts_dir = data_dir / "receipts"
@@ -110,7 +240,16 @@ def build_app(tmp_path: Path, receipt_service: DummyReceiptService, budget_servi
     )
 
     app = FastAPI()
-    app.include_router(build_router(config, receipt_service, budget_service))
+    app.include_router(
+        build_router(
+            config,
+            receipt_service,
+            budget_service,
+            job_service or DummyJobService(),
+            vendor_service or DummyVendorService(),
+            rule_service or DummyRuleService(),
+        )
+    )
     return TestClient(app)
 
 
@@ -145,17 +284,85 @@ def test_create_receipt_rejects_non_image(tmp_path: Path) -> None:
 
 
 def test_create_receipt_accepts_image(tmp_path: Path) -> None:
-    receipt_service = DummyReceiptService()
-    client = build_app(tmp_path, receipt_service, DummyBudgetService())
+    job_service = DummyJobService()
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), job_service)
 
     response = client.post(
         "/receipts",
         files={"file": ("receipt.png", b"image-bytes", "image/png")},
     )
 
+    assert response.status_code == 202
+    assert job_service.submitted == b"image-bytes"
+    assert response.json() == {"id": "job-1", "status": "queued"}
+
+
+def test_create_receipts_batch_passes_every_file(tmp_path: Path) -> None:
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService())
+
+    response = client.post(
+        "/receipts/batch",
+        files=[
+            ("files", ("a.png", b"aa", "image/png")),
+            ("files", ("scans.zip", b"zipped", "application/zip")),
+        ],
+    )
+
+    assert response.status_code == 202
+    assert response.json() == [
+        {"filename": "a.png", "content_type": "image/png", "size": 2},
+        {"filename": "scans.zip", "content_type": "application/zip", "size": 6},
+    ]
+
+
+def test_create_receipts_batch_rejects_oversized_archives(tmp_path: Path) -> None:
+    job_service = DummyJobService(batch_error=ArchiveTooLargeError(500, 512 * 1024 * 1024))
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), job_service)
+
+    response = client.post(
+        "/receipts/batch",
+        files=[("files", ("scans.zip", b"zipped", "application/zip"))],
+    )
+
+    assert response.status_code == 413
+    assert "500 files" in response.json()["detail"]
+
+
+def test_create_receipt_rejects_oversized_upload(tmp_path: Path) -> None:
+    job_service = DummyJobService()
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), job_service)
+
+    response = client.post(
+        "/receipts",
+        files={"file": ("receipt.png", b"x" * (25 * 1024 * 1024 + 1), "image/png")},
+    )
+
+    assert response.status_code == 413
+    assert job_service.submitted is None
+
+
+def test_get_job(tmp_path: Path) -> None:
+    job_service = DummyJobService()
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), job_service)
+
+    missing = client.get("/jobs/job-1")
+
+    assert missing.status_code == 404
+
+    job_service.job_data = {"id": "job-1", "status": "done", "receipt_id": 4, "receipt": {"id": 4}}
+    response = client.get("/jobs/job-1")
+
+    assert response.status_code == 200
+    assert response.json()["receipt"] == {"id": 4}
+
+
+def test_retry_jobs(tmp_path: Path) -> None:
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService())
+
+    response = client.post("/jobs/retry")
+
     assert response.status_code == 200
-    assert receipt_service.created_with == b"image-bytes"
-    assert response.json()["id"] == 1
+    assert response.json() == {"requeued": 2}
 
 
 def test_list_and_get_receipts(tmp_path: Path) -> None:
@@ -177,6 +384,69 @@ def test_list_and_get_receipts(tmp_path: Path) -> None:
 
     assert get_response.status_code == 200
     assert get_response.json()["id"] == 1
+    assert receipt_service.last_fields is None
+
+    projected = client.get("/receipts/1", params={"fields": "vendor, ocr_text"})
+    invalid = client.get("/receipts/1", params={"fields": "bogus"})
+
+    assert projected.status_code == 200
+    assert receipt_service.last_fields == ["vendor", "ocr_text"]
+    assert invalid.status_code == 400
+
+
+def test_list_receipts_passes_filters_and_next_cursor(tmp_path: Path) -> None:
+    receipt_service = DummyReceiptService(list_data=[{"id": 9}, {"id": 7}])
+    client = build_app(tmp_path, receipt_service, DummyBudgetService())
+
+    response = client.get(
+        "/receipts",
+        params={"limit": 2, "after_id": 10, "vendor": "Store", "date_from": "2024-01-01", "min_total": 5},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["x-next-after-id"] == "7"
+    assert receipt_service.last_filters == {
+        "limit": 2,
+        "after_id": 10,
+        "vendor": "Store",
+        "date_from": "2024-01-01",
+        "date_to": None,
+        "min_total": 5.0,
+        "max_total": None,
+    }
+
+    short_page = client.get("/receipts", params={"limit": 5})
+
+    assert "x-next-after-id" not in short_page.headers
+
+
+def test_search_receipts(tmp_path: Path) -> None:
+    receipt_service = DummyReceiptService(list_data=[{"id": 4, "snippet": "<mark>milk</mark>"}])
+    client = build_app(tmp_path, receipt_service, DummyBudgetService())
+
+    response = client.get("/receipts/search", params={"q": "milk", "limit": 1, "offset": 2})
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": 4, "snippet": "<mark>milk</mark>"}]
+    assert response.headers["x-next-offset"] == "3"
+    assert receipt_service.last_search == ("milk", 1, 2)
+    assert client.get("/receipts/search").status_code == 422
+
+
+def test_update_receipt_category(tmp_path: Path) -> None:
+    receipt_service = DummyReceiptService()
+    client = build_app(tmp_path, receipt_service, DummyBudgetService())
+
+    missing = client.put("/receipts/3/category", json={"category": "Food"})
+
+    assert missing.status_code == 404
+
+    receipt_service.receipt_data = {"id": 3}
+    response = client.put("/receipts/3/category", json={"category": " Food "})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 3, "category": "Food"}
+    assert receipt_service.category_update == (3, "Food")
 
 
 def test_export_csv(tmp_path: Path) -> None:
@@ -191,6 +461,15 @@ def test_export_csv(tmp_path: Path) -> None:
     assert response.text.startswith("date,vendor,total,created_at")
 
 
+def test_ocr_cache_stats(tmp_path: Path) -> None:
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService())
+
+    response = client.get("/ocr-cache")
+
+    assert response.status_code == 200
+    assert response.json()["hits"] == 3
+
+
 def test_list_and_upsert_budgets(tmp_path: Path) -> None:
     budget_service = DummyBudgetService(list_data=[{"category": "Food"}])
     client = build_app(tmp_path, DummyReceiptService(), budget_service)
@@ -200,6 +479,13 @@ def test_list_and_upsert_budgets(tmp_path: Path) -> None:
     assert list_response.status_code == 200
     assert list_response.json() == [{"category": "Food"}]
 
+    month_response = client.get("/budgets", params={"month": "2024-03"})
+    bad_month_response = client.get("/budgets", params={"month": "March"})
+
+    assert month_response.status_code == 200
+    assert budget_service.last_month == "2024-03"
+    assert bad_month_response.status_code == 422
+
     upsert_response = client.post(
         "/budgets",
         json={
@@ -215,6 +501,96 @@ def test_list_and_upsert_budgets(tmp_path: Path) -> None:
     assert upsert_response.json()["category"] == "Travel"
 
 
+def test_bulk_upsert_budgets_reports_row_errors(tmp_path: Path) -> None:
+    budget_service = DummyBudgetService()
+    client = build_app(tmp_path, DummyReceiptService(), budget_service)
+
+    response = client.post(
+        "/budgets/bulk",
+        json=[
+            {"category": "Food", "monthly_limit": 300, "spent": 120},
+            {"category": "Travel", "monthly_limit": "lots"},
+            {"category": "  "},
+            {"category": " Rent ", "monthly_limit": 1200, "prior_balance": 50},
+        ],
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 2
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert body["errors"][0]["errors"][0]["field"] == "monthly_limit"
+    assert budget_service.bulk_rows == [
+        ("Food", 300.0, 120.0, 0.0),
+        ("Rent", 1200.0, 0.0, 50.0),
+    ]
+
+
+def test_bulk_budget_schema_is_typed_and_row_count_is_capped(tmp_path: Path) -> None:
+    budget_service = DummyBudgetService()
+    client = build_app(tmp_path, DummyReceiptService(), budget_service)
+
+    schema = client.get("/openapi.json").json()["paths"]["/budgets/bulk"]["post"]["requestBody"]["content"]
+    body_schema = schema["application/json"]["schema"]
+    too_many = client.post("/budgets/bulk", json=[{"category": "Food"}] * 1001)
+
+    assert body_schema["maxItems"] == 1000
+    assert {"$ref": "#/components/schemas/BudgetUpsertRequest"} in body_schema["items"]["anyOf"]
+    assert too_many.status_code == 422
+    assert budget_service.bulk_rows is None
+
+
+def test_vendor_alias_routes(tmp_path: Path) -> None:
+    vendor_service = DummyVendorService()
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), vendor_service=vendor_service)
+
+    added = client.post("/vendors/aliases", json={"alias": " WAL-MART ", "canonical": "Walmart", "category": " "})
+    rejected = client.post("/vendors/aliases", json={"alias": "#", "canonical": "Walmart"})
+    blank = client.post("/vendors/aliases", json={"alias": "Walmart", "canonical": " "})
+
+    assert added.status_code == 200
+    assert vendor_service.added == [("WAL-MART", "Walmart", None)]
+    assert rejected.status_code == 400
+    assert blank.status_code == 400
+    assert client.get("/vendors/aliases").json() == [{"alias": "WAL-MART", "canonical": "Walmart", "category": None}]
+    assert client.get("/vendors/lookup", params={"name": "WALMRT"}).json()["canonical"] == "Walmart"
+    assert client.post("/vendors/renormalize").json() == {"scanned": 4, "updated": 3}
+
+
+def test_category_rule_routes(tmp_path: Path) -> None:
+    rule_service = DummyRuleService()
+    client = build_app(tmp_path, DummyReceiptService(), DummyBudgetService(), rule_service=rule_service)
+
+    created = client.post("/rules", json={"keyword": "coffee", "category": " Coffee ", "priority": 2})
+    assert created.status_code == 200
+    assert created.json() == {"id": 1, "keyword": "coffee", "category": "Coffee", "priority": 2}
+    assert client.post("/rules", json={"keyword": " ", "category": "Coffee"}).status_code == 400
+    assert client.post("/rules", json={"keyword": "tea", "category": " "}).status_code == 400
+
+    updated = client.put("/rules/1", json={"keyword": "espresso", "category": "Coffee"})
+    assert updated.json()["keyword"] == "espresso"
+    assert client.put("/rules/9", json={"keyword": "tea", "category": "Coffee"}).status_code == 404
+    assert client.get("/rules").json() == [{"id": 1, "keyword": "espresso", "category": "Coffee", "priority": 0}]
+
+    assert client.post("/rules/recategorize", params={"overwrite": "true"}).json() == {"scanned": 10, "updated": 4}
+    assert rule_service.recategorized_with is True
+
+    assert client.delete("/rules/1").json() == {"id": 1, "deleted": True}
+    assert client.delete("/rules/1").status_code == 404
+
+
+def test_item_spend_route(tmp_path: Path) -> None:
+    receipt_service = DummyReceiptService()
+    client = build_app(tmp_path, receipt_service, DummyBudgetService())
+
+    response = client.get("/items/spend", params={"item": "coffee", "date_from": "2024-01-01", "group_by": "item"})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 16.5
+    assert receipt_service.last_item_spend == ("coffee", "2024-01-01", None, "item", 100)
+    assert client.get("/items/spend", params={"group_by": "vendor"}).status_code == 422
+
+
 def test_upload_budgets(tmp_path: Path) -> None:
     budget_service = DummyBudgetService()
     client = build_app(tmp_path, DummyReceiptService(), budget_service)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository
+from app.repositories.rules import CategoryRuleRepository
+from app.services.rules import CategoryRuleService, CompiledRules, normalize_keyword
+
+
+def rule(rule_id: int, keyword: str, category: str, priority: int = 0) -> dict:
+    return {"id": rule_id, "keyword": keyword, "category": category, "priority": priority}
+
+
+def test_compiled_rules_match_whole_words_by_priority() -> None:
+    rules = CompiledRules(
+        [
+            rule(1, "coffee", "Coffee"),
+            rule(2, "coffee beans", "Groceries"),
+            rule(3, "walmart", "Groceries"),
+            rule(4, "fuel", "Transport", priority=5),
+            rule(5, "milk", "Dairy"),
+            rule(6, "milk", "Groceries"),
+        ]
+    )
+
+    assert rules.categorize("Coffee Hut", "LATTE 4.50") == "Coffee"
+    # On equal priority the longer keyword wins.
+    assert rules.categorize("Corner Grocery", "COFFEE\tBEANS 12OZ 9.99") == "Groceries"
+    # Higher priority beats the vendor keyword.
+    assert rules.categorize("WALMART", "FUEL 40.00") == "Transport"
+    # Same keyword: the oldest rule wins.
+    assert rules.categorize("Store", "MILK 3.49") == "Dairy"
+    assert rules.categorize("Coffeehouse", "FUELING") is None
+    assert CompiledRules([]).categorize("Coffee Hut", "LATTE") is None
+
+
+def test_compiled_rules_see_keywords_nested_in_longer_ones() -> None:
+    rules = CompiledRules(
+        [
+            rule(1, "coffee beans", "Groceries"),
+            rule(2, "beans", "Pantry", priority=10),
+            rule(3, "coffee", "Coffee", priority=20),
+        ]
+    )
+
+    # "coffee" is a prefix of the longest match, "beans" starts inside it.
+    assert rules.categorize("Corner Grocery", "COFFEE BEANS 12.99") == "Coffee"
+    assert rules.categorize("Corner Grocery", "COFFEE\tBEANS") == "Coffee"
+    assert rules.categorize("Corner Grocery", "BAKED BEANS 1.99") == "Pantry"
+    assert rules.categorize("Corner Grocery", "COFFEEBEANS") is None
+
+
+def test_normalize_keyword_rejects_unanchored_keywords() -> None:
+    assert normalize_keyword("  Coffee   Beans ") == "coffee beans"
+    for keyword in ("", "   ", "c++", "x" * 101):
+        with pytest.raises(ValueError):
+            normalize_keyword(keyword)
+
+
+def test_service_recompiles_on_change_and_recategorizes(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    receipts = ReceiptRepository(db)
+    latte = receipts.insert_receipt("2024-03-14", "Coffee Hut", 4.5, "a.png", "LATTE 4.50", "2024-03-14T10:00:00")
+    fuel = receipts.insert_receipt("2024-03-15", "SHELL OIL", 40.0, "b.png", "UNLEADED 40.00", "2024-03-15T10:00:00")
+    manual = receipts.insert_receipt(
+        "2024-03-16", "Coffee Hut", 3.0, "c.png", "LATTE 3.00", "2024-03-16T10:00:00", category="Treats"
+    )
+
+    service = CategoryRuleService(CategoryRuleRepository(db), chunk_size=2)
+    assert service.categorize("Coffee Hut", "LATTE") is None
+    added = service.add_rule("Latte", "Coffee")
+    assert service.categorize("Coffee Hut", "LATTE") == "Coffee"
+    service.update_rule(added["id"], "unleaded", "Transport")
+    assert service.categorize("Coffee Hut", "LATTE") is None
+    service.add_rule("latte", "Coffee")
+
+    assert service.recategorize() == {"scanned": 2, "updated": 2}
+    categories = {row["id"]: row["category"] for row in receipts.list_receipts()}
+    assert categories == {latte: "Coffee", fuel: "Transport", manual: "Treats"}
+
+    assert service.recategorize(overwrite=True) == {"scanned": 3, "updated": 1}
+    with db.connect() as conn:
+        rollups = dict(conn.execute("SELECT category, receipt_count FROM spend_rollups WHERE receipt_count > 0"))
+    assert rollups == {"Coffee": 2, "Transport": 1}
+
+    assert service.delete_rule(added["id"])
+    assert not service.delete_rule(added["id"])
+    assert service.categorize("SHELL", "UNLEADED") is None
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+
+from app.services.uploads import UploadTooLargeError, UploadWriter
+
+
+class ChunkedUpload:
+    def __init__(self, contents: bytes) -> None:
+        self._stream = io.BytesIO(contents)
+        self.read_sizes: list[int] = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return self._stream.read(size)
+
+
+def test_save_async_streams_hashes_and_renames(tmp_path: Path) -> None:
+    writer = UploadWriter(tmp_path, max_bytes=1000, chunk_bytes=64)
+    contents = bytes(range(256)) * 3
+    upload = ChunkedUpload(contents)
+
+    stored = asyncio.run(writer.save_async(upload, lambda content_hash, header: tmp_path / f"{content_hash}.png"))
+
+    assert set(upload.read_sizes) == {64}
+    assert stored.content_hash == hashlib.sha256(contents).hexdigest()
+    assert stored.size_bytes == len(contents)
+    assert stored.path.read_bytes() == contents
+    assert list(tmp_path.iterdir()) == [stored.path]
+
+
+def test_save_rejects_oversized_stream_and_leaves_no_partial_file(tmp_path: Path) -> None:
+    writer = UploadWriter(tmp_path, max_bytes=100, chunk_bytes=64)
+
+    with pytest.raises(UploadTooLargeError):
+        writer.save(io.BytesIO(b"x" * 101), lambda content_hash, header: tmp_path / "never.png")
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.core.database import Database
+from app.repositories.receipts import ReceiptRepository
+from app.repositories.vendors import VendorAliasRepository
+from app.services.vendors import VendorIndex, VendorService, vendor_key
+
+
+def test_vendor_key_drops_store_numbers_and_punctuation() -> None:
+    assert vendor_key("WAL-MART #123") == "WALMART"
+    assert vendor_key("Wal Mart") == "WALMART"
+    assert vendor_key("SHELL OIL 57442") == "SHELLOIL"
+    assert vendor_key("7-ELEVEN") == "7ELEVEN"
+
+
+def test_index_matches_exact_prefix_and_fuzzy_spellings() -> None:
+    index = VendorIndex(threshold=0.7)
+    index.add(vendor_key("WAL-MART"), "Walmart", "Groceries")
+    index.add(vendor_key("TARGET"), "Target")
+
+    assert index.match("Wal-Mart #123")[:3] == ("Walmart", "Groceries", "exact")
+    assert index.match("WALMART SUPERCENTER")[:3] == ("Walmart", "Groceries", "prefix")
+    assert index.match("WALMRT").method == "fuzzy"
+    assert index.match("TARGT").canonical == "Target"
+    assert index.match("Joe's Diner") == ("Joe's Diner", None, "none", 0.0)
+    # Short spellings are never matched fuzzily.
+    assert index.match("TAR").method == "none"
+
+
+def test_service_persists_aliases_and_renormalizes_receipts(tmp_path: Path) -> None:
+    db = Database(tmp_path / "app.db")
+    db.init()
+    receipts = ReceiptRepository(db)
+    for vendor in ("WAL-MART #123", "Walmart Supercenter", "WALMRT", "Corner Grocery"):
+        receipts.insert_receipt("2024-03-14", vendor, 10.0, "r.png", "text", "2024-03-14T10:00:00")
+
+    service = VendorService(VendorAliasRepository(db))
+    service.add_alias("WAL-MART", "Walmart", "Groceries")
+
+    # A fresh service loads the same aliases from the table.
+    reloaded = VendorService(VendorAliasRepository(db))
+    assert reloaded.list_aliases() == [{"alias": "WAL-MART", "canonical": "Walmart", "category": "Groceries"}]
+    assert reloaded.canonicalize("Wal Mart #9").canonical == "Walmart"
+
+    assert reloaded.renormalize() == {"scanned": 4, "updated": 3}
+    rows = receipts.list_receipts()
+    assert sorted((row["vendor"], row["category"]) for row in rows) == [
+        ("Corner Grocery", None),
+        ("Walmart", "Groceries"),
+        ("Walmart", "Groceries"),
+        ("Walmart", "Groceries"),
+    ]
+    with db.connect() as conn:
+        rollup = conn.execute("SELECT total, receipt_count FROM spend_rollups WHERE category = 'Groceries'").fetchone()
+    assert tuple(rollup) == (30.0, 3)
+    # Nothing left to change.
+    assert reloaded.renormalize()["updated"] == 0